@@ -5,6 +5,8 @@ Página de inicio con navegación y bienvenida
 import streamlit as st
 from pathlib import Path
 
+from src.rag.warmup import get_vector_store_loader
+
 # Configuración de la página
 st.set_page_config(
     page_title="Multi-Page Streamlit App",
@@ -13,6 +15,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Empezar a cargar el modelo de embeddings y el índice en segundo plano
+get_vector_store_loader()
+
 # CSS personalizado con Tailwind-inspired styles
 st.markdown("""
 <style>
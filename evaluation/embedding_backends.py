@@ -0,0 +1,183 @@
+"""
+Paridad y rendimiento de los backends de embeddings (PyTorch frente a ONNX Runtime)
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, List
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.embeddings import Embeddings
+
+from src.rag.vector_store import VectorStore
+from src.rag.document_loader import DocumentLoader
+from src.rag.onnx_embeddings import OnnxEmbeddings
+from src.rag.quantization import top_k_indices
+from src.config import config
+from evaluation.config import RESULTS_DIR
+from evaluation.test_rag import load_scenarios
+from evaluation.quantization_recall import build_queries
+
+
+def measure_backend(embeddings: Embeddings, queries: List[str], documents: List[str]) -> Dict[str, Any]:
+    """
+    Mide latencia por consulta y rendimiento por lotes de un backend
+
+    Args:
+        embeddings: Modelo de embeddings
+        queries: Consultas (se embeben de una en una)
+        documents: Textos de documentos (se embeben en un único lote)
+
+    Returns:
+        Métricas y vectores calculados ('query_vectors', 'document_vectors')
+    """
+    embeddings.embed_query("calentamiento")  # La primera llamada incluye inicializaciones
+
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        start = time.perf_counter()
+        query_vectors.append(embeddings.embed_query(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    document_vectors = embeddings.embed_documents(documents) if documents else []
+    batch_time = time.perf_counter() - start
+
+    return {
+        "query_p50_ms": float(np.percentile(latencies, 50)) if latencies else 0.0,
+        "query_p95_ms": float(np.percentile(latencies, 95)) if latencies else 0.0,
+        "docs_per_second": len(documents) / batch_time if documents and batch_time > 0 else 0.0,
+        "query_vectors": np.asarray(query_vectors, dtype=np.float32),
+        "document_vectors": np.asarray(document_vectors, dtype=np.float32),
+    }
+
+
+def compare_vectors(
+    reference: Dict[str, Any],
+    candidate: Dict[str, Any],
+    k: int = 10
+) -> Dict[str, float]:
+    """
+    Compara los vectores de un backend con los de referencia (PyTorch)
+
+    Args:
+        reference: Resultado de measure_backend para PyTorch
+        candidate: Resultado de measure_backend para el backend a comparar
+        k: Resultados por consulta para medir el recall de recuperación
+
+    Returns:
+        Similitud coseno media/mínima, diferencia absoluta máxima y recall@k
+    """
+    dim = reference["query_vectors"].shape[1]
+    ref = np.vstack([reference["query_vectors"], reference["document_vectors"].reshape(-1, dim)])
+    cand = np.vstack([candidate["query_vectors"], candidate["document_vectors"].reshape(-1, dim)])
+    cosine = np.sum(ref * cand, axis=1)  # Vectores normalizados
+
+    recalls = []
+    if len(reference["document_vectors"]):
+        for ref_query, cand_query in zip(reference["query_vectors"], candidate["query_vectors"]):
+            expected = set(top_k_indices(reference["document_vectors"] @ ref_query, k).tolist())
+            found = set(top_k_indices(candidate["document_vectors"] @ cand_query, k).tolist())
+            recalls.append(len(expected & found) / max(len(expected), 1))
+
+    return {
+        "mean_cosine": float(cosine.mean()),
+        "min_cosine": float(cosine.min()),
+        "max_abs_diff": float(np.abs(ref - cand).max()),
+        "recall_at_k": float(np.mean(recalls)) if recalls else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Paridad y latencia de embeddings: PyTorch frente a ONNX Runtime (float32 / int8)'
+    )
+    parser.add_argument(
+        '-d', '--dataset',
+        default="evaluation/datasets/test_one_scenario.json",
+        help='Dataset de escenarios del que se generan las consultas'
+    )
+    parser.add_argument(
+        '--documents',
+        default=config.UPLOADS_DIR,
+        help='Directorio de documentos usados para medir rendimiento por lotes'
+    )
+    parser.add_argument('--max-documents', type=int, default=500, help='Máximo de documentos (default: 500)')
+    parser.add_argument('-k', type=int, default=10, help='Resultados para recall de recuperación (default: 10)')
+    parser.add_argument('--no-int8', action='store_true', help='No evaluar el modelo ONNX cuantizado')
+    args = parser.parse_args()
+
+    queries = build_queries(load_scenarios(args.dataset))
+    documents = []
+    if Path(args.documents).exists():
+        documents = [doc.page_content for doc in DocumentLoader().load_documents(args.documents)]
+    documents = documents[:args.max_documents]
+
+    backends = {
+        "torch": lambda: VectorStore._create_embeddings("torch"),
+        "onnx": lambda: OnnxEmbeddings(config.EMBEDDING_MODEL, quantize=False),
+    }
+    if not args.no_int8:
+        backends["onnx-int8"] = lambda: OnnxEmbeddings(config.EMBEDDING_MODEL, quantize=True)
+
+    print(f"📐 {len(queries)} consultas, {len(documents)} documentos")
+    measurements = {}
+    for name, factory in backends.items():
+        print(f"⏱️  Midiendo backend {name}...")
+        start = time.perf_counter()
+        embeddings = factory()
+        load_time = time.perf_counter() - start
+        measurements[name] = measure_backend(embeddings, queries, documents)
+        measurements[name]["load_seconds"] = load_time
+
+    results = {}
+    for name, metrics in measurements.items():
+        results[name] = {
+            key: value for key, value in metrics.items()
+            if key not in ("query_vectors", "document_vectors")
+        }
+        if name != "torch":
+            results[name].update(compare_vectors(measurements["torch"], metrics, k=args.k))
+
+    print("\n" + "=" * 80)
+    print("📊 BACKENDS DE EMBEDDINGS")
+    print("=" * 80)
+    for name, metrics in results.items():
+        line = (
+            f"  {name:<10} carga={metrics['load_seconds']:.1f}s  "
+            f"consulta p50={metrics['query_p50_ms']:.1f}ms p95={metrics['query_p95_ms']:.1f}ms  "
+            f"lote={metrics['docs_per_second']:.0f} docs/s"
+        )
+        if "mean_cosine" in metrics:
+            line += f"  coseno={metrics['mean_cosine']:.5f} (mín {metrics['min_cosine']:.5f})  recall@{args.k}={metrics['recall_at_k']:.3f}"
+        print(line)
+    print("=" * 80 + "\n")
+
+    output_file = RESULTS_DIR / f"embedding_backends_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(
+            {
+                "model": config.EMBEDDING_MODEL,
+                "num_queries": len(queries),
+                "num_documents": len(documents),
+                "k": args.k,
+                "results": results,
+            },
+            f,
+            indent=2,
+            ensure_ascii=False
+        )
+
+    print(f"✅ Resultados guardados en: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Benchmark de parámetros HNSW de Chroma: recall@k frente a latencia
+"""
+import sys
+import json
+import time
+import shutil
+import argparse
+import itertools
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, List
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.rag.vector_store import VectorStore
+from src.rag.backends import ChromaBackend
+from src.rag.index_stats import directory_size
+from src.rag.quantization import top_k_indices
+from src.config import config
+from evaluation.config import RESULTS_DIR
+from evaluation.test_rag import load_scenarios
+from evaluation.quantization_recall import build_queries
+
+
+def latency_percentiles(latencies: List[float]) -> Dict[str, float]:
+    """Percentiles p50/p95/p99 (ms) de una lista de latencias en segundos"""
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+def build_index(
+    directory: str,
+    exported: Dict[str, Any],
+    m: int,
+    construction_ef: int,
+    batch_size: int = 1000
+) -> Dict[str, Any]:
+    """
+    Construye una colección de Chroma con unos parámetros HNSW
+
+    Args:
+        directory: Directorio (vacío) de la colección
+        exported: Contenido del índice ('ids', 'texts', 'metadatas', 'vectors')
+        m: Vecinos por nodo del grafo
+        construction_ef: Candidatos explorados al insertar
+        batch_size: Vectores por escritura
+
+    Returns:
+        Duración de la construcción, tamaño en disco y memoria estimada
+    """
+    backend = ChromaBackend(directory, hnsw={"max_neighbors": m, "ef_construction": construction_ef})
+
+    start = time.perf_counter()
+    for offset in range(0, len(exported["ids"]), batch_size):
+        end = offset + batch_size
+        backend.upsert(
+            exported["ids"][offset:end],
+            exported["vectors"][offset:end].tolist(),
+            exported["texts"][offset:end],
+            exported["metadatas"][offset:end]
+        )
+    backend.persist()
+    build_seconds = time.perf_counter() - start
+
+    return {
+        "build_seconds": build_seconds,
+        "disk_mb": directory_size(directory) / (1024 * 1024),
+        "memory_mb": backend.memory_bytes / (1024 * 1024),
+    }
+
+
+def measure_search(
+    backend,
+    ids: List[str],
+    query_vectors: np.ndarray,
+    expected: List[set],
+    k: int
+) -> Dict[str, Any]:
+    """
+    Mide latencia por consulta y recall@k frente a la búsqueda exacta
+
+    Args:
+        backend: Backend a consultar
+        ids: Ids del índice (posición -> id) para traducir la búsqueda exacta
+        query_vectors: Embeddings de las consultas
+        expected: Posiciones del top-k exacto de cada consulta
+        k: Número de resultados
+
+    Returns:
+        Percentiles de latencia y recall@k medio / mínimo
+    """
+    backend.query(query_vectors[0].tolist(), k)  # Carga el índice en memoria
+
+    latencies = []
+    recalls = []
+    for query, positions in zip(query_vectors, expected):
+        start = time.perf_counter()
+        results = backend.query(query.tolist(), k)
+        latencies.append(time.perf_counter() - start)
+
+        wanted = {ids[i] for i in positions}
+        recalls.append(len(wanted & {doc.id for doc, _ in results}) / max(len(wanted), 1))
+
+    return {
+        **latency_percentiles(latencies),
+        "recall_at_k": float(np.mean(recalls)),
+        "min_recall": float(np.min(recalls)),
+    }
+
+
+def run_benchmark(
+    exported: Dict[str, Any],
+    query_vectors: np.ndarray,
+    m_values: List[int],
+    construction_ef_values: List[int],
+    search_ef_values: List[int],
+    k: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Construye el índice con cada combinación de M y construction_ef y lo
+    consulta con cada search_ef
+
+    search_ef solo se aplica antes de la primera búsqueda de una colección
+    en el proceso, así que cada valor se mide sobre una copia del índice.
+
+    Args:
+        exported: Contenido del índice ('ids', 'texts', 'metadatas', 'vectors')
+        query_vectors: Embeddings de las consultas
+        m_values: Valores de M
+        construction_ef_values: Valores de construction_ef
+        search_ef_values: Valores de search_ef
+        k: Número de resultados
+
+    Returns:
+        Una fila por combinación (más una fila 'exact' de referencia)
+    """
+    vectors = exported["vectors"]
+    expected = [set(top_k_indices(vectors @ query, k).tolist()) for query in query_vectors]
+
+    # Referencia: búsqueda exacta con NumPy
+    latencies = []
+    for query in query_vectors:
+        start = time.perf_counter()
+        top_k_indices(vectors @ query, k)
+        latencies.append(time.perf_counter() - start)
+    rows = [{
+        "setting": "exact",
+        "memory_mb": vectors.nbytes / (1024 * 1024),
+        **latency_percentiles(latencies),
+        "recall_at_k": 1.0,
+        "min_recall": 1.0,
+    }]
+
+    workdir = tempfile.mkdtemp(prefix="hnsw_benchmark_")
+    try:
+        for m, construction_ef in itertools.product(m_values, construction_ef_values):
+            print(f"🏗️  Construyendo M={m}, construction_ef={construction_ef}...")
+            base_dir = str(Path(workdir) / f"m{m}_c{construction_ef}")
+            build = build_index(base_dir, exported, m, construction_ef)
+
+            for search_ef in search_ef_values:
+                copy_dir = f"{base_dir}_s{search_ef}"
+                shutil.copytree(base_dir, copy_dir)
+                backend = ChromaBackend(
+                    copy_dir,
+                    hnsw={"max_neighbors": m, "ef_construction": construction_ef, "ef_search": search_ef}
+                )
+                search = measure_search(backend, exported["ids"], query_vectors, expected, k)
+                rows.append({
+                    "setting": f"M={m} cef={construction_ef} sef={search_ef}",
+                    "m": m,
+                    "construction_ef": construction_ef,
+                    "search_ef": search_ef,
+                    **build,
+                    **search,
+                })
+                print(
+                    f"   sef={search_ef:<4} recall@{k}={search['recall_at_k']:.3f}  "
+                    f"p50={search['p50_ms']:.2f}ms p95={search['p95_ms']:.2f}ms"
+                )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Recall@k, latencia, memoria y tiempo de construcción de Chroma según los parámetros HNSW'
+    )
+    parser.add_argument(
+        '-d', '--dataset',
+        default="evaluation/datasets/test_one_scenario.json",
+        help='Dataset de escenarios del que se generan las consultas'
+    )
+    parser.add_argument(
+        '--catalog-queries',
+        type=int,
+        default=200,
+        help='Consultas adicionales tomadas de chunks del catálogo al azar (default: 200)'
+    )
+    parser.add_argument('-k', type=int, default=10, help='Número de resultados (default: 10)')
+    parser.add_argument('--m', type=int, nargs='+', default=[8, 16, 32], help='Valores de M')
+    parser.add_argument(
+        '--construction-ef', type=int, nargs='+', default=[64, 100, 200], help='Valores de construction_ef'
+    )
+    parser.add_argument(
+        '--search-ef', type=int, nargs='+', default=[10, 50, 100, 200], help='Valores de search_ef'
+    )
+    parser.add_argument('--seed', type=int, default=42, help='Semilla para elegir las consultas del catálogo')
+    args = parser.parse_args()
+
+    print("🚀 Cargando VectorStore...")
+    vector_store = VectorStore()
+    vector_store.load_vectorstore()
+    exported = vector_store.vectorstore.export()
+
+    queries = build_queries(load_scenarios(args.dataset))
+    rng = np.random.default_rng(args.seed)
+    sample = rng.choice(len(exported["texts"]), size=min(args.catalog_queries, len(exported["texts"])), replace=False)
+    queries += [exported["texts"][i][:200] for i in sample]
+    query_vectors = np.asarray(vector_store.embeddings.embed_documents(queries), dtype=np.float32)
+
+    print(f"📐 {len(exported['ids'])} vectores, {len(queries)} consultas, k={args.k}")
+    rows = run_benchmark(
+        exported, query_vectors, args.m, args.construction_ef, args.search_ef, k=args.k
+    )
+
+    print("\n" + "=" * 100)
+    print(f"📊 HNSW: RECALL@{args.k} FRENTE A LATENCIA")
+    print("=" * 100)
+    for row in rows:
+        build = f"build={row['build_seconds']:.1f}s  disco={row['disk_mb']:.1f} MB  " if "build_seconds" in row else ""
+        print(
+            f"  {row['setting']:<28} recall={row['recall_at_k']:.3f} (mín {row['min_recall']:.2f})  "
+            f"p50={row['p50_ms']:.2f}ms p95={row['p95_ms']:.2f}ms p99={row['p99_ms']:.2f}ms  "
+            f"{build}memoria={row['memory_mb']:.1f} MB"
+        )
+    print("=" * 100)
+    print(
+        f"Actual: HNSW_M={config.HNSW_M} HNSW_CONSTRUCTION_EF={config.HNSW_CONSTRUCTION_EF} "
+        f"HNSW_SEARCH_EF={config.HNSW_SEARCH_EF}\n"
+    )
+
+    output_file = RESULTS_DIR / f"hnsw_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(
+            {
+                "k": args.k,
+                "num_vectors": len(exported["ids"]),
+                "num_queries": len(queries),
+                "results": rows,
+            },
+            f,
+            indent=2,
+            ensure_ascii=False
+        )
+
+    print(f"✅ Resultados guardados en: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
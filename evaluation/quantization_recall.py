@@ -0,0 +1,154 @@
+"""
+Verificación de recall@k de los embeddings cuantizados frente a float32
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, List
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.rag.vector_store import VectorStore
+from src.rag.quantization import QuantizedMatrix, top_k_indices
+from src.config import config
+from evaluation.config import RESULTS_DIR
+from evaluation.test_rag import load_scenarios
+
+
+def build_queries(scenarios: List[Dict[str, Any]]) -> List[str]:
+    """
+    Genera las mismas consultas que RAGEvaluator para cada escenario
+
+    Args:
+        scenarios: Escenarios del dataset de evaluación
+
+    Returns:
+        Lista de consultas (conversación completa, categoría y características)
+    """
+    queries = []
+    for scenario in scenarios:
+        queries.append(" ".join(scenario['conversation']))
+
+        category = scenario.get('category', '')
+        if category and category != 'unclear':
+            queries.append(category)
+
+        features = scenario.get('expected_extraction', {}).get('caracteristicas_clave', [])
+        if features:
+            queries.append(" ".join(features))
+
+    return queries
+
+
+def evaluate_quantization(
+    vectors: np.ndarray,
+    query_vectors: np.ndarray,
+    k: int = 10,
+    rescore_factor: int = None
+) -> Dict[str, Any]:
+    """
+    Calcula recall@k y memoria de cada modo de cuantización
+
+    Args:
+        vectors: Matriz float32 del índice (baseline exacto)
+        query_vectors: Embeddings de las consultas
+        k: Número de resultados a comparar
+        rescore_factor: Candidatos re-puntuados por resultado (config por defecto)
+
+    Returns:
+        Resultados por modo ('float16', 'int8') con y sin re-puntuación
+    """
+    rescore_factor = rescore_factor or config.VECTOR_RESCORE_FACTOR
+    baseline = [set(top_k_indices(vectors @ query, k).tolist()) for query in query_vectors]
+
+    results = {
+        "float32": {
+            "bytes": int(vectors.nbytes),
+            "compression": 1.0,
+            "recall_at_k": 1.0,
+        }
+    }
+
+    for mode in ("float16", "int8"):
+        quantized = QuantizedMatrix.from_float32(vectors, mode)
+        for rescore in (False, True):
+            recalls = []
+            for query, expected in zip(query_vectors, baseline):
+                top, _ = quantized.search(
+                    query,
+                    k,
+                    exact_vectors=vectors if rescore else None,
+                    rescore_factor=rescore_factor
+                )
+                recalls.append(len(expected & set(top.tolist())) / max(len(expected), 1))
+
+            name = f"{mode}+rescore" if rescore else mode
+            results[name] = {
+                "bytes": quantized.nbytes,
+                "compression": vectors.nbytes / quantized.nbytes if quantized.nbytes else 0.0,
+                "recall_at_k": float(np.mean(recalls)) if recalls else 0.0,
+                "min_recall": float(np.min(recalls)) if recalls else 0.0,
+            }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Recall@k de embeddings cuantizados (float16 / int8) frente a float32'
+    )
+    parser.add_argument(
+        '-d', '--dataset',
+        default="evaluation/datasets/test_one_scenario.json",
+        help='Dataset de escenarios del que se generan las consultas'
+    )
+    parser.add_argument('-k', type=int, default=10, help='Número de resultados (default: 10)')
+    parser.add_argument(
+        '--rescore-factor',
+        type=int,
+        default=None,
+        help='Candidatos re-puntuados por resultado (default: VECTOR_RESCORE_FACTOR)'
+    )
+    args = parser.parse_args()
+
+    print("🚀 Cargando VectorStore...")
+    vector_store = VectorStore()
+    vector_store.load_vectorstore()
+
+    vectors = vector_store.vectorstore.export()["vectors"]
+    queries = build_queries(load_scenarios(args.dataset))
+    query_vectors = np.asarray(vector_store.embeddings.embed_documents(queries), dtype=np.float32)
+
+    print(f"📐 {len(vectors)} vectores, {len(queries)} consultas, k={args.k}")
+    results = evaluate_quantization(vectors, query_vectors, k=args.k, rescore_factor=args.rescore_factor)
+
+    print("\n" + "=" * 80)
+    print(f"📊 RECALL@{args.k} FRENTE A FLOAT32")
+    print("=" * 80)
+    for name, metrics in results.items():
+        print(
+            f"  {name:<16} recall={metrics['recall_at_k']:.3f}  "
+            f"memoria={metrics['bytes'] / (1024 * 1024):.1f} MB  "
+            f"(x{metrics['compression']:.1f})"
+        )
+    print("=" * 80 + "\n")
+
+    output_file = RESULTS_DIR / f"quantization_recall_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(
+            {"k": args.k, "num_vectors": len(vectors), "num_queries": len(queries), "results": results},
+            f,
+            indent=2,
+            ensure_ascii=False
+        )
+
+    print(f"✅ Resultados guardados en: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
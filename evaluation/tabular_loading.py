@@ -0,0 +1,263 @@
+"""
+Benchmark de la conversión de tablas (CSV / Excel) a documentos: iterrows frente a columnas
+"""
+import gc
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+
+from src.config import config
+from src.rag.document_loader import DocumentLoader
+from src.rag.product_fields import detect_product_columns, extract_product_fields, make_product_id
+from evaluation.config import RESULTS_DIR
+
+
+def legacy_table_documents(df: pd.DataFrame, file_path: str, file_type: str, sheet: Any = None) -> List[Document]:
+    """
+    Conversión anterior, fila a fila con iterrows (referencia)
+
+    Args:
+        df: Tabla
+        file_path: Ruta del archivo de origen
+        file_type: 'csv' | 'excel'
+        sheet: Nombre de la hoja (solo Excel)
+
+    Returns:
+        Un documento por fila
+    """
+    documents = []
+    product_columns = detect_product_columns(list(df.columns))
+    location = () if sheet is None else (sheet,)
+    head = {"source": file_path} if sheet is None else {"source": file_path, "sheet": sheet}
+
+    for idx, row in df.iterrows():
+        content = "\n".join([f"{col}: {row[col]}" for col in df.columns if pd.notna(row[col])])
+        documents.append(Document(
+            page_content=content,
+            metadata={
+                **head,
+                "row": idx,
+                "type": file_type,
+                "columns": list(df.columns),
+                "product_id": make_product_id(file_path, *location, idx),
+                **extract_product_fields(row, product_columns)
+            }
+        ))
+    return documents
+
+
+def synthetic_catalog(rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Catálogo sintético con texto, categorías, precios numéricos y en texto,
+    enteros, booleanos y celdas vacías
+
+    'garantia' es entera salvo una celda vacía en la última fila: leída
+    entera es float, y sirve para comprobar que la lectura por bloques del
+    CSV da el mismo texto que la lectura del archivo completo.
+
+    Args:
+        rows: Número de filas
+        seed: Semilla
+
+    Returns:
+        DataFrame del catálogo
+    """
+    rng = np.random.default_rng(seed)
+    brands = np.array(["Acer", "Dell", "HP", "Lenovo", "Ásus", "Samsung"], dtype=object)
+    categories = np.array(["Laptop", "Tablet", "Monitor", "Teléfono", "Accesorios"], dtype=object)
+
+    df = pd.DataFrame({
+        "nombre": [f"Producto {i}" for i in range(rows)],
+        "marca": rng.choice(brands, rows),
+        "categoria": rng.choice(categories, rows),
+        "precio": rng.uniform(10, 3000, rows).round(2),
+        "precio_lista": [f"${value:,.2f}" for value in rng.uniform(10, 3000, rows)],
+        "stock": rng.integers(0, 500, rows),
+        "disponible": rng.random(rows) < 0.8,
+        "garantia": pd.array(rng.integers(0, 37, rows), dtype="Int64"),
+        "descripcion": rng.choice(
+            np.array(["Equipo con pantalla de alta resolución", "Batería de larga duración", ""], dtype=object), rows
+        ),
+    })
+
+    # Celdas vacías dispersas (se omiten del texto)
+    for column in ("marca", "precio", "descripcion"):
+        df.loc[rng.random(rows) < 0.05, column] = np.nan
+    df.loc[rows - 1, "garantia"] = pd.NA
+    return df
+
+
+def compare(expected: List[Document], actual: List[Document]) -> Dict[str, int]:
+    """Cuenta los documentos cuyo texto o metadata difieren"""
+    return {
+        "documents": len(actual),
+        "count_mismatch": abs(len(expected) - len(actual)),
+        "content_mismatches": sum(a.page_content != b.page_content for a, b in zip(expected, actual)),
+        "metadata_mismatches": sum(a.metadata != b.metadata for a, b in zip(expected, actual)),
+    }
+
+
+def timed(fn):
+    """
+    Ejecuta fn y mide su duración
+
+    Los objetos ya existentes (p. ej. los documentos de la conversión
+    anterior) se congelan para que el recolector de basura no los recorra
+    y ambas conversiones se midan en igualdad de condiciones.
+    """
+    gc.collect()
+    gc.freeze()
+    try:
+        start = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - start
+    finally:
+        gc.unfreeze()
+
+
+def chunked_csv_documents(file_path: str, chunk_rows: int) -> List[Document]:
+    """
+    Documentos de un CSV leído por bloques de chunk_rows filas (DocumentLoader._iter_csv)
+
+    Args:
+        file_path: CSV
+        chunk_rows: Filas por bloque (config.CSV_CHUNK_ROWS)
+
+    Returns:
+        Un documento por fila
+    """
+    original = config.CSV_CHUNK_ROWS
+    config.CSV_CHUNK_ROWS = chunk_rows
+    try:
+        return [doc for batch in DocumentLoader()._iter_csv(file_path) for doc in batch]
+    finally:
+        config.CSV_CHUNK_ROWS = original
+
+
+def benchmark_file(file_path: str, file_type: str, chunk_rows: int = 0) -> Dict[str, Any]:
+    """
+    Carga un archivo con la conversión anterior y con la vectorizada
+
+    Args:
+        file_path: CSV o Excel
+        file_type: 'csv' | 'excel'
+        chunk_rows: Filas por bloque con las que comparar además la lectura
+            por bloques del CSV con la del archivo entero (0 = no comparar)
+
+    Returns:
+        Tiempos de lectura y de conversión y diferencias encontradas
+    """
+    start = time.perf_counter()
+    if file_type == "csv":
+        sheets = {None: pd.read_csv(file_path, encoding="utf-8")}
+    else:
+        sheets = pd.read_excel(file_path, sheet_name=None, engine="openpyxl")
+    read_seconds = time.perf_counter() - start
+
+    expected, legacy_seconds = timed(lambda: [
+        doc for sheet, df in sheets.items() for doc in legacy_table_documents(df, file_path, file_type, sheet)
+    ])
+
+    loader = DocumentLoader()
+    actual, vectorized_seconds = timed(lambda: [
+        doc for sheet, df in sheets.items() for doc in loader._table_documents(df, file_path, file_type, sheet=sheet)
+    ])
+
+    result = {
+        "read_seconds": read_seconds,
+        "legacy_seconds": legacy_seconds,
+        "vectorized_seconds": vectorized_seconds,
+        "speedup": legacy_seconds / max(vectorized_seconds, 1e-9),
+        **compare(expected, actual),
+    }
+    if file_type == "csv" and chunk_rows:
+        chunked, chunked_seconds = timed(lambda: chunked_csv_documents(file_path, chunk_rows))
+        result["chunked"] = {"chunk_rows": chunk_rows, "seconds": chunked_seconds, **compare(actual, chunked)}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Tiempo de conversión de CSV/Excel a documentos (iterrows frente a columnas) y equivalencia'
+    )
+    parser.add_argument('--rows', type=int, default=500000, help='Filas del CSV sintético (default: 500000)')
+    parser.add_argument(
+        '--excel-rows',
+        type=int,
+        default=50000,
+        help='Filas del Excel sintético (default: 50000; 0 para omitirlo, escribirlo es lento)'
+    )
+    parser.add_argument('--seed', type=int, default=42, help='Semilla del catálogo sintético')
+    parser.add_argument(
+        '--chunk-rows',
+        type=int,
+        default=10000,
+        help='Filas por bloque al comparar la lectura por bloques del CSV con la completa (default: 10000; 0 = omitir)'
+    )
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="tabular_loading_") as workdir:
+        print(f"🏗️  Generando CSV sintético de {args.rows} filas...")
+        csv_path = str(Path(workdir) / "catalogo.csv")
+        synthetic_catalog(args.rows, args.seed).to_csv(csv_path, index=False)
+        results["csv"] = {"rows": args.rows, **benchmark_file(csv_path, "csv", args.chunk_rows)}
+
+        if args.excel_rows:
+            print(f"🏗️  Generando Excel sintético de {args.excel_rows} filas...")
+            excel_path = str(Path(workdir) / "catalogo.xlsx")
+            synthetic_catalog(args.excel_rows, args.seed).to_excel(excel_path, index=False, sheet_name="Productos")
+            results["excel"] = {"rows": args.excel_rows, **benchmark_file(excel_path, "excel")}
+
+    print("\n" + "=" * 80)
+    print("📊 CONVERSIÓN DE TABLAS A DOCUMENTOS")
+    print("=" * 80)
+    for file_type, row in results.items():
+        identical = not (row["count_mismatch"] or row["content_mismatches"] or row["metadata_mismatches"])
+        print(
+            f"  {file_type:<6} {row['rows']:>8} filas  lectura={row['read_seconds']:.2f}s  "
+            f"iterrows={row['legacy_seconds']:.2f}s  columnas={row['vectorized_seconds']:.2f}s  "
+            f"x{row['speedup']:.1f}  {'✅ idéntico' if identical else '❌ DIFERENCIAS'}"
+        )
+        if not identical:
+            print(
+                f"         texto distinto: {row['content_mismatches']}  "
+                f"metadata distinta: {row['metadata_mismatches']}  filas de diferencia: {row['count_mismatch']}"
+            )
+        chunked = row.get("chunked")
+        if chunked:
+            same = not (chunked["count_mismatch"] or chunked["content_mismatches"] or chunked["metadata_mismatches"])
+            print(
+                f"         por bloques de {chunked['chunk_rows']} filas: {chunked['seconds']:.2f}s  "
+                f"{'✅ idéntico a la lectura completa' if same else '❌ DIFERENCIAS con la lectura completa'}"
+            )
+            if not same:
+                print(
+                    f"         texto distinto: {chunked['content_mismatches']}  "
+                    f"metadata distinta: {chunked['metadata_mismatches']}  "
+                    f"filas de diferencia: {chunked['count_mismatch']}"
+                )
+    print("=" * 80 + "\n")
+
+    output_file = RESULTS_DIR / f"tabular_loading_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({"seed": args.seed, "results": results}, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ Resultados guardados en: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
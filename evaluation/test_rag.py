@@ -240,6 +240,29 @@ class RAGEvaluator:
             }
             print(f"   ❌ Diversidad: FAIL - {e}")
 
+        try:
+            # Test 3: Estadísticas del índice
+            stats = self.vector_store.index_stats()
+            health["index_stats"] = stats
+            health["checks"]["index_content"] = {
+                "passed": stats["chunks"] > 0,
+                "chunks": stats["chunks"],
+                "sources": stats["sources"],
+                "dimension": stats["dimension"]
+            }
+
+            print(
+                f"   ✅ Índice: {stats['chunks']} chunks de {stats['sources']} fuentes "
+                f"(dim {stats['dimension']}, {stats['disk_mb']:.1f} MB en disco)"
+            )
+
+        except Exception as e:
+            health["checks"]["index_content"] = {
+                "passed": False,
+                "error": str(e)
+            }
+            print(f"   ❌ Índice: FAIL - {e}")
+
         # Overall health
         all_passed = all(
             check.get("passed", False)
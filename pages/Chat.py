@@ -10,46 +10,54 @@ import os
 
 # Importar componentes del sistema AURA
 from src.orchestator import MultiAgentOrchestrator
-from src.rag.vector_store import VectorStore
-from src.rag.document_loader import DocumentLoader
+from src.rag.warmup import get_vector_store_loader
 from src.config import config
 
+PAGE_START = time.perf_counter()
+
 # ========================================
 # INICIALIZACIÓN DEL SISTEMA
 # ========================================
 @st.cache_resource
-def initialize_system():
+def setup_configuration() -> bool:
     """
-    Inicializa el sistema AURA cargando el VectorStore existente
+    Valida la configuración y activa LangSmith
     Se ejecuta solo una vez gracias a @st.cache_resource
     
     Returns:
-        VectorStore si existe y se carga correctamente, None si no existe
+        True si la configuración es válida
     """
     try:
-        # Validar configuración
         config.validate()
         config.setup_langsmith()
-        
-        # Verificar si existe el VectorStore procesado
-        if not os.path.exists(config.CHROMA_DIR):
-            return None
-        
-        # Verificar que el directorio no esté vacío
-        if not any(os.scandir(config.CHROMA_DIR)):
-            return None
-        
-        # Cargar VectorStore existente
-        print("🚀 Cargando VectorStore existente...")
-        vector_store = VectorStore()
-        vector_store.load_vectorstore()
-        print("✓ VectorStore cargado correctamente")
-        
-        return vector_store
-        
+        return True
     except Exception as e:
-        print(f"❌ Error cargando VectorStore: {str(e)}")
+        print(f"❌ Error en la configuración: {str(e)}")
+        return False
+
+
+def initialize_system():
+    """
+    Obtiene el cargador del sistema AURA
+    
+    El VectorStore (modelo de embeddings + índice) se carga en un hilo en
+    segundo plano compartido por todo el proceso, así la página se muestra
+    sin esperar al modelo.
+    
+    Returns:
+        Cargador del VectorStore, None si la configuración no es válida
+    """
+    if not setup_configuration():
         return None
+    return get_vector_store_loader()
+
+
+def log_first_paint(system_state: str):
+    """Registra el tiempo hasta el primer render de la sesión"""
+    if "first_paint_logged" not in st.session_state:
+        st.session_state.first_paint_logged = True
+        elapsed_ms = (time.perf_counter() - PAGE_START) * 1000
+        print(f"⏱️  Primer render del chat: {elapsed_ms:.0f} ms (sistema: {system_state})")
 
 
 # ========================================
@@ -88,12 +96,27 @@ st.set_page_config(
 # ========================================
 # INICIALIZAR SISTEMA Y SESSION STATE
 # ========================================
-# Inicializar VectorStore (solo una vez)
-vector_store = initialize_system()
+# Cargar VectorStore en segundo plano (solo una vez por proceso)
+loader = initialize_system()
+
+# Mientras carga, mostrar el estado y refrescar
+if loader is not None and loader.is_loading:
+    st.title("🤖 Chat con Agente AURA")
+    st.info(f"⏳ Preparando el sistema: **{loader.status_label}**...")
+    log_first_paint(loader.state)
+    time.sleep(0.5)
+    st.rerun()
+
+vector_store = loader.vector_store if loader is not None else None
 
 # Verificar que el VectorStore existe
 if vector_store is None:
     st.error("⚠️ **El sistema RAG no ha sido inicializado**")
+    if loader is not None and loader.error:
+        st.caption(f"Detalle: {loader.error}")
+        if st.button("🔄 Reintentar carga"):
+            get_vector_store_loader(retry=True)
+            st.rerun()
     
     st.markdown("""
     ### 🔧 Configuración Requerida
@@ -156,8 +179,8 @@ if vector_store is None:
     with col3:
         # Verificar VectorStore
         try:
-            if os.path.exists(config.CHROMA_DIR):
-                files = list(os.scandir(config.CHROMA_DIR))
+            if os.path.exists(config.vector_index_dir()):
+                files = list(os.scandir(config.vector_index_dir()))
                 if len(files) > 0:
                     st.success("✅ VectorStore procesado")
                 else:
@@ -257,6 +280,7 @@ with st.sidebar:
 # TÍTULO
 # ========================================
 st.title("🤖 Chat con Agente AURA")
+log_first_paint(loader.state)
 
 # Mostrar estado del sistema
 status_col1, status_col2 = st.columns([3, 1])
@@ -15,6 +15,8 @@ from dotenv import load_dotenv, set_key
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from src.rag.document_loader import DocumentLoader
 from src.rag.vector_store import VectorStore
+from src.rag.index_versions import IndexVersions
+from src.rag.warmup import get_vector_store_loader
 from src.config import config
 
 # Configuración de la página
@@ -703,7 +705,7 @@ with tab_rag:
 
     # Verificar si existe el directorio de documentos
     documents_dir = Path(__file__).parent.parent / "data" / "uploads"
-    vectorstore_dir = Path(__file__).parent.parent / "data" / "chroma_db"
+    vectorstore_dir = Path(__file__).parent.parent / config.vector_index_dir()
 
     col1, col2 = st.columns(2)
 
@@ -725,7 +727,7 @@ with tab_rag:
             st.caption("Sube archivos en la pestaña 'Gestión de Archivos rag'")
 
     with col2:
-        st.markdown("**🗄️ Vectorstore:**")
+        st.markdown(f"**🗄️ Vectorstore ({config.VECTOR_BACKEND}):**")
         st.info(f"`{vectorstore_dir.absolute()}`")
 
         vectorstore_exists = vectorstore_dir.exists() and len(list(vectorstore_dir.glob("*"))) > 0
@@ -770,14 +772,22 @@ with tab_rag:
         st.markdown("**🚀 Procesar Documentos**")
         st.markdown("""
         Esta acción va a:
-        1. Cargar todos los documentos del directorio
-        2. Dividirlos en chunks
-        3. Generar embeddings
-        4. Guardar en ChromaDB
+        1. Detectar los archivos nuevos, modificados o eliminados
+        2. Cargar y dividir en chunks solo los archivos que cambiaron
+        3. Generar sus embeddings
+        4. Construir una versión nueva del índice (sin los chunks obsoletos) y publicarla al terminar
         
-        **Tiempo estimado:** 2-10 minutos dependiendo del tamaño
+        Mientras tanto el chat sigue usando la versión anterior, que se conserva para poder volver a ella.
+        
+        **Tiempo estimado:** segundos si solo cambió un archivo; 2-10 minutos en una reconstrucción completa
         """)
 
+        full_rebuild = st.checkbox(
+            "♻️ Reconstrucción completa",
+            value=False,
+            help="Construye una versión vacía del vectorstore y re-indexa todos los documentos"
+        )
+
         # Botón para procesar
         if st.button("🚀 Procesar Documentos", type="primary", use_container_width=True):
             if not documents_dir.exists() or len(list(documents_dir.glob("*.*"))) == 0:
@@ -790,32 +800,22 @@ with tab_rag:
                         progress_bar = st.progress(0)
                         status_text = st.empty()
 
-                        # Paso 1: Cargar documentos
-                        status_text.text("📂 Paso 1/3: Cargando documentos...")
+                        # Paso 1: Cargar modelo de embeddings
+                        status_text.text("📂 Paso 1/3: Preparando modelo de embeddings...")
                         progress_bar.progress(20)
 
                         loader = DocumentLoader()
-                        documents = loader.load_documents(str(documents_dir))
-
-                        if not documents:
-                            st.error("❌ No se pudieron cargar los documentos")
-                            st.stop()
-
-                        st.success(f"✅ {len(documents)} documento(s) cargado(s)")
-
-                        # Paso 2: Crear vectorstore
-                        status_text.text("🔮 Paso 2/3: Creando embeddings y vectorstore...")
-                        progress_bar.progress(50)
-
                         vector_store = VectorStore()
 
-                        # Eliminar vectorstore existente si existe
-                        if vectorstore_dir.exists():
-                            import shutil
-                            shutil.rmtree(vectorstore_dir)
+                        # Paso 2: Sincronizar vectorstore (solo archivos con cambios)
+                        status_text.text("🔮 Paso 2/3: Indexando archivos nuevos o modificados...")
+                        progress_bar.progress(50)
 
-                        # Crear nuevo vectorstore
-                        vector_store.create_vectorstore(documents)
+                        sync_stats = vector_store.sync_directory(
+                            str(documents_dir),
+                            loader=loader,
+                            full_rebuild=full_rebuild
+                        )
 
                         progress_bar.progress(80)
                         status_text.text("💾 Paso 3/3: Guardando vectorstore...")
@@ -826,26 +826,39 @@ with tab_rag:
                         progress_bar.empty()
                         status_text.empty()
 
-                        st.success("✅ ¡Vectorstore creado exitosamente!")
+                        st.success(f"✅ ¡Vectorstore actualizado exitosamente! (versión {sync_stats['version']})")
+                        # Si la carga del chat había fallado, reintentarla ya con el índice nuevo
+                        get_vector_store_loader(retry=True)
                         st.balloons()
 
+                        for error in sync_stats["errors"]:
+                            st.warning(f"⚠️ {Path(error['file']).name}: {error['error']}")
+
                         # Mostrar estadísticas
                         st.markdown("**📊 Estadísticas del Procesamiento:**")
 
                         col1, col2, col3 = st.columns(3)
 
                         with col1:
-                            st.metric("📄 Documentos", len(documents))
+                            st.metric("🆕 Nuevos / Modificados", sync_stats["added"] + sync_stats["changed"])
+                            st.caption(f"{sync_stats['unchanged']} sin cambios")
 
                         with col2:
-                            # Estimar chunks (aproximadamente)
-                            estimated_chunks = sum(len(doc.page_content) // chunk_size for doc in documents)
-                            st.metric("📝 Chunks Estimados", estimated_chunks)
+                            st.metric("🗑️ Eliminados", sync_stats["removed"])
 
                         with col3:
-                            st.metric("💾 Vectorstore", "✅ Creado")
-
-                        log_message(f"Vectorstore creado con {len(documents)} documentos", "success")
+                            st.metric(
+                                "📝 Chunks",
+                                f"+{sync_stats['chunks_added']}",
+                                delta=f"-{sync_stats['chunks_deleted']}",
+                                delta_color="off"
+                            )
+
+                        log_message(
+                            f"Vectorstore sincronizado: +{sync_stats['chunks_added']} / "
+                            f"-{sync_stats['chunks_deleted']} chunks",
+                            "success"
+                        )
 
                 except Exception as e:
                     st.error(f"❌ Error procesando documentos: {str(e)}")
@@ -880,6 +893,139 @@ with tab_rag:
 
     st.markdown("---")
 
+    # Versiones del índice
+    st.markdown("#### 🗂️ Versiones del Índice")
+    st.caption(
+        f"Se conservan la versión publicada y {config.INDEX_RETENTION} anterior(es). "
+        "El chat carga la versión publicada sin reiniciar la aplicación."
+    )
+
+    index_versions = IndexVersions(str(vectorstore_dir))
+    versions_list = index_versions.list()
+
+    if not versions_list:
+        st.info("Todavía no hay versiones publicadas")
+
+    for item in versions_list:
+        col1, col2, col3 = st.columns([3, 3, 1])
+
+        with col1:
+            label = f"**{item['version']}**"
+            if item["current"]:
+                label += " 📌 publicada"
+            st.markdown(label)
+
+        with col2:
+            details = []
+            if "created_at" in item:
+                details.append(item["created_at"][:19].replace("T", " "))
+            if "chunks" in item:
+                details.append(f"{item['chunks']} chunks")
+            if "build_seconds" in item:
+                details.append(f"{item['build_seconds']:.1f}s")
+            st.caption(" · ".join(details) or "Índice anterior al versionado")
+
+        with col3:
+            if not item["current"] and st.button("↩️ Volver", key=f"rollback_{item['version']}"):
+                try:
+                    index_versions.rollback(item["version"])
+                    log_message(f"Índice devuelto a la versión {item['version']}", "success")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Error volviendo a la versión: {str(e)}")
+                    log_message(f"Error en rollback: {str(e)}", "error")
+
+    st.markdown("---")
+
+    # Estadísticas del índice cargado por el chat
+    st.markdown("#### 📈 Estadísticas del Índice")
+
+    loader = get_vector_store_loader()
+    if loader.is_loading:
+        st.info(f"⏳ {loader.status_label}...")
+    elif not loader.is_ready:
+        st.warning(f"⚠️ Vectorstore no disponible: {loader.status_label}")
+        if loader.error:
+            st.caption(loader.error)
+    else:
+        try:
+            index_stats = loader.vector_store.index_stats()
+        except Exception as e:
+            index_stats = None
+            st.error(f"❌ Error obteniendo estadísticas: {str(e)}")
+
+        if index_stats:
+            st.caption(
+                f"Backend **{index_stats['backend']}** · versión `{index_stats['index_version']}` · "
+                f"modelo `{index_stats['embedding_model']}`"
+            )
+
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("📝 Chunks", index_stats["chunks"])
+                st.metric("📄 Fuentes", index_stats["sources"])
+            with col2:
+                st.metric("📐 Dimensión", index_stats["dimension"])
+                build = index_stats["build_seconds"]
+                st.metric("🏗️ Construcción", f"{build:.1f}s" if build is not None else "—")
+            with col3:
+                st.metric("💽 En disco", f"{index_stats['disk_mb']:.1f} MB")
+                st.metric("🧠 Memoria (est.)", f"{index_stats['memory_mb']:.1f} MB")
+            with col4:
+                for name, label in (("search", "🔁 Caché búsquedas"), ("semantic", "🧩 Caché semántica"),
+                                    ("embeddings", "🧮 Caché embeddings")):
+                    rate = index_stats["cache_hit_rates"].get(name)
+                    if rate is not None:
+                        st.metric(label, f"{rate:.0%}")
+
+            if index_stats["shards"]:
+                st.caption(
+                    f"🧩 {len(index_stats['shards'])} shard(s): "
+                    + " · ".join(f"{key}: {count}" for key, count in index_stats["shards"].items())
+                )
+
+            latency = index_stats["latency"]
+            st.markdown(
+                f"**⏱️ Latencia de las últimas {latency['samples']} búsquedas** "
+                f"({latency['total_searches']} resueltas desde el arranque, sin contar aciertos de caché)"
+            )
+            if latency["samples"]:
+                phases = {"Embedding": latency["embed"], "Índice": latency["index"], "Total": latency["total"]}
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.table([
+                        {
+                            "Fase": phase,
+                            "p50 (ms)": f"{values['p50_ms']:.1f}",
+                            "p95 (ms)": f"{values['p95_ms']:.1f}",
+                            "p99 (ms)": f"{values['p99_ms']:.1f}",
+                            "máx (ms)": f"{values['max_ms']:.1f}",
+                        }
+                        for phase, values in phases.items()
+                    ])
+                with col2:
+                    st.table([
+                        {
+                            "Rango": bucket,
+                            "Embedding": latency["embed"]["histogram"][bucket],
+                            "Índice": latency["index"]["histogram"][bucket],
+                        }
+                        for bucket in latency["total"]["histogram"]
+                    ])
+            else:
+                st.caption("Todavía no hay búsquedas registradas")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("🔄 Actualizar estadísticas", use_container_width=True):
+                st.rerun()
+        with col2:
+            if st.button("🧹 Reiniciar latencias", use_container_width=True):
+                loader.vector_store.latency.reset()
+                st.rerun()
+
+    st.markdown("---")
+
     # Información adicional
     st.markdown("#### 💡 Información Adicional")
 
@@ -14,6 +14,8 @@ class RecommenderAgent(BaseAgent):
     utilizando RAG para buscar en la base de datos
     """
     
+    MAX_RECOMMENDATIONS = 3
+    
     def __init__(self, vector_store: VectorStore):
         super().__init__(
             name="Agente Recomendador",
@@ -26,7 +28,8 @@ class RecommenderAgent(BaseAgent):
         Genera recomendaciones basadas en las preferencias del usuario
         
         Args:
-            input_data: Debe contener 'search_query' y 'criteria'
+            input_data: Debe contener 'search_query' y 'criteria'; opcionalmente
+                'extracted_info' (presupuesto, categoría y marcas) para filtrar
             
         Returns:
             Recomendaciones de productos
@@ -34,18 +37,24 @@ class RecommenderAgent(BaseAgent):
         search_query = input_data.get('search_query', '')
         criteria = input_data.get('criteria', '')
         user_analysis = input_data.get('user_analysis', '')
+        extracted_info = input_data.get('extracted_info') or {}
         
         if not search_query:
             raise ValueError("Se requiere 'search_query' del analizador de preferencias")
         
-        # Buscar productos relevantes en el vectorstore
-        relevant_products = self.vector_store.search_with_scores(
+        # Buscar productos relevantes aplicando presupuesto, categoría y marca
+        # como filtros de metadata dentro del vectorstore
+        relevant_products = self.vector_store.search_products(
             search_query,
-            k=10  # Buscamos más productos para tener opciones
+            k=self.MAX_RECOMMENDATIONS,
+            price_min=extracted_info.get('presupuesto_min'),
+            price_max=extracted_info.get('presupuesto_max'),
+            category=extracted_info.get('categoria_producto'),
+            brands=extracted_info.get('preferencias_marca')
         )
         
         # Limitar a máximo 3 productos para recomendar
-        products_to_recommend = relevant_products[:3]
+        products_to_recommend = relevant_products[:self.MAX_RECOMMENDATIONS]
         
         # Formatear productos encontrados
         products_context = self._format_products(products_to_recommend)
@@ -193,8 +202,8 @@ Por favor, genera tus recomendaciones personalizadas usando ÚNICAMENTE los prod
         # Buscar información específica de cada producto
         comparisons = []
         
-        for name in product_names:
-            products = self.vector_store.search(name, k=2)
+        # Todas las búsquedas en un único lote (una pasada del modelo)
+        for products in self.vector_store.search_many(product_names, k=2):
             if products:
                 comparisons.append(products[0].page_content)
         
@@ -21,6 +21,61 @@ class Config:
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "800"))  # Reducido de 1000 para chunks más manejables
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "150"))  # Reducido de 200
     TOP_K_RESULTS = int(os.getenv("TOP_K_RESULTS", "4"))  # Reducido de 5 para búsquedas más rápidas
+    SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "256"))  # Búsquedas en caché LRU (0 = desactivada)
+    SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "600"))  # Segundos de validez de cada entrada
+    LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "1000"))  # Búsquedas recientes para los percentiles de latencia
+    SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "4"))  # Hilos del executor de búsquedas asíncronas
+    PRODUCT_GROUPING = os.getenv("PRODUCT_GROUPING", "best").lower()  # best | mmr: un resultado por producto
+    PRODUCT_OVERFETCH = int(os.getenv("PRODUCT_OVERFETCH", "4"))  # Chunks candidatos por producto pedido
+    MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))  # Relevancia frente a diversidad en MMR
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "false").lower() == "true"  # BM25 + denso con RRF
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))  # Candidatos por lista antes de fusionar
+    RRF_K = int(os.getenv("RRF_K", "60"))
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))  # Similitud coseno mínima
+    SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+
+    # Backend vectorial: "chroma" (por defecto) o "numpy" (búsqueda exacta en proceso)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none").lower()  # none | float16 | int8 (backend numpy)
+    VECTOR_RESCORE = os.getenv("VECTOR_RESCORE", "true").lower() == "true"  # Re-puntuar candidatos en float32
+    VECTOR_RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))  # Candidatos = k * factor
+    VECTOR_SHARDING = os.getenv("VECTOR_SHARDING", "none").lower()  # none | hash | category (al construir)
+    VECTOR_SHARDS = int(os.getenv("VECTOR_SHARDS", "4"))  # Número de shards con VECTOR_SHARDING=hash
+    SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "4"))  # Hilos para escribir y consultar shards en paralelo
+    HNSW_M = int(os.getenv("HNSW_M", "16"))  # Vecinos por nodo del grafo HNSW de Chroma (fijo al construir)
+    HNSW_CONSTRUCTION_EF = int(os.getenv("HNSW_CONSTRUCTION_EF", "100"))  # Candidatos al construir (fijo al construir)
+    HNSW_SEARCH_EF = int(os.getenv("HNSW_SEARCH_EF", "100"))  # Candidatos por búsqueda (ajustable sin reconstruir)
+    INDEX_RETENTION = int(os.getenv("INDEX_RETENTION", "3"))  # Versiones anteriores del índice conservadas
+    INDEX_RELOAD_INTERVAL = float(os.getenv("INDEX_RELOAD_INTERVAL", "2"))  # Segundos entre comprobaciones de versión
+    INDEX_SNAPSHOT = os.getenv("INDEX_SNAPSHOT", "true").lower() == "true"  # Snapshot mmap por versión (solo numpy sin cuantizar ni shards)
+
+    # Arranque: carga en segundo plano y consultas de calentamiento (separadas por ';')
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    LOAD_RETRY_SECONDS = float(os.getenv("LOAD_RETRY_SECONDS", "30"))  # Espera antes de reintentar una carga fallida
+    WARMUP_QUERIES = [
+        query.strip()
+        for query in os.getenv(
+            "WARMUP_QUERIES",
+            "laptop para programar;smartphone con buena cámara;auriculares inalámbricos baratos"
+        ).split(";")
+        if query.strip()
+    ]
+
+    # Embeddings - Pipeline de indexación por lotes
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "1"))  # >1 carga (parsea) archivos en un pool de procesos
+    LOAD_BATCH_SIZE = int(os.getenv("LOAD_BATCH_SIZE", "2000"))  # Documentos por lote al indexar en streaming
+    CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "50000"))  # Filas leídas por bloque de un CSV
+    DOCUMENT_CACHE_ENABLED = os.getenv("DOCUMENT_CACHE_ENABLED", "true").lower() == "true"  # Parseos por huella
+    DOCUMENT_CACHE_MAX_MB = float(os.getenv("DOCUMENT_CACHE_MAX_MB", "1024"))  # Límite antes de expulsar entradas
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))  # Chunks embebidos y escritos por lote
+    EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))  # >1 usa un pool de procesos de sentence-transformers
+    EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))  # Hilos intra-op de torch/ONNX (0 = todos los núcleos)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()  # torch | onnx (ONNX Runtime en CPU)
+    EMBEDDING_ONNX_QUANTIZE = os.getenv("EMBEDDING_ONNX_QUANTIZE", "false").lower() == "true"  # Pesos int8
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))  # Límite antes de expulsar entradas
 
     # LangSmith - Monitoring y Trazabilidad
     LANGCHAIN_TRACING_V2 = os.getenv("LANGCHAIN_TRACING_V2", "false").lower() == "true"
@@ -32,6 +87,12 @@ class Config:
     DATA_DIR = "data"
     PRODUCTS_DIR = os.path.join(DATA_DIR, "products")
     CHROMA_DIR = os.path.join(DATA_DIR, "chroma_db")
+    NUMPY_INDEX_DIR = os.path.join(DATA_DIR, "numpy_index")
+    UPLOADS_DIR = os.path.join(DATA_DIR, "uploads")
+    MODEL_CACHE_DIR = os.path.join(DATA_DIR, "model_cache")
+    INDEX_MANIFEST_PATH = os.path.join(DATA_DIR, "chroma_manifest.json")
+    EMBEDDING_CACHE_PATH = os.path.join(DATA_DIR, "embedding_cache.sqlite")
+    DOCUMENT_CACHE_PATH = os.path.join(DATA_DIR, "document_cache.sqlite")
 
     @classmethod
     def validate(cls):
@@ -42,6 +103,11 @@ class Config:
                 "Por favor, crea un archivo .env basado en .env.example"
             )
 
+    @classmethod
+    def vector_index_dir(cls) -> str:
+        """Directorio del índice vectorial según el backend configurado"""
+        return cls.NUMPY_INDEX_DIR if cls.VECTOR_BACKEND == "numpy" else cls.CHROMA_DIR
+
     @classmethod
     def setup_langsmith(cls):
         """Configura las variables de entorno para LangSmith"""
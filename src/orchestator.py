@@ -144,7 +144,8 @@ class MultiAgentOrchestrator:
             recommender_result = self.recommender.process({
                 'search_query': self.workflow_data['search_query'],
                 'criteria': self.workflow_data['criteria'],
-                'user_analysis': self.workflow_data['user_analysis']
+                'user_analysis': self.workflow_data['user_analysis'],
+                'extracted_info': questioner_result.get('extracted_information', {})
             })
             
             self.workflow_data['recommendations'] = recommender_result['recommendations']
@@ -0,0 +1,934 @@
+"""
+Backends de almacenamiento vectorial (ChromaDB y búsqueda exacta con NumPy)
+"""
+from typing import List, Optional, Any, Dict, Tuple
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import chromadb
+from langchain_core.documents import Document
+
+from src.config import config
+from src.rag.product_fields import product_key
+from src.rag.quantization import QuantizedMatrix, QUANTIZATION_MODES, top_k_indices
+
+SHARDING_MODES = ("none", "hash", "category")
+
+
+def matches_filter(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evalúa un filtro de metadata con la sintaxis 'where' de ChromaDB
+
+    Soporta igualdad directa, los operadores $eq, $ne, $gt, $gte, $lt, $lte,
+    $in y $nin, y la combinación con $and / $or.
+
+    Args:
+        metadata: Metadata del chunk
+        where: Filtro (o None para aceptar todo)
+
+    Returns:
+        True si la metadata cumple el filtro
+    """
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, expected in condition.items():
+                if not _compare(value, op, expected):
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+
+    return True
+
+
+def _compare(value: Any, op: str, expected: Any) -> bool:
+    """Aplica un operador de comparación de ChromaDB"""
+    if op == "$eq":
+        return value == expected
+    if op == "$ne":
+        return value != expected
+    if op == "$in":
+        return value in expected
+    if op == "$nin":
+        return value not in expected
+    if value is None or isinstance(value, str) != isinstance(expected, str):
+        return False
+    if op == "$gt":
+        return value > expected
+    if op == "$gte":
+        return value >= expected
+    if op == "$lt":
+        return value < expected
+    if op == "$lte":
+        return value <= expected
+    raise ValueError(f"Operador de filtro no soportado: {op}")
+
+
+class SearchBackend(ABC):
+    """
+    Interfaz de consulta de un índice vectorial (solo lectura).
+
+    Todos trabajan con embeddings ya calculados y devuelven tuplas
+    (Document, score) donde score es la distancia L2 al cuadrado entre
+    vectores normalizados (menor = más similar), igual que ChromaDB.
+    """
+
+    name = "base"
+
+    @property
+    @abstractmethod
+    def directory(self) -> str:
+        """Directorio donde se persiste el índice"""
+
+    @property
+    def manifest_path(self) -> str:
+        """Ruta del manifiesto de re-indexación incremental de este backend"""
+        return os.path.join(self.directory, "manifest.json")
+
+    def exists(self) -> bool:
+        """Indica si hay un índice persistido para este backend"""
+        return os.path.isdir(self.directory) and any(os.scandir(self.directory))
+
+    @abstractmethod
+    def query(
+        self,
+        embedding: List[float],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Devuelve los k chunks más cercanos al embedding"""
+
+    def query_many(
+        self,
+        embeddings: List[List[float]],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Devuelve los k chunks más cercanos a cada embedding
+
+        Por defecto consulta uno a uno; los backends la sobrescriben para
+        resolver todo el lote en una sola operación.
+
+        Returns:
+            Una lista de resultados por embedding, en el mismo orden
+        """
+        return [self.query(embedding, k, filter) for embedding in embeddings]
+
+    @abstractmethod
+    def get(self, ids: List[str]) -> List[Document]:
+        """Devuelve los chunks con esos ids (en el mismo orden, omitiendo los que no existen)"""
+
+    @abstractmethod
+    def get_vectors(self, ids: List[str]) -> np.ndarray:
+        """Devuelve los embeddings float32 de esos ids (alineados con ids; todos deben existir)"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Número de chunks indexados"""
+
+    @abstractmethod
+    def export(self, include_vectors: bool = True) -> Dict[str, Any]:
+        """
+        Exporta el contenido completo del índice
+
+        Returns:
+            Diccionario con 'ids', 'texts', 'metadatas' y, opcionalmente,
+            'vectors' (matriz float32 alineada con ids)
+        """
+
+    @property
+    @abstractmethod
+    def memory_bytes(self) -> int:
+        """Estimación de los bytes en memoria de los vectores del índice"""
+
+
+class VectorBackend(SearchBackend):
+    """
+    Interfaz común de los backends vectoriales: consulta y escritura.
+    """
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """Inserta o reemplaza chunks ya embebidos"""
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        """Elimina chunks por id"""
+
+    @abstractmethod
+    def reset(self):
+        """Vacía el índice"""
+
+    def persist(self):
+        """Asegura que los cambios quedan escritos en disco"""
+
+
+class ChromaBackend(VectorBackend):
+    """
+    Backend sobre una colección persistente de ChromaDB
+
+    Usa directamente la API pública de chromadb: los vectores llegan ya
+    calculados, así que no hace falta el envoltorio de LangChain. La
+    colección conserva el nombre con el que la creaba langchain-chroma, de
+    modo que los índices existentes se siguen abriendo.
+
+    Los parámetros del grafo HNSW se toman de config (HNSW_M,
+    HNSW_CONSTRUCTION_EF, HNSW_SEARCH_EF). M y construction_ef quedan fijos
+    al crear la colección; search_ef se aplica también a colecciones
+    existentes, antes de la primera búsqueda del proceso.
+    """
+
+    name = "chroma"
+
+    COLLECTION_NAME = "langchain"
+
+    def __init__(self, directory: str = None, hnsw: Dict[str, int] = None):
+        self._directory = directory or config.CHROMA_DIR
+        os.makedirs(self._directory, exist_ok=True)
+        self._wanted = {
+            "max_neighbors": config.HNSW_M,
+            "ef_construction": config.HNSW_CONSTRUCTION_EF,
+            "ef_search": config.HNSW_SEARCH_EF,
+            **(hnsw or {}),
+        }
+        self.client = chromadb.PersistentClient(path=self._directory)
+        self.collection = self._open_collection()
+
+        # Una colección existente conserva los parámetros con los que se construyó
+        self.hnsw = self._hnsw_settings()
+        if self.hnsw.get("ef_search") != self._wanted["ef_search"]:
+            self.collection.modify(configuration={"hnsw": {"ef_search": self._wanted["ef_search"]}})
+            self.hnsw["ef_search"] = self._wanted["ef_search"]
+        fixed = [key for key in ("max_neighbors", "ef_construction") if self.hnsw.get(key) != self._wanted[key]]
+        if fixed:
+            print(
+                "⚠️  Índice HNSW construido con "
+                + ", ".join(f"{key}={self.hnsw.get(key)}" for key in fixed)
+                + ": haz una reconstrucción completa para aplicar la configuración actual"
+            )
+
+    def _open_collection(self):
+        """Abre la colección del índice, creándola con la configuración HNSW si no existe"""
+        return self.client.get_or_create_collection(
+            name=self.COLLECTION_NAME,
+            embedding_function=None,
+            configuration={"hnsw": {"space": "l2", **self._wanted}}
+        )
+
+    def _hnsw_settings(self) -> Dict[str, int]:
+        """Parámetros HNSW de la colección abierta"""
+        configuration = self.collection.configuration or {}
+        hnsw = configuration.get("hnsw") or {}
+        return {key: hnsw.get(key) for key in ("max_neighbors", "ef_construction", "ef_search")}
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def manifest_path(self) -> str:
+        # Los índices sin versionar guardaban el manifiesto fuera del directorio
+        if os.path.abspath(self._directory) == os.path.abspath(config.CHROMA_DIR):
+            return config.INDEX_MANIFEST_PATH
+        return super().manifest_path
+
+    def upsert(self, ids, embeddings, texts, metadatas):
+        # Chroma no acepta metadata vacía: esos chunks se escriben aparte
+        with_meta = [i for i, meta in enumerate(metadatas) if meta]
+        without_meta = [i for i, meta in enumerate(metadatas) if not meta]
+
+        if with_meta:
+            self.collection.upsert(
+                ids=[ids[i] for i in with_meta],
+                embeddings=[embeddings[i] for i in with_meta],
+                documents=[texts[i] for i in with_meta],
+                metadatas=[metadatas[i] for i in with_meta]
+            )
+        if without_meta:
+            self.collection.upsert(
+                ids=[ids[i] for i in without_meta],
+                embeddings=[embeddings[i] for i in without_meta],
+                documents=[texts[i] for i in without_meta]
+            )
+
+    def delete(self, ids):
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def reset(self):
+        self.client.delete_collection(self.COLLECTION_NAME)
+        self.collection = self._open_collection()
+
+    def query(self, embedding, k, filter=None):
+        return self.query_many([embedding], k, filter)[0]
+
+    def query_many(self, embeddings, k, filter=None):
+        if not embeddings:
+            return []
+        # Una sola consulta a la colección para todo el lote
+        data = self.collection.query(
+            query_embeddings=[list(map(float, embedding)) for embedding in embeddings],
+            n_results=k,
+            where=filter or None,
+            include=["documents", "metadatas", "distances"]
+        )
+        return [
+            [
+                (Document(page_content=text, metadata=meta or {}, id=chunk_id), float(distance))
+                for chunk_id, text, meta, distance in zip(ids, texts, metas, distances)
+            ]
+            for ids, texts, metas, distances in zip(
+                data["ids"], data["documents"], data["metadatas"], data["distances"]
+            )
+        ]
+
+    def get(self, ids):
+        if not ids:
+            return []
+        data = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        found = {
+            chunk_id: Document(page_content=text, metadata=meta or {}, id=chunk_id)
+            for chunk_id, text, meta in zip(data["ids"], data["documents"], data["metadatas"])
+        }
+        return [found[chunk_id] for chunk_id in ids if chunk_id in found]
+
+    def get_vectors(self, ids):
+        if not ids:
+            return np.zeros((0, 0), dtype=np.float32)
+        data = self.collection.get(ids=ids, include=["embeddings"])
+        found = dict(zip(data["ids"], data["embeddings"]))
+        return np.asarray([found[chunk_id] for chunk_id in ids], dtype=np.float32)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    @property
+    def memory_bytes(self) -> int:
+        data = self.collection.get(limit=1, include=["embeddings"])
+        if not data["ids"]:
+            return 0
+        # Vectores float32 más los enlaces de la capa base del grafo HNSW (2 * M ids de 4 bytes)
+        neighbors = self.hnsw.get("max_neighbors") or config.HNSW_M
+        return self.count() * (len(data["embeddings"][0]) * 4 + 2 * neighbors * 4)
+
+    def export(self, include_vectors: bool = True) -> Dict[str, Any]:
+        include = ["documents", "metadatas"] + (["embeddings"] if include_vectors else [])
+        data = self.collection.get(include=include)
+        exported = {
+            "ids": list(data["ids"]),
+            "texts": list(data["documents"]),
+            "metadatas": [meta or {} for meta in data["metadatas"]],
+        }
+        if include_vectors:
+            exported["vectors"] = np.asarray(data["embeddings"], dtype=np.float32)
+        return exported
+
+
+class NumpyBackend(VectorBackend):
+    """
+    Backend de búsqueda exacta en proceso.
+
+    Los vectores normalizados se guardan como una matriz float32 en
+    'vectors.npy' (abierta con mmap al cargar) y los ids, textos y metadata
+    en 'records.json'. Cada búsqueda es un único producto matriz-vector
+    seguido de argpartition para el top-k.
+
+    Con cuantización (float16 / int8) el recorrido completo se hace sobre la
+    matriz cuantizada y los mejores candidatos se re-puntúan con los
+    vectores float32 mapeados en memoria, que solo se leen para esas filas.
+    """
+
+    name = "numpy"
+
+    VECTORS_FILE = "vectors.npy"
+    RECORDS_FILE = "records.json"
+
+    def __init__(
+        self,
+        directory: str = None,
+        quantization: str = None,
+        rescore: bool = None
+    ):
+        self._directory = directory or config.NUMPY_INDEX_DIR
+        self.quantization = (quantization or config.VECTOR_QUANTIZATION).lower()
+        if self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"Cuantización desconocida: {self.quantization}. Usa {', '.join(QUANTIZATION_MODES)}"
+            )
+        self.rescore = config.VECTOR_RESCORE if rescore is None else rescore
+        self.vectors: Optional[np.ndarray] = None
+        self._buffer: Optional[np.ndarray] = None  # Capacidad reservada; self.vectors es una vista de sus primeras filas
+        self._quantized: Optional[QuantizedMatrix] = None
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._dirty = False
+        self._load()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def _load(self):
+        """Carga el índice persistido (vectores mapeados en memoria)"""
+        vectors_path = os.path.join(self._directory, self.VECTORS_FILE)
+        records_path = os.path.join(self._directory, self.RECORDS_FILE)
+        if not os.path.exists(records_path):
+            return
+
+        with open(records_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+
+        self.ids = records["ids"]
+        if self.ids and os.path.exists(vectors_path):
+            self.vectors = np.load(vectors_path, mmap_mode='r')
+        if self.ids and self.quantization != "none":
+            self._quantized = QuantizedMatrix.load(self._directory, self.quantization)
+        if self.ids and self.vectors is None and self._quantized is None:
+            raise ValueError(f"Índice NumPy incompleto en {self._directory}: faltan los vectores")
+        self.texts = records["texts"]
+        self.metadatas = records["metadatas"]
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+
+    def _writable_vectors(self) -> np.ndarray:
+        """Copia la matriz a memoria antes de la primera modificación"""
+        if self.vectors is None and self._quantized is not None:
+            # Índice guardado sin float32: partir de los vectores reconstruidos
+            self.vectors = self._quantized.dequantize()
+        # La matriz cuantizada se recalcula tras cualquier modificación
+        self._quantized = None
+        if isinstance(self.vectors, np.memmap) or (
+            self.vectors is not None and not self.vectors.flags.writeable
+        ):
+            self.vectors = np.array(self.vectors, dtype=np.float32)
+        return self.vectors
+
+    def upsert(self, ids, embeddings, texts, metadatas):
+        if not ids:
+            return
+
+        batch = np.asarray(embeddings, dtype=np.float32)
+        vectors = self._writable_vectors()
+        new_rows = []
+
+        for i, chunk_id in enumerate(ids):
+            position = self._positions.get(chunk_id)
+            if position is None:
+                self._positions[chunk_id] = len(self.ids)
+                self.ids.append(chunk_id)
+                self.texts.append(texts[i])
+                self.metadatas.append(metadatas[i] or {})
+                new_rows.append(i)
+            else:
+                vectors[position] = batch[i]
+                self.texts[position] = texts[i]
+                self.metadatas[position] = metadatas[i] or {}
+
+        if new_rows:
+            self._append_rows(batch[new_rows])
+
+        self._dirty = True
+
+    def _append_rows(self, rows: np.ndarray):
+        """
+        Añade filas al final de la matriz sin copiarla entera en cada lote
+
+        Las filas se escriben en un búfer con capacidad de sobra que se
+        duplica al llenarse, de modo que construir un índice por lotes
+        cuesta un tiempo lineal en el número de chunks.
+        """
+        count = 0 if self.vectors is None else len(self.vectors)
+        needed = count + len(rows)
+        buffer = self._buffer
+        if (
+            buffer is None
+            or needed > len(buffer)
+            or buffer.shape[1] != rows.shape[1]
+            or (count and self.vectors.base is not buffer)
+        ):
+            buffer = np.empty((max(needed, 2 * count), rows.shape[1]), dtype=np.float32)
+            if count:
+                buffer[:count] = self.vectors
+            self._buffer = buffer
+        buffer[count:needed] = rows
+        self.vectors = buffer[:needed]
+
+    def delete(self, ids):
+        to_delete = {self._positions[chunk_id] for chunk_id in ids if chunk_id in self._positions}
+        if not to_delete:
+            return
+
+        keep = [i for i in range(len(self.ids)) if i not in to_delete]
+        self.vectors = np.asarray(self._writable_vectors())[keep]
+        self._buffer = None
+        self.ids = [self.ids[i] for i in keep]
+        self.texts = [self.texts[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+        self._dirty = True
+
+    def reset(self):
+        self.vectors = None
+        self._buffer = None
+        self._quantized = None
+        self.ids, self.texts, self.metadatas = [], [], []
+        self._positions = {}
+        self._dirty = True
+
+    def query(self, embedding, k, filter=None):
+        return self.query_many([embedding], k, filter)[0]
+
+    def query_many(self, embeddings, k, filter=None):
+        if not self.ids:
+            return [[] for _ in embeddings]
+
+        queries = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+        mask = None
+        if filter:
+            mask = np.fromiter(
+                (matches_filter(meta, filter) for meta in self.metadatas),
+                dtype=bool,
+                count=len(self.metadatas)
+            )
+
+        quantized = self._ensure_quantized()
+        results = []
+        if quantized is not None:
+            for query in queries:
+                top, top_scores = quantized.search(
+                    query,
+                    k,
+                    exact_vectors=self.vectors if self.rescore else None,
+                    rescore_factor=config.VECTOR_RESCORE_FACTOR,
+                    mask=mask
+                )
+                results.append(self._to_results(top, top_scores))
+            return results
+
+        # Un único producto matriz-matriz para todo el lote
+        similarities = queries @ self.vectors.T
+        if mask is not None:
+            similarities = np.where(mask, similarities, -np.inf)
+            k = min(k, int(mask.sum()))
+        for row in similarities:
+            top = top_k_indices(row, k)
+            results.append(self._to_results(top, row[top]))
+        return results
+
+    def _to_results(self, top: np.ndarray, top_scores: np.ndarray) -> List[Tuple[Document, float]]:
+        """Convierte índices y similitudes en tuplas (Document, distancia)"""
+        # Distancia L2 al cuadrado entre vectores normalizados (misma escala que Chroma)
+        return [
+            (
+                Document(page_content=self.texts[i], metadata=dict(self.metadatas[i]), id=self.ids[i]),
+                float(2.0 - 2.0 * score)
+            )
+            for i, score in zip(top, top_scores)
+        ]
+
+    def _ensure_quantized(self) -> Optional[QuantizedMatrix]:
+        """Matriz cuantizada vigente (se recalcula si el índice cambió)"""
+        if self.quantization == "none":
+            return None
+        if self._quantized is None and self.vectors is not None:
+            self._quantized = QuantizedMatrix.from_float32(self.vectors, self.quantization)
+        return self._quantized
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes de la matriz que se recorre en cada búsqueda"""
+        quantized = self._ensure_quantized()
+        if quantized is not None:
+            return quantized.nbytes
+        return int(self.vectors.nbytes) if self.vectors is not None else 0
+
+    def get(self, ids):
+        return [
+            Document(page_content=self.texts[i], metadata=dict(self.metadatas[i]), id=self.ids[i])
+            for i in (self._positions.get(chunk_id) for chunk_id in ids)
+            if i is not None
+        ]
+
+    def get_vectors(self, ids):
+        positions = [self._positions[chunk_id] for chunk_id in ids]
+        if self.vectors is not None:
+            return np.asarray(self.vectors[positions], dtype=np.float32)
+        return self._quantized.dequantize(np.asarray(positions, dtype=np.int64))
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def export(self, include_vectors: bool = True) -> Dict[str, Any]:
+        exported = {
+            "ids": list(self.ids),
+            "texts": list(self.texts),
+            "metadatas": [dict(meta) for meta in self.metadatas],
+        }
+        if include_vectors:
+            if self.vectors is not None:
+                exported["vectors"] = np.asarray(self.vectors, dtype=np.float32)
+            elif self._quantized is not None:
+                exported["vectors"] = self._quantized.dequantize()
+            else:
+                exported["vectors"] = np.zeros((0, 0), dtype=np.float32)
+        return exported
+
+    def persist(self):
+        """Escribe vectores y registros de forma atómica (escribe y renombra)"""
+        if not self._dirty:
+            return
+
+        os.makedirs(self._directory, exist_ok=True)
+        vectors_path = os.path.join(self._directory, self.VECTORS_FILE)
+        records_path = os.path.join(self._directory, self.RECORDS_FILE)
+
+        vectors = self.vectors if self.vectors is not None else np.zeros((0, 0), dtype=np.float32)
+        # Sin re-puntuación, con cuantización no hace falta guardar los float32
+        keep_float32 = self.quantization == "none" or self.rescore
+        if keep_float32:
+            with open(f"{vectors_path}.tmp", 'wb') as f:
+                np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+        quantized = self._ensure_quantized() if self.ids else None
+        if quantized is not None:
+            quantized.save(self._directory)
+        with open(f"{records_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(
+                {"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas},
+                f,
+                ensure_ascii=False,
+                separators=(',', ':')
+            )
+
+        if keep_float32:
+            os.replace(f"{vectors_path}.tmp", vectors_path)
+        elif os.path.exists(vectors_path):
+            os.remove(vectors_path)
+        os.replace(f"{records_path}.tmp", records_path)
+        self._dirty = False
+
+
+class ShardedBackend(VectorBackend):
+    """
+    Índice repartido en shards independientes del mismo backend.
+
+    Cada chunk va a un shard según la categoría del producto
+    (strategy='category') o un hash de su product_id (strategy='hash'), de
+    modo que los chunks de un producto quedan siempre juntos. Las escrituras
+    y las consultas se lanzan en paralelo sobre los shards y los top-k
+    parciales se fusionan con un heap; con strategy='category', un filtro por
+    categoría solo consulta los shards de esas categorías.
+
+    La distribución se guarda en 'shards.json' y manda sobre la
+    configuración al reabrir el índice. Un chunk que cambia de categoría
+    debe borrarse antes de volver a insertarse (como hace la re-indexación
+    incremental), ya que la escritura solo toca su shard nuevo.
+    """
+
+    name = "sharded"
+
+    LAYOUT_FILE = "shards.json"
+    SHARDS_DIR = "shards"
+    NO_CATEGORY = "_sin_categoria"
+
+    def __init__(
+        self,
+        directory: str,
+        backend: str = None,
+        strategy: str = None,
+        num_shards: int = None
+    ):
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        layout = self.read_layout(directory) or {
+            "backend": (backend or config.VECTOR_BACKEND).lower(),
+            "strategy": (strategy or config.VECTOR_SHARDING).lower(),
+            "num_shards": max(1, num_shards or config.VECTOR_SHARDS),
+            "shards": {},
+        }
+        if layout["strategy"] not in ("hash", "category"):
+            raise ValueError(f"Estrategia de shards desconocida: {layout['strategy']}. Usa 'hash' o 'category'")
+
+        self.backend_name = layout["backend"]
+        self.strategy = layout["strategy"]
+        self.num_shards = layout["num_shards"]
+        self._shard_dirs: Dict[str, str] = dict(layout["shards"])  # clave -> subdirectorio
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, config.SHARD_WORKERS), thread_name_prefix="vector-shard"
+        )
+        self.shards: Dict[str, VectorBackend] = {
+            key: self._open_shard(subdir) for key, subdir in self._shard_dirs.items()
+        }
+        self._save_layout()
+
+    @classmethod
+    def read_layout(cls, directory: str) -> Optional[Dict[str, Any]]:
+        """Distribución guardada de un índice por shards (None si no lo es)"""
+        try:
+            with open(os.path.join(directory, cls.LAYOUT_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_layout(self):
+        """Guarda la distribución de forma atómica (escribe y renombra)"""
+        path = os.path.join(self._directory, self.LAYOUT_FILE)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(
+                {
+                    "backend": self.backend_name,
+                    "strategy": self.strategy,
+                    "num_shards": self.num_shards,
+                    "shards": self._shard_dirs,
+                },
+                f,
+                indent=2,
+                ensure_ascii=False
+            )
+        os.replace(f"{path}.tmp", path)
+
+    def _open_shard(self, subdir: str) -> VectorBackend:
+        return create_backend(
+            self.backend_name,
+            directory=os.path.join(self._directory, self.SHARDS_DIR, subdir),
+            sharding="none"
+        )
+
+    def shard_key(self, chunk_id: str, metadata: Dict[str, Any]) -> str:
+        """
+        Shard al que pertenece un chunk
+
+        Args:
+            chunk_id: Id del chunk (si no hay forma de identificar el producto)
+            metadata: Metadata del chunk
+
+        Returns:
+            Clave del shard
+        """
+        if self.strategy == "category":
+            return metadata.get("category") or self.NO_CATEGORY
+        key = str(product_key(metadata, chunk_id)).encode("utf-8")
+        return f"{int(hashlib.md5(key).hexdigest(), 16) % self.num_shards:02d}"
+
+    def _shard(self, key: str) -> VectorBackend:
+        """Devuelve el shard de una clave, creándolo si no existe"""
+        with self._lock:
+            if key not in self.shards:
+                if self.strategy == "hash":
+                    subdir = f"shard-{key}"
+                else:
+                    slug = re.sub(r"[^a-z0-9]+", "-", key).strip("-")[:40] or "x"
+                    subdir = f"cat-{slug}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]}"
+                self._shard_dirs[key] = subdir
+                self.shards[key] = self._open_shard(subdir)
+                self._save_layout()
+            return self.shards[key]
+
+    def _route(self, filter: Optional[Dict[str, Any]]) -> List[VectorBackend]:
+        """Shards que pueden contener resultados para un filtro"""
+        if self.strategy == "category":
+            categories = self.filter_categories(filter)
+            if categories is not None:
+                return [self.shards[key] for key in sorted(categories) if key in self.shards]
+        return list(self.shards.values())
+
+    @classmethod
+    def filter_categories(cls, where: Optional[Dict[str, Any]]) -> Optional[set]:
+        """
+        Categorías a las que restringe un filtro 'where'
+
+        Args:
+            where: Filtro de metadata (sintaxis de Chroma)
+
+        Returns:
+            Conjunto de categorías admitidas, o None si el filtro no restringe
+            la categoría
+        """
+        if not where:
+            return None
+
+        result = None
+        for key, condition in where.items():
+            categories = None
+            if key == "$and":
+                for sub in condition:
+                    sub_categories = cls.filter_categories(sub)
+                    if sub_categories is not None:
+                        categories = sub_categories if categories is None else categories & sub_categories
+            elif key == "$or":
+                subs = [cls.filter_categories(sub) for sub in condition]
+                if subs and all(sub is not None for sub in subs):
+                    categories = set().union(*subs)
+            elif key == "category":
+                if not isinstance(condition, dict):
+                    categories = {condition}
+                elif "$eq" in condition:
+                    categories = {condition["$eq"]}
+                elif "$in" in condition:
+                    categories = set(condition["$in"])
+
+            if categories is not None:
+                result = categories if result is None else result & categories
+        return result
+
+    def _map(self, fn, items: List[Any]) -> List[Any]:
+        """Aplica fn a cada elemento en paralelo (directamente si solo hay uno)"""
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        return list(self._executor.map(fn, items))
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def shard_sizes(self) -> Dict[str, int]:
+        """Chunks de cada shard"""
+        return {key: shard.count() for key, shard in sorted(self.shards.items())}
+
+    def upsert(self, ids, embeddings, texts, metadatas):
+        groups: Dict[str, List[int]] = {}
+        for i, (chunk_id, meta) in enumerate(zip(ids, metadatas)):
+            groups.setdefault(self.shard_key(chunk_id, meta or {}), []).append(i)
+
+        def write(item):
+            key, positions = item
+            self._shard(key).upsert(
+                [ids[i] for i in positions],
+                [embeddings[i] for i in positions],
+                [texts[i] for i in positions],
+                [metadatas[i] for i in positions]
+            )
+
+        self._map(write, list(groups.items()))
+
+    def delete(self, ids):
+        if ids:
+            self._map(lambda shard: shard.delete(ids), list(self.shards.values()))
+
+    def reset(self):
+        self._map(lambda shard: shard.reset(), list(self.shards.values()))
+
+    def query(self, embedding, k, filter=None):
+        return self.query_many([embedding], k, filter)[0]
+
+    def query_many(self, embeddings, k, filter=None):
+        shards = self._route(filter)
+        if not embeddings or not shards:
+            return [[] for _ in embeddings]
+
+        partials = self._map(lambda shard: shard.query_many(embeddings, k, filter), shards)
+        # Cada lista parcial ya viene ordenada por distancia: fusión k-way con heap
+        return [
+            list(itertools.islice(
+                heapq.merge(*(partial[i] for partial in partials), key=lambda result: result[1]),
+                k
+            ))
+            for i in range(len(embeddings))
+        ]
+
+    def get(self, ids):
+        found = {}
+        for docs in self._map(lambda shard: shard.get(ids), list(self.shards.values())):
+            found.update((doc.id, doc) for doc in docs)
+        return [found[chunk_id] for chunk_id in ids if chunk_id in found]
+
+    def get_vectors(self, ids):
+        if not ids:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        def lookup(shard):
+            present = [doc.id for doc in shard.get(ids)]
+            return present, shard.get_vectors(present) if present else None
+
+        vectors = {}
+        for present, rows in self._map(lookup, list(self.shards.values())):
+            if present:
+                vectors.update(zip(present, rows))
+        return np.asarray([vectors[chunk_id] for chunk_id in ids], dtype=np.float32)
+
+    def count(self) -> int:
+        return sum(shard.count() for shard in self.shards.values())
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(shard.memory_bytes for shard in self.shards.values())
+
+    def export(self, include_vectors: bool = True) -> Dict[str, Any]:
+        parts = [shard.export(include_vectors) for _, shard in sorted(self.shards.items())]
+        exported = {
+            "ids": [chunk_id for part in parts for chunk_id in part["ids"]],
+            "texts": [text for part in parts for text in part["texts"]],
+            "metadatas": [meta for part in parts for meta in part["metadatas"]],
+        }
+        if include_vectors:
+            matrices = [part["vectors"] for part in parts if len(part["vectors"])]
+            exported["vectors"] = np.vstack(matrices) if matrices else np.zeros((0, 0), dtype=np.float32)
+        return exported
+
+    def persist(self):
+        self._map(lambda shard: shard.persist(), list(self.shards.values()))
+        self._save_layout()
+
+
+def create_backend(
+    name: str = None,
+    directory: str = None,
+    sharding: str = None
+) -> VectorBackend:
+    """
+    Crea el backend vectorial configurado
+
+    Un directorio con índice por shards se abre siempre como tal; uno vacío
+    se reparte en shards si config.VECTOR_SHARDING lo indica. Un índice sin
+    shards existente se abre tal cual (se reparte al reconstruirlo).
+
+    Args:
+        name: 'chroma' o 'numpy' (por defecto config.VECTOR_BACKEND)
+        directory: Directorio del índice (por defecto el del backend en config)
+        sharding: 'none', 'hash' o 'category' (por defecto config.VECTOR_SHARDING)
+
+    Returns:
+        Instancia del backend
+    """
+    name = (name or config.VECTOR_BACKEND).lower()
+    if name not in ("chroma", "numpy"):
+        raise ValueError(f"Backend vectorial desconocido: {name}. Usa 'chroma' o 'numpy'")
+    sharding = (sharding or config.VECTOR_SHARDING).lower()
+    if sharding not in SHARDING_MODES:
+        raise ValueError(f"Modo de shards desconocido: {sharding}. Usa {', '.join(SHARDING_MODES)}")
+
+    directory = directory or (config.CHROMA_DIR if name == "chroma" else config.NUMPY_INDEX_DIR)
+    is_empty = not os.path.isdir(directory) or not any(os.scandir(directory))
+    if ShardedBackend.read_layout(directory) is not None or (sharding != "none" and is_empty):
+        return ShardedBackend(directory, backend=name, strategy=sharding)
+
+    if name == "chroma":
+        return ChromaBackend(directory)
+    return NumpyBackend(directory)
@@ -0,0 +1,286 @@
+"""
+Caché persistente de documentos parseados, por huella de archivo (SQLite)
+"""
+from typing import List, Optional, Dict, Any, Iterator, Tuple
+import io
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+from langchain_core.documents import Document
+
+from src.config import config
+from src.rag.index_manifest import file_content_hash
+
+
+class DocumentCache:
+    """
+    Caché en disco de los documentos que produce un cargador para cada archivo.
+
+    Cada entrada guarda la huella del archivo (ruta, tamaño, mtime y hash de
+    contenido), el cargador y la versión que lo parsearon, y sus documentos
+    (texto + metadata) serializados con pickle y comprimidos con zlib. Es un
+    archivo local que solo escribe la aplicación, como el propio índice; no
+    debe apuntarse a una caché de origen desconocido. Si tamaño y mtime
+    coinciden se sirve sin leer el archivo; si solo cambió el mtime se
+    compara el hash de contenido.
+
+    Al abrirla se descartan las entradas de otra versión del mismo cargador.
+    Ninguna entrada ocupa más del 10% del límite y, al superarlo, se
+    eliminan las menos usadas recientemente.
+    """
+
+    def __init__(self, loader: str, version: Any, path: str = None, max_mb: float = None):
+        self.loader = loader
+        self.version = str(version)
+        self.path = path or config.DOCUMENT_CACHE_PATH
+        self.max_bytes = int((max_mb if max_mb is not None else config.DOCUMENT_CACHE_MAX_MB) * 1024 * 1024)
+        self.max_entry_bytes = self.max_bytes // 10
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Varios procesos del pool de carga pueden escribir a la vez
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " loader TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " hash TEXT NOT NULL,"
+            " payload BLOB NOT NULL,"
+            " nbytes INTEGER NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (loader, path))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_last_used ON documents(last_used)")
+        stale = self._conn.execute(
+            "DELETE FROM documents WHERE loader = ? AND version != ?", (self.loader, self.version)
+        ).rowcount
+        self._conn.commit()
+        if stale:
+            print(f"🧹 Caché de documentos: {stale} entradas de otra versión del cargador descartadas")
+
+    @staticmethod
+    def fingerprint(file_path: str) -> Tuple[int, int, str]:
+        """
+        Huella de un archivo
+
+        Args:
+            file_path: Ruta al archivo
+
+        Returns:
+            Tupla (tamaño, mtime en ns, hash SHA-256 del contenido)
+        """
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime_ns, file_content_hash(file_path)
+
+    def entry(self) -> "CacheEntry":
+        """Entrada vacía, limitada al tamaño máximo de una entrada de esta caché"""
+        return CacheEntry(self.max_entry_bytes)
+
+    def get(self, file_path: str) -> Optional[List[Document]]:
+        """
+        Documentos de un archivo si su huella coincide con la guardada
+
+        Args:
+            file_path: Ruta al archivo (tal como se pasa al cargador)
+
+        Returns:
+            Documentos cacheados o None si no hay entrada válida
+        """
+        documents = self.iter_documents(file_path)
+        return None if documents is None else list(documents)
+
+    def iter_documents(self, file_path: str) -> Optional[Iterator[Document]]:
+        """
+        Como get, pero crea los documentos a medida que se recorren
+
+        Args:
+            file_path: Ruta al archivo (tal como se pasa al cargador)
+
+        Returns:
+            Iterador de los documentos cacheados o None si no hay entrada válida
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, hash, payload FROM documents WHERE loader = ? AND path = ?",
+                (self.loader, file_path)
+            ).fetchone()
+
+        if row is None or row[0] != stat.st_size:
+            self.misses += 1
+            return None
+        size, mtime_ns, content_hash, payload = row
+        # Mismo tamaño pero otro mtime (copiado, tocado...): decide el contenido
+        if mtime_ns != stat.st_mtime_ns and file_content_hash(file_path) != content_hash:
+            self.misses += 1
+            return None
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE documents SET mtime_ns = ?, last_used = ? WHERE loader = ? AND path = ?",
+                (stat.st_mtime_ns, time.time(), self.loader, file_path)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return (
+            Document.model_construct(page_content=content, metadata=metadata)
+            for records in _iter_frames(zlib.decompress(payload))
+            for content, metadata in records
+        )
+
+    def put(self, file_path: str, fingerprint: Tuple[int, int, str], entry: "CacheEntry"):
+        """
+        Guarda los documentos de un archivo y aplica el límite de tamaño
+
+        Args:
+            file_path: Ruta al archivo (tal como se pasa al cargador)
+            fingerprint: Huella tomada antes de parsear (fingerprint())
+            entry: Documentos del archivo; una entrada descartada no guarda nada
+        """
+        payload = entry.payload()
+        if payload is None:
+            return
+
+        size, mtime_ns, content_hash = fingerprint
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents "
+                "(loader, path, version, size, mtime_ns, hash, payload, nbytes, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.loader, file_path, self.version, size, mtime_ns, content_hash,
+                 payload, len(payload), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Elimina las entradas menos usadas hasta quedar bajo el 90% del límite"""
+        # El total se lee de la base: varios procesos escriben en la misma caché
+        total = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM documents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        cursor = self._conn.execute("SELECT loader, path, nbytes FROM documents ORDER BY last_used ASC")
+        to_delete = []
+        for loader, path, nbytes in cursor:
+            if total <= target:
+                break
+            to_delete.append((loader, path))
+            total -= nbytes
+        cursor.close()
+
+        self._conn.executemany("DELETE FROM documents WHERE loader = ? AND path = ?", to_delete)
+        self.evictions += len(to_delete)
+
+    def clear(self):
+        """Vacía la caché"""
+        with self._lock:
+            self._conn.execute("DELETE FROM documents")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de uso de la caché
+
+        Returns:
+            Diccionario con aciertos, fallos, tasa de aciertos, entradas y tamaño
+        """
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM documents"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_mb": total / (1024 * 1024),
+            "max_mb": self.max_bytes / (1024 * 1024),
+        }
+
+    def close(self):
+        """Cierra la conexión a SQLite"""
+        with self._lock:
+            self._conn.close()
+
+
+def _iter_frames(data: bytes) -> Iterator[list]:
+    """Recorre los bloques serializados con pickle, uno tras otro, de una entrada"""
+    stream = io.BytesIO(data)
+    while stream.tell() < len(data):
+        yield pickle.load(stream)
+
+
+class CacheEntry:
+    """
+    Documentos de un archivo serializados y comprimidos a medida que llegan
+
+    Permite cachear un archivo cargado en streaming sin conservar sus
+    documentos: cada lote se serializa con pickle (texto y metadata, con sus
+    tipos exactos) y se comprime al añadirlo. La entrada se descarta si
+    algún documento no se puede serializar o si supera el tamaño máximo.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.discarded = max_bytes <= 0
+        self._compressor = zlib.compressobj(1)  # Nivel rápido: la entrada se escribe al cargar
+        self._chunks: List[bytes] = []
+        self._nbytes = 0
+
+    def add(self, documents: List[Document]):
+        """
+        Añade documentos al final de la entrada
+
+        Args:
+            documents: Documentos recién cargados (antes de que nadie los modifique)
+        """
+        if self.discarded or not documents:
+            return
+        try:
+            frame = pickle.dumps([(doc.page_content, doc.metadata) for doc in documents], protocol=5)
+        except Exception:
+            return self._discard()
+
+        chunk = self._compressor.compress(frame)
+        self._chunks.append(chunk)
+        self._nbytes += len(chunk)
+        if self._nbytes > self.max_bytes:
+            self._discard()
+
+    def payload(self) -> Optional[bytes]:
+        """
+        Contenido comprimido de la entrada
+
+        Returns:
+            Bloques de pickle comprimidos con zlib, o None si la entrada se descartó
+        """
+        if self.discarded:
+            return None
+        payload = b"".join(self._chunks) + self._compressor.flush()
+        self._discard()  # El compresor ya se cerró
+        return payload if len(payload) <= self.max_bytes else None
+
+    def _discard(self):
+        """Descarta la entrada y libera lo acumulado"""
+        self.discarded = True
+        self._chunks = []
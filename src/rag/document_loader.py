@@ -2,7 +2,14 @@
 Cargador de documentos para diferentes tipos de archivos
 """
 import os
-from typing import List
+import time
+import codecs
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
 
 from langchain_community.document_loaders import (
@@ -12,8 +19,20 @@ from langchain_community.document_loaders import (
 )
 from langchain_core.documents import Document
 import json
+import numpy as np
 import pandas as pd
 
+from src.config import config
+from src.rag.document_cache import DocumentCache
+from src.rag.product_fields import (
+    detect_product_columns,
+    extract_product_field_columns,
+    extract_product_fields,
+    make_product_id,
+    make_product_ids,
+)
+from src.rag.worker_threads import limit_worker_threads, threads_per_worker, worker_threads
+
 # Dependencias opcionales
 try:
     from langchain_community.document_loaders import UnstructuredWordDocumentLoader
@@ -28,10 +47,164 @@ except ImportError:
     EXCEL_UNSTRUCTURED_SUPPORT = False
 
 
+def row_columns(df: pd.DataFrame) -> List[np.ndarray]:
+    """
+    Columnas de una tabla con los valores tal como aparecen en sus filas
+
+    iterrows construye cada fila a partir de df.values, de modo que una
+    tabla solo numérica convierte los enteros en float; usar la misma
+    matriz mantiene idénticos el texto y los campos de cada fila.
+
+    Args:
+        df: Tabla
+
+    Returns:
+        Un array por columna
+    """
+    values = df.values
+    columns = []
+    for position in range(values.shape[1]):
+        column = values[:, position]
+        if column.dtype.kind in "mM":
+            column = pd.Series(column).to_numpy(dtype=object)  # Timestamp / Timedelta, como en una fila
+        columns.append(column)
+    return columns
+
+
+def format_rows(df: pd.DataFrame, columns: List[np.ndarray] = None) -> List[str]:
+    """
+    Texto 'columna: valor' de todas las filas de una tabla, omitiendo NaN
+
+    Se construye columna a columna con máscaras (una concatenación
+    vectorizada por columna) y produce exactamente el mismo texto que
+    unir por fila los pares no nulos de iterrows.
+
+    Args:
+        df: Tabla
+        columns: Columnas ya extraídas con row_columns (opcional)
+
+    Returns:
+        Una línea 'columna: valor' por celda no nula, un texto por fila
+    """
+    columns = row_columns(df) if columns is None else columns
+    texts = np.full(len(df), "", dtype=object)
+    started = np.zeros(len(df), dtype=bool)
+
+    for name, column in zip(df.columns, columns):
+        present = np.flatnonzero(pd.notna(column))
+        if not present.size:
+            continue
+        cells = np.empty(present.size, dtype=object)
+        cells[:] = list(map(str, column[present].tolist()))
+        prefixes = np.where(started[present], f"\n{name}: ", f"{name}: ").astype(object)
+        texts[present] = texts[present] + prefixes + cells
+        started[present] = True
+
+    return texts.tolist()
+
+
+def csv_column_dtypes(chunks: Iterable[pd.DataFrame]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Tipos que tendrían las columnas de un CSV leído entero, a partir de sus bloques
+
+    Combina lo inferido en cada bloque (ignorando los bloques en que la
+    columna está vacía) como lo haría pandas con la columna completa:
+    enteros y decimales, o enteros con alguna celda vacía, son float64;
+    booleanos con celdas vacías son object; y una columna con texto en
+    algún bloque se lee entera como texto.
+
+    Args:
+        chunks: Bloques del CSV leídos sin tipos fijados
+
+    Returns:
+        Tupla (dtype por columna para read_csv, columnas booleanas con
+        celdas vacías que hay que convertir a object tras leer cada bloque)
+    """
+    kinds: Dict[str, set] = {}
+    missing: Dict[str, bool] = {}
+    for chunk in chunks:
+        for name in chunk.columns:
+            column = chunk[name]
+            present = column.notna()
+            kinds.setdefault(name, set())
+            if present.any():
+                kinds[name].add(pd.api.types.infer_dtype(column, skipna=True))
+            missing[name] = missing.get(name, False) or not present.all()
+
+    dtypes: Dict[str, Any] = {}
+    object_columns: List[str] = []
+    for name, found in kinds.items():
+        if not found or (found in ({"integer"}, {"boolean"}) and not missing[name]):
+            continue  # Cada bloque ya infiere el mismo tipo que el archivo entero
+        if found <= {"integer", "floating", "mixed-integer-float"}:
+            dtypes[name] = "float64"
+        elif found == {"boolean"}:
+            object_columns.append(name)
+        else:
+            dtypes[name] = str
+    return dtypes, object_columns
+
+
+LATIN1_FALLBACK = "latin1_fallback"
+ENCODING_SAMPLE_BYTES = 1024 * 1024  # Bytes leídos para detectar la codificación
+
+
+def _latin1_fallback(error: UnicodeDecodeError):
+    """Decodifica como latin1 los bytes que no son UTF-8 válido"""
+    return error.object[error.start:error.end].decode("latin1"), error.end
+
+
+codecs.register_error(LATIN1_FALLBACK, _latin1_fallback)
+
+
+def detect_encoding(file_path: str, sample_bytes: int = ENCODING_SAMPLE_BYTES) -> str:
+    """
+    Detecta la codificación de un archivo de texto con una muestra de bytes
+
+    Args:
+        file_path: Ruta al archivo
+        sample_bytes: Bytes del principio del archivo a examinar
+
+    Returns:
+        'utf-8' si la muestra es UTF-8 válido, si no 'latin1'
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_bytes)
+    try:
+        # final=False: un carácter multibyte cortado al final de la muestra no es un error
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin1"
+
+
+def batched(items: Iterable, size: int = None) -> Iterator[list]:
+    """
+    Agrupa un iterable en listas de como mucho 'size' elementos
+
+    Args:
+        items: Elementos (se consumen de forma perezosa)
+        size: Tamaño máximo de cada lista (None = una sola lista)
+
+    Yields:
+        Listas con los elementos en orden
+    """
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
 class DocumentLoader:
     """Cargador universal de documentos de productos"""
 
+    # Versión del resultado de los cargadores: al subirla se descartan los parseos cacheados
+    CACHE_VERSION = 2  # 2: tipos de columna de los CSV por bloques iguales a los del archivo entero
+
     def __init__(self):
+        self._document_cache = None
         self.supported_extensions = {
             '.pdf': self._load_pdf,
             '.txt': self._load_text,
@@ -42,34 +215,292 @@ class DocumentLoader:
             '.xlsx': self._load_excel,
             '.xls': self._load_excel,
         }
+        # Cargadores que emiten el archivo por partes (páginas, bloques de filas)
+        self.streaming_loaders = {
+            '.pdf': self._iter_pdf,
+            '.csv': self._iter_csv,
+            '.xlsx': self._iter_excel,
+            '.xls': self._iter_excel,
+        }
+
+    @property
+    def document_cache(self) -> Optional[DocumentCache]:
+        """Caché de parseos por huella de archivo (None si está desactivada)"""
+        if self._document_cache is None and config.DOCUMENT_CACHE_ENABLED:
+            # Se abre al primer uso: cada proceso del pool de carga tiene su conexión
+            loader_class = type(self)
+            self._document_cache = DocumentCache(
+                f"{loader_class.__module__}.{loader_class.__qualname__}", self.CACHE_VERSION
+            )
+        return self._document_cache
 
-    def load_documents(self, directory: str) -> List[Document]:
+    def load_documents(self, directory: str, workers: int = None) -> List[Document]:
         """
         Carga todos los documentos de un directorio
 
         Args:
             directory: Ruta al directorio con los archivos
+            workers: Procesos para cargar archivos en paralelo (por defecto config.LOAD_WORKERS)
 
         Returns:
-            Lista de documentos cargados
+            Lista de documentos cargados (en el orden de list_files)
         """
         documents = []
+
+        for result in self.load_files(self.list_files(directory), workers):
+            name = Path(result["file"]).name
+            if result["error"]:
+                print(f"✗ Error cargando {name}: {result['error']}")
+            else:
+                documents.extend(result["documents"])
+                print(f"✓ Cargado: {name} ({len(result['documents'])} documentos, {result['seconds']:.2f}s)")
+
+        return documents
+
+    def iter_documents(self, directory: str, batch_size: int = None) -> Iterator[List[Document]]:
+        """
+        Recorre los documentos de un directorio en lotes acotados
+
+        A diferencia de load_documents, nunca tiene el corpus entero en
+        memoria: emite archivo a archivo y, dentro de cada archivo, por
+        páginas (PDF), bloques de filas (CSV) u hojas leídas de una en una
+        (Excel). Con un pool de carga (config.LOAD_WORKERS > 1) cada archivo
+        se parsea entero en su proceso, así que la memoria queda acotada por
+        archivo y no por lote. Un archivo con error se informa y se salta.
+
+        Args:
+            directory: Ruta al directorio con los archivos
+            batch_size: Documentos por lote como máximo (por defecto config.LOAD_BATCH_SIZE)
+
+        Yields:
+            Listas de documentos, en el orden de list_files
+        """
+        for file_path, batches in self.iter_files(self.list_files(directory), batch_size):
+            name = Path(file_path).name
+            count = 0
+            try:
+                for batch in batches:
+                    count += len(batch)
+                    yield batch
+            except Exception as e:
+                print(f"✗ Error cargando {name}: {e}")
+                continue
+            print(f"✓ Cargado: {name} ({count} documentos)")
+
+    def iter_files(
+        self,
+        file_paths: Iterable,
+        batch_size: int = None,
+        workers: int = None
+    ) -> Iterator[Tuple[str, Iterator[List[Document]]]]:
+        """
+        Recorre varios archivos entregando los documentos de cada uno por lotes
+
+        En secuencia, cada archivo se lee en streaming (iter_file) al
+        consumir sus lotes. Con un pool de carga (workers > 1) los archivos
+        se parsean enteros en paralelo (load_files) y se entregan troceados.
+        Los errores de carga de un archivo se lanzan al recorrer sus lotes.
+
+        Args:
+            file_paths: Rutas de los archivos
+            batch_size: Documentos por lote como máximo (por defecto config.LOAD_BATCH_SIZE)
+            workers: Procesos de carga (por defecto config.LOAD_WORKERS)
+
+        Yields:
+            Tuplas (ruta, iterador de lotes de documentos); los lotes de un
+            archivo deben consumirse antes de pedir el siguiente
+        """
+        file_paths = [str(file_path) for file_path in file_paths]
+        workers = min(config.LOAD_WORKERS if workers is None else workers, len(file_paths))
+
+        if workers > 1:
+            for result in self.load_files(file_paths, workers):
+                yield result["file"], self._result_batches(result, batch_size)
+        else:
+            for file_path in file_paths:
+                yield file_path, self.iter_file(file_path, batch_size)
+
+    def iter_file(self, file_path: str, batch_size: int = None) -> Iterator[List[Document]]:
+        """
+        Carga un archivo por lotes
+
+        Los PDF se leen página a página, los CSV por bloques de filas y los
+        Excel hoja a hoja; el resto de formatos se cargan enteros y se
+        trocean. Un archivo sin
+        cambios se sirve desde la caché de parseos; si no, cada lote se
+        añade a la entrada de la caché antes de entregarlo (quien lo recibe
+        puede modificarlo) y el archivo se guarda al terminar.
+
+        Args:
+            file_path: Ruta al archivo
+            batch_size: Documentos por lote como máximo (por defecto config.LOAD_BATCH_SIZE)
+
+        Yields:
+            Listas de documentos del archivo, en orden
+        """
+        batch_size = max(1, config.LOAD_BATCH_SIZE if batch_size is None else batch_size)
+        ext = Path(file_path).suffix.lower()
+        if ext not in self.supported_extensions:
+            raise ValueError(f"Extensión no soportada: {ext}")
+
+        cache = self.document_cache
+        if cache is None:
+            yield from self._parse_batches(file_path, ext, batch_size)
+            return
+
+        documents = cache.iter_documents(file_path)
+        if documents is not None:
+            yield from batched(documents, batch_size)
+            return
+
+        fingerprint = cache.fingerprint(file_path)
+        entry = cache.entry()
+        for batch in self._parse_batches(file_path, ext, batch_size):
+            entry.add(batch)
+            yield batch
+        cache.put(file_path, fingerprint, entry)
+
+    def _parse_batches(self, file_path: str, ext: str, batch_size: int) -> Iterator[List[Document]]:
+        """Parsea un archivo por lotes, sin pasar por la caché"""
+        if ext in self.streaming_loaders:
+            return self.streaming_loaders[ext](file_path, batch_size)
+        return batched(self.supported_extensions[ext](file_path), batch_size)
+
+    @staticmethod
+    def _result_batches(result: Dict[str, Any], batch_size: int = None) -> Iterator[List[Document]]:
+        """Lotes de un archivo ya cargado por load_files (lanza su error si lo hubo)"""
+        if result["error"]:
+            raise ValueError(result["error"])
+        yield from batched(result["documents"], max(1, config.LOAD_BATCH_SIZE if batch_size is None else batch_size))
+
+    def load_files(self, file_paths: Iterable, workers: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Carga varios archivos, en paralelo con un pool de procesos si workers > 1
+
+        Los archivos son independientes, así que cada uno se parsea en un
+        proceso del pool (spawn, como el pool de embeddings). Los resultados
+        se entregan en el mismo orden que 'file_paths', independientemente
+        del orden en que terminen, y el error de un archivo no interrumpe
+        el resto. Solo hay 'workers' archivos en curso a la vez: el
+        siguiente se envía al pool al entregar cada resultado, así que los
+        documentos pendientes de consumir no se acumulan en memoria.
+
+        Args:
+            file_paths: Rutas de los archivos
+            workers: Número de procesos (por defecto config.LOAD_WORKERS; 1 = secuencial)
+
+        Yields:
+            Un diccionario por archivo con 'file', 'documents', 'seconds'
+            (duración de la carga) y 'error' (None si se cargó bien)
+        """
+        file_paths = [str(file_path) for file_path in file_paths]
+        workers = min(config.LOAD_WORKERS if workers is None else workers, len(file_paths))
+
+        if workers <= 1:
+            for file_path in file_paths:
+                yield self._timed_load(file_path)
+            return
+
+        print(f"🧵 Cargando {len(file_paths)} archivos con {workers} procesos...")
+        # Cada proceso usa su parte de los núcleos (pandas / BLAS / torch de algunos parsers)
+        threads = threads_per_worker(workers)
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=limit_worker_threads,
+            initargs=(threads,)
+        )
+        remaining = iter(file_paths)
+        in_flight = deque()  # (ruta, future) en el orden de file_paths
+
+        def submit_next():
+            file_path = next(remaining, None)
+            if file_path is not None:
+                with worker_threads(threads):
+                    in_flight.append((file_path, executor.submit(_load_in_worker, type(self), file_path)))
+
+        try:
+            for _ in range(workers):
+                submit_next()
+            while in_flight:
+                file_path, future = in_flight.popleft()
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    # Sin pool no hay nada que reintentar en él: seguir en este proceso
+                    print(f"⚠️  Pool de carga caído ({e}); se cargan los archivos restantes en secuencia")
+                    pending = itertools.chain([file_path], (path for path, _ in in_flight), remaining)
+                    for pending_path in pending:
+                        yield self._timed_load(pending_path)
+                    return
+                except Exception as e:
+                    # El resultado no se pudo enviar de vuelta (p. ej. no serializable)
+                    result = {"file": file_path, "documents": [], "seconds": 0.0, "error": f"{type(e).__name__}: {e}"}
+                # El siguiente archivo se parsea mientras se consume este resultado
+                submit_next()
+                yield result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _timed_load(self, file_path: str) -> Dict[str, Any]:
+        """Carga un archivo capturando su duración y su error (si lo hay)"""
+        start = time.perf_counter()
+        try:
+            documents, error = self.load_file(file_path), None
+        except Exception as e:
+            documents, error = [], str(e)
+        return {"file": file_path, "documents": documents, "seconds": time.perf_counter() - start, "error": error}
+
+    def list_files(self, directory: str) -> List[Path]:
+        """
+        Lista los archivos soportados de un directorio (recursivo, orden estable)
+
+        Args:
+            directory: Ruta al directorio con los archivos
+
+        Returns:
+            Lista ordenada de rutas a archivos con extensión soportada
+        """
         directory_path = Path(directory)
 
         if not directory_path.exists():
             raise ValueError(f"El directorio {directory} no existe")
 
-        for file_path in directory_path.rglob('*'):
-            if file_path.is_file():
-                ext = file_path.suffix.lower()
-                if ext in self.supported_extensions:
-                    try:
-                        docs = self.supported_extensions[ext](str(file_path))
-                        documents.extend(docs)
-                        print(f"✓ Cargado: {file_path.name}")
-                    except Exception as e:
-                        print(f"✗ Error cargando {file_path.name}: {e}")
+        return sorted(
+            file_path for file_path in directory_path.rglob('*')
+            if file_path.is_file() and file_path.suffix.lower() in self.supported_extensions
+        )
+
+    def load_file(self, file_path: str) -> List[Document]:
+        """
+        Carga un único archivo según su extensión
+
+        Si el archivo no cambió desde la última carga (misma huella y misma
+        versión del cargador) se devuelven los documentos de la caché de
+        parseos sin volver a parsearlo.
+
+        Args:
+            file_path: Ruta al archivo
+
+        Returns:
+            Lista de documentos del archivo
+        """
+        ext = Path(file_path).suffix.lower()
+        if ext not in self.supported_extensions:
+            raise ValueError(f"Extensión no soportada: {ext}")
+
+        cache = self.document_cache
+        if cache is None:
+            return self.supported_extensions[ext](file_path)
 
+        documents = cache.get(file_path)
+        if documents is None:
+            # Huella tomada antes de parsear: un cambio durante la carga invalida la entrada
+            fingerprint = cache.fingerprint(file_path)
+            documents = self.supported_extensions[ext](file_path)
+            entry = cache.entry()
+            entry.add(documents)
+            cache.put(file_path, fingerprint, entry)
         return documents
 
     def _load_pdf(self, file_path: str) -> List[Document]:
@@ -77,6 +508,10 @@ class DocumentLoader:
         loader = PyPDFLoader(file_path)
         return loader.load()
 
+    def _iter_pdf(self, file_path: str, batch_size: int = None) -> Iterator[List[Document]]:
+        """Carga un PDF por bloques de páginas, sin extraer el documento entero antes"""
+        yield from batched(PyPDFLoader(file_path).lazy_load(), batch_size)
+
     def _load_text(self, file_path: str) -> List[Document]:
         """Carga archivos de texto"""
         loader = TextLoader(file_path, encoding='utf-8')
@@ -84,43 +519,129 @@ class DocumentLoader:
 
     def _load_csv(self, file_path: str) -> List[Document]:
         """Carga archivos CSV usando pandas (más rápido y robusto)"""
-        try:
-            # Usar pandas para mejor manejo de diferentes encodings
-            df = pd.read_csv(file_path, encoding='utf-8')
-            documents = []
+        return [doc for batch in self._iter_csv(file_path) for doc in batch]
 
-            for idx, row in df.iterrows():
-                # Crear contenido legible, omitiendo valores NaN
-                content = "\n".join([f"{col}: {row[col]}" for col in df.columns if pd.notna(row[col])])
-                doc = Document(
-                    page_content=content,
-                    metadata={
-                        "source": file_path,
-                        "row": idx,
-                        "type": "csv",
-                        "columns": list(df.columns)
-                    }
-                )
-                documents.append(doc)
+    def _iter_csv(self, file_path: str, batch_size: int = None) -> Iterator[List[Document]]:
+        """
+        Carga un CSV por bloques de filas (None = un lote por bloque leído)
+
+        La codificación se detecta una sola vez con una muestra de bytes y
+        pandas lee el archivo en bloques de config.CSV_CHUNK_ROWS filas: el
+        archivo nunca está entero en memoria. Un byte no UTF-8 posterior a
+        la muestra se decodifica como latin1 en lugar de hacer fallar la
+        carga.
+
+        pandas infiere los tipos de cada bloque por separado (una columna
+        entera con una celda vacía en otro bloque sería float), así que un
+        CSV de más de un bloque se recorre dos veces: la primera solo
+        calcula los tipos del archivo entero (csv_column_dtypes) y la
+        segunda lee los bloques con esos tipos. El texto de cada fila no
+        depende así del tamaño de bloque.
+        """
+        encoding = detect_encoding(file_path)
 
-            return documents
-        except UnicodeDecodeError:
-            # Intentar con latin1 si UTF-8 falla
+        def read_chunks(**options) -> Iterator[pd.DataFrame]:
             try:
-                df = pd.read_csv(file_path, encoding='latin1')
-                documents = []
-                for idx, row in df.iterrows():
-                    content = "\n".join([f"{col}: {row[col]}" for col in df.columns if pd.notna(row[col])])
-                    doc = Document(
-                        page_content=content,
-                        metadata={"source": file_path, "row": idx, "type": "csv"}
-                    )
-                    documents.append(doc)
-                return documents
+                reader = pd.read_csv(
+                    file_path,
+                    encoding=encoding,
+                    encoding_errors=LATIN1_FALLBACK,
+                    chunksize=max(1, config.CSV_CHUNK_ROWS),
+                    **options
+                )
             except Exception as e:
                 raise ValueError(f"Error cargando CSV {file_path}: {str(e)}") from e
-        except Exception as e:
-            raise ValueError(f"Error cargando CSV {file_path}: {str(e)}") from e
+            with reader:
+                while True:
+                    try:
+                        chunk = next(reader, None)
+                    except Exception as e:
+                        raise ValueError(f"Error cargando CSV {file_path}: {str(e)}") from e
+                    if chunk is None:
+                        return
+                    yield chunk
+
+        chunks = read_chunks()
+        first, second = next(chunks, None), next(chunks, None)
+        if second is None:
+            # Un solo bloque: sus tipos ya son los del archivo entero
+            if first is not None:
+                yield from self._iter_table_documents(first, file_path, "csv", batch_size)
+            return
+
+        dtypes, object_columns = csv_column_dtypes(itertools.chain([first, second], chunks))
+        del first, second
+        for chunk in read_chunks(dtype=dtypes or None):
+            if object_columns:
+                chunk[object_columns] = chunk[object_columns].astype(object)
+            # El índice continúa entre bloques: 'row' y product_id no cambian
+            yield from self._iter_table_documents(chunk, file_path, "csv", batch_size)
+
+    def _iter_table_documents(
+        self,
+        df: pd.DataFrame,
+        file_path: str,
+        file_type: str,
+        batch_size: int = None,
+        **kwargs
+    ) -> Iterator[List[Document]]:
+        """Convierte una tabla en documentos por bloques de filas (ver _table_documents)"""
+        step = batch_size or max(len(df), 1)
+        for start in range(0, len(df), step):
+            yield self._table_documents(df.iloc[start:start + step], file_path, file_type, **kwargs)
+
+    def _table_documents(
+        self,
+        df: pd.DataFrame,
+        file_path: str,
+        file_type: str,
+        sheet: Any = None
+    ) -> List[Document]:
+        """
+        Convierte cada fila de una tabla en un documento de producto
+
+        El texto y los campos de producto se calculan columna a columna
+        (format_rows, extract_product_field_columns) y los documentos se
+        crean en bloque, sin recorrer la tabla con iterrows.
+
+        Args:
+            df: Tabla (CSV u hoja de Excel)
+            file_path: Ruta del archivo de origen
+            file_type: Tipo de documento ('csv' | 'excel')
+            sheet: Nombre de la hoja (solo Excel)
+
+        Returns:
+            Un documento por fila, en el orden de la tabla
+        """
+        columns = row_columns(df)
+        contents = format_rows(df, columns)
+        product_columns = detect_product_columns(list(df.columns))
+        positions = {column: position for position, column in enumerate(df.columns)}
+        product_fields = extract_product_field_columns(
+            {field: columns[positions[column]] for field, column in product_columns.items()},
+            len(df)
+        )
+
+        location = () if sheet is None else (sheet,)
+        head = {"source": file_path} if sheet is None else {"source": file_path, "sheet": sheet}
+        tail = {"type": file_type, "columns": list(df.columns)}  # Lista compartida por todas las filas
+
+        # model_construct evita validar cada fila: los tipos ya son los correctos
+        return [
+            Document.model_construct(
+                page_content=content,
+                metadata={
+                    **head,
+                    "row": idx,
+                    **tail,
+                    "product_id": product_id,
+                    **fields
+                }
+            )
+            for idx, content, product_id, fields in zip(
+                df.index, contents, make_product_ids(file_path, location, df.index), product_fields
+            )
+        ]
 
     def _load_json(self, file_path: str) -> List[Document]:
         """Carga archivos JSON"""
@@ -133,9 +654,12 @@ class DocumentLoader:
         if isinstance(data, list):
             for idx, item in enumerate(data):
                 content = json.dumps(item, indent=2, ensure_ascii=False)
+                metadata = {"source": file_path, "index": idx, "product_id": make_product_id(file_path, idx)}
+                if isinstance(item, dict):
+                    metadata.update(extract_product_fields(item))
                 doc = Document(
                     page_content=content,
-                    metadata={"source": file_path, "index": idx}
+                    metadata=metadata
                 )
                 documents.append(doc)
         # Si es un objeto único
@@ -143,7 +667,7 @@ class DocumentLoader:
             content = json.dumps(data, indent=2, ensure_ascii=False)
             doc = Document(
                 page_content=content,
-                metadata={"source": file_path}
+                metadata={"source": file_path, "product_id": make_product_id(file_path)}
             )
             documents.append(doc)
 
@@ -166,30 +690,13 @@ class DocumentLoader:
     def _load_excel(self, file_path: str) -> List[Document]:
         """Carga archivos Excel usando pandas (más rápido y sin dependencias extras)
         Procesa todas las hojas del archivo Excel"""
+        return [doc for batch in self._iter_excel(file_path) for doc in batch]
+
+    def _iter_excel(self, file_path: str, batch_size: int = None) -> Iterator[List[Document]]:
+        """Carga un Excel hoja a hoja (una sola en memoria) y por bloques de filas (None = cada hoja en un bloque)"""
         try:
-            # Leer todas las hojas del archivo Excel
-            # sheet_name=None devuelve un diccionario {nombre_hoja: DataFrame}
-            all_sheets = pd.read_excel(file_path, sheet_name=None, engine='openpyxl')
-            documents = []
-
-            # Procesar cada hoja
-            for sheet_name, df in all_sheets.items():
-                for idx, row in df.iterrows():
-                    # Crear contenido legible para cada fila
-                    content = "\n".join([f"{col}: {row[col]}" for col in df.columns if pd.notna(row[col])])
-                    doc = Document(
-                        page_content=content,
-                        metadata={
-                            "source": file_path,
-                            "sheet": sheet_name,
-                            "row": idx,
-                            "type": "excel",
-                            "columns": list(df.columns)
-                        }
-                    )
-                    documents.append(doc)
-
-            return documents
+            # El libro se abre en modo de solo lectura: cada hoja se lee al pedirla
+            workbook = pd.ExcelFile(file_path, engine='openpyxl')
         except ImportError as e:
             raise ImportError(
                 f"Para cargar archivos Excel, necesitas instalar openpyxl: pip install openpyxl"
@@ -197,3 +704,22 @@ class DocumentLoader:
         except Exception as e:
             raise ValueError(f"Error cargando archivo Excel {file_path}: {str(e)}") from e
 
+        with workbook:
+            for sheet_name in workbook.sheet_names:
+                try:
+                    df = workbook.parse(sheet_name)
+                except Exception as e:
+                    raise ValueError(f"Error cargando archivo Excel {file_path}: {str(e)}") from e
+                yield from self._iter_table_documents(df, file_path, "excel", batch_size, sheet=sheet_name)
+                del df  # Liberar la hoja antes de leer la siguiente
+
+
+_WORKER_LOADERS: Dict[type, DocumentLoader] = {}  # Un cargador por clase en cada proceso del pool
+
+
+def _load_in_worker(loader_class: type, file_path: str) -> Dict[str, Any]:
+    """Tarea del pool de carga: carga un archivo con un cargador de la clase indicada"""
+    loader = _WORKER_LOADERS.get(loader_class)
+    if loader is None:
+        loader = _WORKER_LOADERS[loader_class] = loader_class()
+    return loader._timed_load(file_path)
@@ -0,0 +1,201 @@
+"""
+Caché persistente de embeddings direccionada por contenido (SQLite)
+"""
+from typing import List, Optional, Dict, Any
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+from src.config import config
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza un texto antes de calcular su clave en la caché
+
+    Aplica normalización Unicode NFC y colapsa espacios en blanco, que el
+    tokenizador del modelo ignora de todos modos.
+
+    Args:
+        text: Texto del chunk
+
+    Returns:
+        Texto normalizado
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class EmbeddingCache:
+    """
+    Caché en disco de embeddings indexada por hash(modelo + texto normalizado).
+
+    Los vectores se guardan como float32 en una tabla SQLite con la fecha de
+    último uso; cuando el tamaño total supera el límite se eliminan las
+    entradas menos usadas recientemente.
+    """
+
+    def __init__(self, model_name: str, path: str = None, max_mb: float = None):
+        self.model_name = model_name
+        self.path = path or config.EMBEDDING_CACHE_PATH
+        self.max_bytes = int((max_mb if max_mb is not None else config.EMBEDDING_CACHE_MAX_MB) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    def key(self, text: str) -> str:
+        """Clave de la caché para un texto con el modelo actual"""
+        payload = f"{self.model_name}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """
+        Busca varios embeddings en la caché
+
+        Args:
+            keys: Claves calculadas con key()
+
+        Returns:
+            Lista alineada con keys con el vector o None si no está en caché
+        """
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            # SQLite limita el número de parámetros por consulta
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            hits = sum(1 for key in unique_keys if key in found)
+            self.hits += hits
+            self.misses += len(unique_keys) - hits
+
+        return [found.get(key) for key in keys]
+
+    def put_many(self, keys: List[str], vectors: List[List[float]]):
+        """
+        Guarda varios embeddings y aplica el límite de tamaño
+
+        Args:
+            keys: Claves calculadas con key()
+            vectors: Vectores alineados con keys
+        """
+        if not keys:
+            return
+
+        now = time.time()
+        rows = []
+        for key, vector in zip(keys, vectors):
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((key, blob, len(blob), now))
+
+        with self._lock:
+            existing = self._existing_sizes([row[0] for row in rows])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_used) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._total_bytes += sum(row[2] for row in rows) - sum(existing.values())
+            self._evict()
+            self._conn.commit()
+
+    def _existing_sizes(self, keys: List[str]) -> Dict[str, int]:
+        """Tamaño de las entradas que ya existen (para mantener el total)"""
+        sizes = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            sizes.update(self._conn.execute(
+                f"SELECT key, size FROM embeddings WHERE key IN ({placeholders})",
+                batch
+            ).fetchall())
+        return sizes
+
+    def _evict(self):
+        """Elimina las entradas menos usadas hasta quedar bajo el 90% del límite"""
+        if self.max_bytes <= 0 or self._total_bytes <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        cursor = self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_used ASC")
+        to_delete = []
+        freed = 0
+        for key, size in cursor:
+            if self._total_bytes - freed <= target:
+                break
+            to_delete.append((key,))
+            freed += size
+        cursor.close()
+
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", to_delete)
+        self._total_bytes -= freed
+        self.evictions += len(to_delete)
+
+    def clear(self):
+        """Vacía la caché"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de uso de la caché
+
+        Returns:
+            Diccionario con aciertos, fallos, tasa de aciertos, entradas y tamaño
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_mb": self._total_bytes / (1024 * 1024),
+            "max_mb": self.max_bytes / (1024 * 1024),
+        }
+
+    def close(self):
+        """Cierra la conexión a SQLite"""
+        with self._lock:
+            self._conn.close()
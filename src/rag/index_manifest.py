@@ -0,0 +1,175 @@
+"""
+Manifiesto del índice vectorial para re-indexación incremental
+"""
+from typing import Dict, List, Any
+from pathlib import Path
+import hashlib
+import json
+import os
+
+from src.config import config
+
+
+def file_content_hash(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    Calcula el hash SHA-256 del contenido de un archivo leyendo por bloques
+
+    Args:
+        file_path: Ruta al archivo
+        block_size: Tamaño del bloque de lectura en bytes
+
+    Returns:
+        Hash hexadecimal del contenido
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IndexManifest:
+    """
+    Registro persistente de los archivos indexados en el vectorstore.
+
+    Por cada archivo guarda tamaño, mtime, hash de contenido y los ids de
+    sus chunks, de forma que una re-indexación solo procese los archivos
+    añadidos, modificados o eliminados.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str = None):
+        self.path = path or config.INDEX_MANIFEST_PATH
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, path: str = None) -> "IndexManifest":
+        """
+        Carga el manifiesto desde disco (vacío si no existe o es inválido)
+
+        Args:
+            path: Ruta al archivo del manifiesto
+
+        Returns:
+            Manifiesto cargado
+        """
+        manifest = cls(path)
+        if not os.path.exists(manifest.path):
+            return manifest
+
+        try:
+            with open(manifest.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == cls.VERSION:
+                manifest.files = data.get("files", {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Manifiesto del índice ilegible, se ignorará: {e}")
+
+        return manifest
+
+    def exists(self) -> bool:
+        """Indica si el manifiesto está persistido en disco"""
+        return os.path.exists(self.path)
+
+    def save(self):
+        """Guarda el manifiesto de forma atómica (escribe y renombra)"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {"version": self.VERSION, "files": self.files},
+                f,
+                ensure_ascii=False,
+                indent=2
+            )
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Elimina todas las entradas y el archivo persistido"""
+        self.files = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def diff(self, file_paths: List[Path]) -> Dict[str, Any]:
+        """
+        Compara los archivos actuales con los registrados en el manifiesto.
+
+        Si tamaño y mtime coinciden el archivo se considera sin cambios sin
+        leerlo; en otro caso se compara el hash de contenido. Cada archivo se
+        lee como mucho una vez: la huella de los añadidos y modificados se
+        devuelve para registrarla con record() tras indexarlos.
+
+        Args:
+            file_paths: Archivos presentes actualmente en el directorio
+
+        Returns:
+            Diccionario con listas 'added', 'changed', 'removed' y 'unchanged',
+            'fingerprints' (ruta -> huella de los añadidos y modificados) y
+            'refreshed' (archivos sin cambios cuyo mtime se actualizó)
+        """
+        result = {"added": [], "changed": [], "removed": [], "unchanged": [], "fingerprints": {}, "refreshed": []}
+        current = {str(path): path for path in file_paths}
+
+        for key, path in current.items():
+            entry = self.files.get(key)
+            stat = path.stat()
+            if entry is not None and stat.st_size == entry["size"] and stat.st_mtime == entry["mtime"]:
+                result["unchanged"].append(key)
+                continue
+
+            # Tamaño y mtime tomados antes de leer: un cambio posterior se detecta en la próxima sincronización
+            fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": file_content_hash(key)}
+            if entry is None:
+                result["added"].append(key)
+                result["fingerprints"][key] = fingerprint
+            elif fingerprint["hash"] == entry["hash"]:
+                # Contenido idéntico (p.ej. archivo copiado de nuevo): solo refrescar mtime
+                entry.update(size=fingerprint["size"], mtime=fingerprint["mtime"])
+                result["unchanged"].append(key)
+                result["refreshed"].append(key)
+            else:
+                result["changed"].append(key)
+                result["fingerprints"][key] = fingerprint
+
+        result["removed"] = [key for key in self.files if key not in current]
+
+        return result
+
+    def record(self, file_path: str, chunk_ids: List[str], fingerprint: Dict[str, Any] = None):
+        """
+        Registra (o actualiza) un archivo indexado
+
+        Args:
+            file_path: Ruta al archivo
+            chunk_ids: Ids de los chunks almacenados en el vectorstore
+            fingerprint: Huella calculada por diff() antes de leer el archivo;
+                si falta se calcula ahora
+        """
+        if fingerprint is None:
+            stat = os.stat(file_path)
+            fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": file_content_hash(file_path)}
+        self.files[file_path] = {
+            "size": fingerprint["size"],
+            "mtime": fingerprint["mtime"],
+            "hash": fingerprint["hash"],
+            "chunk_ids": chunk_ids,
+        }
+
+    def forget(self, file_path: str) -> List[str]:
+        """
+        Elimina un archivo del manifiesto
+
+        Args:
+            file_path: Ruta al archivo
+
+        Returns:
+            Ids de los chunks que tenía asociados
+        """
+        entry = self.files.pop(file_path, None)
+        return entry["chunk_ids"] if entry else []
+
+    def chunk_ids(self, file_path: str) -> List[str]:
+        """Devuelve los ids de chunks registrados para un archivo"""
+        entry = self.files.get(file_path)
+        return list(entry["chunk_ids"]) if entry else []
@@ -0,0 +1,114 @@
+"""
+Métricas del índice vectorial: latencias de búsqueda y tamaño en disco
+"""
+from typing import Dict, Any, Optional
+from collections import deque
+import os
+import threading
+
+import numpy as np
+
+from src.config import config
+
+
+def directory_size(path: str) -> int:
+    """
+    Tamaño en disco de un directorio (recursivo)
+
+    Args:
+        path: Directorio a medir
+
+    Returns:
+        Bytes ocupados por sus archivos (0 si no existe)
+    """
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # Archivo borrado mientras se recorría
+    return total
+
+
+class LatencyRecorder:
+    """
+    Latencias de las búsquedas recientes, separadas en tiempo de embedding
+    de la consulta y tiempo de consulta al índice.
+
+    Guarda una ventana deslizante con las últimas 'window' búsquedas
+    resueltas (las que salen de la caché de búsquedas no se registran).
+    """
+
+    HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = max(1, config.LATENCY_WINDOW if window is None else window)
+        self.total_searches = 0
+        self._samples = deque(maxlen=self.window)  # (embed_ms, index_ms)
+        self._lock = threading.Lock()
+
+    def record(self, embed_seconds: float, index_seconds: float, queries: int = 1):
+        """
+        Registra una búsqueda (o un lote de búsquedas)
+
+        Args:
+            embed_seconds: Tiempo de embedding de las consultas
+            index_seconds: Tiempo de consulta al índice (y fusión/re-ranking)
+            queries: Consultas resueltas; en un lote el tiempo se reparte
+                entre ellas y se registra una muestra por consulta
+        """
+        if queries <= 0:
+            return
+        sample = (embed_seconds * 1000 / queries, index_seconds * 1000 / queries)
+        with self._lock:
+            self._samples.extend([sample] * min(queries, self.window))
+            self.total_searches += queries
+
+    def reset(self):
+        """Descarta las muestras registradas"""
+        with self._lock:
+            self._samples.clear()
+            self.total_searches = 0
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Percentiles e histogramas de la ventana actual
+
+        Returns:
+            Diccionario con 'samples', 'total_searches' y, para 'embed',
+            'index' y 'total', p50/p95/p99/media/máximo en ms y un histograma
+        """
+        with self._lock:
+            samples = np.array(self._samples, dtype=np.float64).reshape(-1, 2)
+            total_searches = self.total_searches
+
+        return {
+            "samples": len(samples),
+            "total_searches": total_searches,
+            "embed": self._describe(samples[:, 0]),
+            "index": self._describe(samples[:, 1]),
+            "total": self._describe(samples.sum(axis=1)),
+        }
+
+    @classmethod
+    def _describe(cls, values: np.ndarray) -> Dict[str, Any]:
+        """Percentiles e histograma de una serie de latencias en ms"""
+        if not values.size:
+            return {}
+
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        edges = (0.0, *cls.HISTOGRAM_BOUNDS_MS, np.inf)
+        counts, _ = np.histogram(values, bins=edges)
+        labels = [
+            f"<{high}ms" if low == 0 else (f">={low}ms" if high == np.inf else f"{low}-{high}ms")
+            for low, high in zip(edges[:-1], edges[1:])
+        ]
+        return {
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "mean_ms": float(values.mean()),
+            "max_ms": float(values.max()),
+            "histogram": {label: int(count) for label, count in zip(labels, counts)},
+        }
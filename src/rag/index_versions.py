@@ -0,0 +1,276 @@
+"""
+Versiones del índice vectorial: construir aparte y publicar con un puntero atómico
+"""
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+import json
+import os
+import shutil
+
+from src.config import config
+from src.rag.snapshot import SNAPSHOT_DIR
+
+FICLONE = 0x40049409  # ioctl de Linux para clonar un archivo con copy-on-write (btrfs, XFS...)
+
+
+def link_file(src: str, dst: str):
+    """
+    Comparte un archivo entre versiones con un hardlink (copia si no se puede)
+
+    Args:
+        src: Archivo existente
+        dst: Ruta nueva
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def clone_file(src: str, dst: str):
+    """
+    Copia un archivo con copy-on-write si el sistema de archivos lo permite
+
+    Args:
+        src: Archivo existente
+        dst: Ruta de la copia
+    """
+    try:
+        import fcntl
+        with open(src, 'rb') as source, open(dst, 'wb') as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        shutil.copystat(src, dst)
+        return
+    except (ImportError, OSError):
+        pass
+    shutil.copy2(src, dst)
+
+
+class IndexVersions:
+    """
+    Directorios versionados de un índice vectorial.
+
+    Cada construcción escribe en 'versions/<versión>' y solo se publica al
+    terminar, reemplazando de forma atómica el archivo puntero 'CURRENT'.
+    Los lectores abren siempre la versión del puntero, así que nunca ven un
+    índice a medio escribir; las versiones anteriores se conservan para
+    poder volver a ellas al instante.
+
+    Un índice anterior al versionado (archivos directamente en la raíz) se
+    trata como versión 'legacy' mientras no se publique ninguna otra.
+    """
+
+    POINTER_FILE = "CURRENT"
+    VERSIONS_DIR = "versions"
+    INFO_FILE = "version.json"
+    LEGACY = "legacy"
+    CHROMA_DB_FILE = "chroma.sqlite3"  # Marca un directorio de Chroma (archivos modificados en su sitio)
+
+    def __init__(self, root: str = None):
+        self.root = root or config.vector_index_dir()
+        self.versions_dir = os.path.join(self.root, self.VERSIONS_DIR)
+        self.pointer_path = os.path.join(self.root, self.POINTER_FILE)
+
+    def current(self) -> Optional[str]:
+        """
+        Versión publicada
+
+        Returns:
+            Nombre de la versión, 'legacy' para un índice sin versionar o None
+        """
+        try:
+            with open(self.pointer_path, 'r', encoding='utf-8') as f:
+                version = f.read().strip()
+            if version and os.path.isdir(self.version_dir(version)):
+                return version
+        except OSError:
+            pass
+        return self.LEGACY if self._legacy_entries() else None
+
+    def current_dir(self) -> Optional[str]:
+        """Directorio de la versión publicada (None si no hay índice)"""
+        version = self.current()
+        return self.version_dir(version) if version else None
+
+    def version_dir(self, version: str) -> str:
+        """Directorio de una versión"""
+        if version == self.LEGACY:
+            return self.root
+        return os.path.join(self.versions_dir, version)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        Versiones completas, de la más reciente a la más antigua
+
+        Returns:
+            Lista de diccionarios con 'version', 'current' y la información
+            guardada al publicarla
+        """
+        current = self.current()
+        versions = []
+        if os.path.isdir(self.versions_dir):
+            for name in sorted(os.listdir(self.versions_dir), reverse=True):
+                info = self.read_info(name)
+                if info is not None:
+                    versions.append({**info, "version": name, "current": name == current})
+        if self._legacy_entries():
+            versions.append({"version": self.LEGACY, "current": current == self.LEGACY})
+        return versions
+
+    def read_info(self, version: str) -> Optional[Dict[str, Any]]:
+        """Información de una versión (None si no terminó de construirse)"""
+        try:
+            with open(os.path.join(self.versions_dir, version, self.INFO_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def create(self, base: Optional[str] = None) -> str:
+        """
+        Crea el directorio de una versión nueva (aún sin publicar)
+
+        Partir de una versión base no copia sus datos: los archivos se
+        enlazan (hardlink) porque el índice NumPy, el léxico, la
+        cuantización y el manifiesto siempre se reescriben con un archivo
+        nuevo y un rename, sin tocar el que comparten ambas versiones. Los de
+        Chroma, que SQLite y HNSW modifican en su sitio, se clonan con
+        copy-on-write si el sistema de archivos lo permite y si no se copian.
+
+        Args:
+            base: Versión de la que se parte (re-indexación incremental);
+                None para empezar vacía
+
+        Returns:
+            Nombre de la versión nueva
+        """
+        os.makedirs(self.versions_dir, exist_ok=True)
+        version = datetime.now().strftime("v%Y%m%d-%H%M%S-%f")
+        target = self.version_dir(version)
+
+        if base:
+            base_dir = self.version_dir(base)
+            # El snapshot describe la versión base: la nueva escribe el suyo al publicarse
+            ignore = shutil.ignore_patterns(
+                self.VERSIONS_DIR, self.POINTER_FILE, self.INFO_FILE, SNAPSHOT_DIR, "*.tmp"
+            )
+            chroma_dirs = [
+                dirpath for dirpath, _, filenames in os.walk(base_dir) if self.CHROMA_DB_FILE in filenames
+            ]
+
+            def share(src: str, dst: str):
+                if any(os.path.commonpath([src, chroma_dir]) == chroma_dir for chroma_dir in chroma_dirs):
+                    clone_file(src, dst)
+                else:
+                    link_file(src, dst)
+
+            shutil.copytree(base_dir, target, ignore=ignore, copy_function=share)
+        else:
+            os.makedirs(target)
+        return version
+
+    def publish(self, version: str, info: Dict[str, Any] = None):
+        """
+        Marca una versión como completa y la publica (reemplazo atómico del puntero)
+
+        Args:
+            version: Versión construida
+            info: Información a guardar con la versión (estadísticas, duración...)
+        """
+        info_path = os.path.join(self.version_dir(version), self.INFO_FILE)
+        with open(f"{info_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump({"created_at": datetime.now().isoformat(), **(info or {})}, f, indent=2, ensure_ascii=False)
+        os.replace(f"{info_path}.tmp", info_path)
+        self.activate(version)
+
+    def activate(self, version: str):
+        """
+        Apunta el índice publicado a una versión completa existente
+
+        Args:
+            version: Versión a publicar
+        """
+        if version != self.LEGACY and self.read_info(version) is None:
+            raise ValueError(f"La versión {version} no existe o está incompleta")
+
+        with open(f"{self.pointer_path}.tmp", 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(f"{self.pointer_path}.tmp", self.pointer_path)
+        print(f"📌 Índice publicado: versión {version}")
+
+    def rollback(self, version: str = None) -> str:
+        """
+        Vuelve a una versión anterior
+
+        Args:
+            version: Versión destino (por defecto la anterior a la publicada)
+
+        Returns:
+            Versión publicada
+        """
+        if version is None:
+            names = [item["version"] for item in self.list()]
+            current = self.current()
+            position = names.index(current) if current in names else -1
+            if position < 0 or position + 1 >= len(names):
+                raise ValueError("No hay una versión anterior a la que volver")
+            version = names[position + 1]
+
+        self.activate(version)
+        return version
+
+    def discard(self, version: str):
+        """Elimina una versión sin publicar (construcción fallida)"""
+        if version != self.LEGACY and version != self.current():
+            shutil.rmtree(self.version_dir(version), ignore_errors=True)
+
+    def prune(self, keep: int = None) -> List[str]:
+        """
+        Elimina versiones completas anteriores a la publicada, salvo las 'keep' más recientes
+
+        Solo se eliminan versiones terminadas (con su archivo de información)
+        y más antiguas que la publicada: un directorio sin ese archivo puede
+        ser una construcción en curso de otro proceso, y las versiones más
+        nuevas que la publicada quedan tras un rollback. Las construcciones
+        fallidas las elimina quien las creó (discard).
+
+        Args:
+            keep: Versiones anteriores a conservar (por defecto config.INDEX_RETENTION)
+
+        Returns:
+            Versiones eliminadas
+        """
+        keep = config.INDEX_RETENTION if keep is None else keep
+        names = [item["version"] for item in self.list()]
+        current = self.current()
+        if current not in names:
+            return []
+        # list() ordena de la más reciente a la más antigua, con 'legacy' al final
+        expired = names[names.index(current) + 1:][keep:]
+
+        removed = []
+        for name in expired:
+            if name != self.LEGACY:
+                shutil.rmtree(self.version_dir(name), ignore_errors=True)
+                removed.append(name)
+
+        if self.LEGACY in expired:
+            for entry in self._legacy_entries():
+                path = os.path.join(self.root, entry)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+            removed.append(self.LEGACY)
+
+        if removed:
+            print(f"🧹 Versiones del índice eliminadas: {', '.join(sorted(removed))}")
+        return removed
+
+    def _legacy_entries(self) -> List[str]:
+        """Archivos de un índice sin versionar guardados directamente en la raíz"""
+        if not os.path.isdir(self.root):
+            return []
+        return [
+            entry for entry in os.listdir(self.root)
+            if entry not in (self.VERSIONS_DIR, self.POINTER_FILE, f"{self.POINTER_FILE}.tmp")
+        ]
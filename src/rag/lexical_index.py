@@ -0,0 +1,306 @@
+"""
+Índice invertido BM25 para búsqueda léxica e híbrida
+"""
+from typing import List, Optional, Dict, Tuple, Iterable
+import json
+import math
+import os
+import re
+import unicodedata
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Divide un texto en tokens para el índice léxico
+
+    Pasa a minúsculas y elimina tildes, y conserva juntos los tokens
+    alfanuméricos como '16gb', 'i7' o '15.6', que son los que la búsqueda
+    densa suele ordenar peor.
+
+    Args:
+        text: Texto a tokenizar
+
+    Returns:
+        Lista de tokens
+    """
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return TOKEN_PATTERN.findall(folded)
+
+
+class BM25Index:
+    """
+    Índice invertido con estadísticas BM25.
+
+    Se mantiene en forma mutable (term -> {doc: tf}) durante la indexación y
+    se compila a arrays contiguos (formato CSR) para consultar: cada término
+    de la consulta se puntúa de forma vectorizada sobre su lista de postings.
+    """
+
+    FILE_NAME = "bm25.npz"
+    META_FILE = "bm25.json"
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[Optional[str]] = []  # None = documento eliminado
+        self.doc_len: List[int] = []
+        self._positions: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._compiled: Optional[Dict[str, object]] = None
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def add(self, ids: List[str], texts: List[str]):
+        """
+        Indexa (o re-indexa) documentos
+
+        Args:
+            ids: Ids de los chunks
+            texts: Textos alineados con ids
+        """
+        self._ensure_mutable()
+        self.remove([chunk_id for chunk_id in ids if chunk_id in self._positions])
+
+        for chunk_id, text in zip(ids, texts):
+            tokens = tokenize(text)
+            doc = len(self.ids)
+            self.ids.append(chunk_id)
+            self.doc_len.append(len(tokens))
+            self._positions[chunk_id] = doc
+
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                self._postings.setdefault(token, {})[doc] = tf
+
+        self._compiled = None
+
+    def remove(self, ids: Iterable[str]):
+        """
+        Elimina documentos del índice
+
+        Args:
+            ids: Ids de los chunks a eliminar
+        """
+        docs = {self._positions.pop(chunk_id) for chunk_id in ids if chunk_id in self._positions}
+        if not docs:
+            return
+
+        self._ensure_mutable()
+        for doc in docs:
+            self.ids[doc] = None
+            self.doc_len[doc] = 0
+        # Coste acotado por el tamaño total de los postings, no por vocabulario x borrados
+        for token in list(self._postings):
+            postings = self._postings[token]
+            if len(postings) < len(docs):
+                stale = [doc for doc in postings if doc in docs]
+            else:
+                stale = [doc for doc in docs if doc in postings]
+            for doc in stale:
+                del postings[doc]
+            if not postings:
+                del self._postings[token]
+
+        self._compiled = None
+
+    def clear(self):
+        """Vacía el índice"""
+        self.ids, self.doc_len = [], []
+        self._positions, self._postings = {}, {}
+        self._compiled = None
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Busca los k documentos con mayor puntuación BM25
+
+        Args:
+            query: Consulta en texto libre
+            k: Número de resultados
+
+        Returns:
+            Lista de tuplas (id del chunk, score BM25) de mayor a menor
+        """
+        compiled = self._compile()
+        terms = compiled["terms"]
+        num_docs = len(self._positions)
+        if num_docs == 0:
+            return []
+
+        doc_len = compiled["doc_len"]
+        avg_len = compiled["avg_len"] or 1.0
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+
+        for token in set(tokenize(query)):
+            term = terms.get(token)
+            if term is None:
+                continue
+            start, end = term
+            docs = compiled["docs"][start:end]
+            tf = compiled["tfs"][start:end]
+            df = end - start
+            idf = math.log(1.0 + (num_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * doc_len[docs] / avg_len)
+            scores[docs] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        matched = np.flatnonzero(scores)
+        if matched.size == 0:
+            return []
+
+        k = min(k, matched.size)
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.ids[doc], float(scores[doc])) for doc in top]
+
+    def _compile(self) -> Dict[str, object]:
+        """Convierte los postings mutables a arrays contiguos para consultar"""
+        if self._compiled is not None:
+            return self._compiled
+
+        terms: Dict[str, Tuple[int, int]] = {}
+        docs_parts, tfs_parts = [], []
+        offset = 0
+        for token, postings in self._postings.items():
+            terms[token] = (offset, offset + len(postings))
+            docs_parts.append(np.fromiter(postings.keys(), dtype=np.int32, count=len(postings)))
+            tfs_parts.append(np.fromiter(postings.values(), dtype=np.float32, count=len(postings)))
+            offset += len(postings)
+
+        doc_len = np.asarray(self.doc_len, dtype=np.float32)
+        live = len(self._positions)
+        self._compiled = {
+            "terms": terms,
+            "docs": np.concatenate(docs_parts) if docs_parts else np.empty(0, dtype=np.int32),
+            "tfs": np.concatenate(tfs_parts) if tfs_parts else np.empty(0, dtype=np.float32),
+            "doc_len": doc_len,
+            "avg_len": float(doc_len.sum() / live) if live else 0.0,
+        }
+        return self._compiled
+
+    def _ensure_mutable(self):
+        """Reconstruye los postings mutables a partir de la forma compilada"""
+        if self._postings or self._compiled is None:
+            return
+
+        compiled = self._compiled
+        for token, (start, end) in compiled["terms"].items():
+            self._postings[token] = dict(zip(
+                compiled["docs"][start:end].tolist(),
+                compiled["tfs"][start:end].astype(int).tolist()
+            ))
+
+    def save(self, directory: str):
+        """
+        Guarda el índice compilado (escribe y renombra)
+
+        Los documentos eliminados se compactan antes de guardar.
+
+        Args:
+            directory: Directorio de destino
+        """
+        if len(self._positions) != len(self.ids):
+            self._compact()
+
+        compiled = self._compile()
+        os.makedirs(directory, exist_ok=True)
+        arrays_path = os.path.join(directory, self.FILE_NAME)
+        meta_path = os.path.join(directory, self.META_FILE)
+
+        terms = list(compiled["terms"].keys())
+        bounds = np.asarray([compiled["terms"][t] for t in terms], dtype=np.int64).reshape(-1, 2)
+        with open(f"{arrays_path}.tmp", 'wb') as f:
+            np.savez(f, docs=compiled["docs"], tfs=compiled["tfs"], doc_len=compiled["doc_len"], bounds=bounds)
+        with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(
+                {"k1": self.k1, "b": self.b, "ids": self.ids, "terms": terms},
+                f,
+                ensure_ascii=False,
+                separators=(',', ':')
+            )
+
+        os.replace(f"{arrays_path}.tmp", arrays_path)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["BM25Index"]:
+        """
+        Carga un índice guardado
+
+        Args:
+            directory: Directorio del índice
+
+        Returns:
+            Índice cargado o None si no existe
+        """
+        arrays_path = os.path.join(directory, cls.FILE_NAME)
+        meta_path = os.path.join(directory, cls.META_FILE)
+        if not (os.path.exists(arrays_path) and os.path.exists(meta_path)):
+            return None
+
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = np.load(arrays_path)
+
+        index = cls(k1=meta["k1"], b=meta["b"])
+        index.ids = meta["ids"]
+        index.doc_len = arrays["doc_len"].astype(int).tolist()
+        index._positions = {chunk_id: doc for doc, chunk_id in enumerate(index.ids) if chunk_id is not None}
+
+        doc_len = arrays["doc_len"]
+        live = len(index._positions)
+        index._compiled = {
+            "terms": {token: (int(start), int(end)) for token, (start, end) in zip(meta["terms"], arrays["bounds"])},
+            "docs": arrays["docs"],
+            "tfs": arrays["tfs"],
+            "doc_len": doc_len,
+            "avg_len": float(doc_len.sum() / live) if live else 0.0,
+        }
+        return index
+
+    def _compact(self):
+        """Renumera los documentos eliminando los huecos de los borrados"""
+        self._ensure_mutable()
+        remap = {}
+        ids, doc_len = [], []
+        for doc, chunk_id in enumerate(self.ids):
+            if chunk_id is None:
+                continue
+            remap[doc] = len(ids)
+            ids.append(chunk_id)
+            doc_len.append(self.doc_len[doc])
+
+        self._postings = {
+            token: {remap[doc]: tf for doc, tf in postings.items()}
+            for token, postings in self._postings.items()
+        }
+        self.ids, self.doc_len = ids, doc_len
+        self._positions = {chunk_id: doc for doc, chunk_id in enumerate(ids)}
+        self._compiled = None
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fusiona varias listas ordenadas con Reciprocal Rank Fusion
+
+    Cada id suma 1 / (k + posición) por cada lista en la que aparece.
+
+    Args:
+        rankings: Listas de ids ordenadas de más a menos relevante
+        k: Constante de suavizado de RRF
+
+    Returns:
+        Lista de tuplas (id, score RRF) de mayor a menor
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, 1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
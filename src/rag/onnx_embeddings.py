@@ -0,0 +1,280 @@
+"""
+Embeddings con ONNX Runtime (CPU) para el modelo de sentence-transformers
+"""
+from typing import List, Dict, Any, Optional
+import json
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.config import config
+
+# Dependencias opcionales
+try:
+    import onnxruntime as ort
+    ONNX_SUPPORT = True
+except ImportError:
+    ONNX_SUPPORT = False
+
+CONFIG_FILE = "onnx_config.json"
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+POOLING_MODES = ("mean", "cls", "max")
+
+
+def onnx_model_dir(model_name: str, cache_folder: str = None) -> str:
+    """
+    Directorio donde se guarda el modelo exportado a ONNX
+
+    Args:
+        model_name: Nombre del modelo de sentence-transformers
+        cache_folder: Carpeta de caché de modelos (por defecto config.MODEL_CACHE_DIR)
+
+    Returns:
+        Ruta del directorio del modelo ONNX
+    """
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+    return os.path.join(cache_folder or config.MODEL_CACHE_DIR, "onnx", slug)
+
+
+def export_onnx_model(model_name: str, output_dir: str, cache_folder: str = None) -> Dict[str, Any]:
+    """
+    Exporta el transformer de un modelo de sentence-transformers a ONNX
+
+    Se exporta solo el encoder (salida last_hidden_state); el pooling y la
+    normalización se aplican con NumPy, con la misma configuración que el
+    modelo original. Se escribe en un directorio temporal que se renombra
+    al terminar, de modo que una exportación interrumpida no deja un modelo
+    a medias.
+
+    Args:
+        model_name: Nombre del modelo de sentence-transformers
+        output_dir: Directorio de destino
+        cache_folder: Carpeta de caché de HuggingFace
+
+    Returns:
+        Configuración del modelo exportado
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    print(f"📦 Exportando {model_name} a ONNX...")
+    start = time.time()
+    model = SentenceTransformer(model_name, device='cpu', cache_folder=cache_folder or config.MODEL_CACHE_DIR)
+    modules = [type(module).__name__ for module in model]
+    if modules[:2] != ["Transformer", "Pooling"] or any(name != "Normalize" for name in modules[2:]):
+        raise ValueError(f"Arquitectura no soportada para ONNX: {' -> '.join(modules)}")
+    transformer, pooling = model[0], model[1]
+
+    pooling_mode = getattr(pooling, "pooling_mode", None)
+    if pooling_mode is None and hasattr(pooling, "get_pooling_mode_str"):
+        pooling_mode = pooling.get_pooling_mode_str()
+    if pooling_mode not in POOLING_MODES:
+        raise ValueError(f"Pooling no soportado para ONNX: {pooling_mode}")
+
+    tokenizer = transformer.tokenizer
+    encoder = transformer.auto_model.eval()
+    sample = tokenizer(
+        ["texto de ejemplo para exportar", "otro texto"],
+        padding=True,
+        truncation=True,
+        max_length=model.max_seq_length,
+        return_tensors="pt"
+    )
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class _Encoder(torch.nn.Module):
+        """Envuelve el encoder para exportar solo last_hidden_state"""
+
+        def __init__(self, encoder):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, *inputs):
+            return self.encoder(**dict(zip(input_names, inputs)))[0]
+
+    tmp_dir = f"{output_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(encoder),
+            tuple(sample[name] for name in input_names),
+            os.path.join(tmp_dir, MODEL_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+            dynamo=False
+        )
+
+    tokenizer.save_pretrained(tmp_dir)
+    onnx_config = {
+        "model_name": model_name,
+        "max_seq_length": int(model.max_seq_length),
+        "pooling": pooling_mode,
+        "dimension": int(encoder.config.hidden_size),
+        "input_names": input_names,
+    }
+    with open(os.path.join(tmp_dir, CONFIG_FILE), 'w', encoding='utf-8') as f:
+        json.dump(onnx_config, f, indent=2)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    print(f"✓ Modelo ONNX exportado en {time.time() - start:.1f}s ({output_dir})")
+    return onnx_config
+
+
+def quantize_onnx_model(model_dir: str) -> str:
+    """
+    Cuantiza dinámicamente (pesos int8) el modelo ONNX exportado
+
+    Args:
+        model_dir: Directorio del modelo exportado
+
+    Returns:
+        Ruta del modelo cuantizado
+    """
+    try:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+    except ImportError as e:
+        raise ImportError(
+            "Para cuantizar el modelo ONNX, necesitas instalar: pip install onnxruntime onnx"
+        ) from e
+
+    source = os.path.join(model_dir, MODEL_FILE)
+    target = os.path.join(model_dir, QUANTIZED_MODEL_FILE)
+    print("🗜️  Cuantizando modelo ONNX a int8...")
+    quantize_dynamic(source, f"{target}.tmp", weight_type=QuantType.QInt8)
+    os.replace(f"{target}.tmp", target)
+    return target
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Embeddings de sentence-transformers ejecutados con ONNX Runtime.
+
+    La primera vez exporta el modelo a ONNX (y opcionalmente lo cuantiza a
+    int8) dentro de la caché de modelos; después solo carga el modelo
+    exportado, sin necesidad de inicializar PyTorch.
+    """
+
+    def __init__(
+        self,
+        model_name: str = None,
+        quantize: bool = None,
+        cache_folder: str = None,
+        batch_size: int = 32,
+        threads: int = None
+    ):
+        if not ONNX_SUPPORT:
+            raise ImportError(
+                "Para usar EMBEDDING_BACKEND=onnx, necesitas instalar: pip install onnxruntime onnx"
+            )
+
+        self.model_name = model_name or config.EMBEDDING_MODEL
+        self.quantize = config.EMBEDDING_ONNX_QUANTIZE if quantize is None else quantize
+        self.batch_size = batch_size
+        self.model_dir = onnx_model_dir(self.model_name, cache_folder)
+
+        config_path = os.path.join(self.model_dir, CONFIG_FILE)
+        if os.path.exists(config_path):
+            with open(config_path, 'r', encoding='utf-8') as f:
+                self.onnx_config = json.load(f)
+        else:
+            self.onnx_config = export_onnx_model(self.model_name, self.model_dir, cache_folder)
+
+        model_path = os.path.join(self.model_dir, MODEL_FILE)
+        if self.quantize:
+            model_path = os.path.join(self.model_dir, QUANTIZED_MODEL_FILE)
+            if not os.path.exists(model_path):
+                quantize_onnx_model(self.model_dir)
+
+        from transformers import AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+
+        options = ort.SessionOptions()
+        threads = config.EMBED_THREADS if threads is None else threads
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {node.name for node in self.session.get_inputs()}
+
+    @property
+    def model_id(self) -> str:
+        """Identificador de los vectores producidos (para cachés de embeddings)"""
+        # El modelo int8 produce vectores ligeramente distintos a los de float32
+        return f"{self.model_name}@onnx-int8" if self.quantize else self.model_name
+
+    @property
+    def dimension(self) -> int:
+        return self.onnx_config["dimension"]
+
+    @property
+    def max_seq_length(self) -> int:
+        """Máximo de tokens por texto (los textos más largos se truncan)"""
+        return self.onnx_config["max_seq_length"]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Calcula embeddings normalizados
+
+        Los saltos de línea se sustituyen por espacios, igual que hace
+        HuggingFaceEmbeddings, para que ambos backends produzcan los mismos
+        vectores. Los textos se agrupan por longitud para minimizar el
+        padding de cada lote, y se devuelven en el orden original.
+
+        Args:
+            texts: Textos a embeber
+
+        Returns:
+            Matriz float32 (len(texts), dimensión)
+        """
+        texts = [text.replace("\n", " ") for text in texts]
+        output = np.empty((len(texts), self.dimension), dtype=np.float32)
+        order = np.argsort([len(text) for text in texts], kind='stable')
+
+        for start in range(0, len(texts), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            feed = {
+                name: np.asarray(values, dtype=np.int64)
+                for name, values in encoded.items()
+                if name in self._input_names
+            }
+            hidden = self.session.run(None, feed)[0]
+            output[batch] = self._pool(hidden, encoded["attention_mask"])
+
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return output / np.maximum(norms, 1e-12)
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Aplica el pooling del modelo original sobre last_hidden_state"""
+        pooling = self.onnx_config["pooling"]
+        if pooling == "cls":
+            return hidden[:, 0]
+
+        mask = attention_mask[..., None].astype(np.float32)
+        if pooling == "max":
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
@@ -0,0 +1,282 @@
+"""
+Extracción de campos tipados de producto (precio, categoría, marca) y filtros
+"""
+from typing import Dict, Any, List, Optional, Sequence, Iterable
+import hashlib
+import math
+import re
+import unicodedata
+
+# Palabras que identifican cada campo en los nombres de columna/clave
+PRICE_KEYS = ("precio", "price", "pvp", "costo", "coste", "cost", "valor", "importe")
+CATEGORY_KEYS = ("categoria", "category", "tipo", "familia", "linea", "subcategoria")
+BRAND_KEYS = ("marca", "brand", "fabricante", "manufacturer")
+
+
+def normalize_label(text: Any) -> str:
+    """
+    Normaliza un texto para comparar categorías y marcas
+
+    Args:
+        text: Valor original
+
+    Returns:
+        Texto en minúsculas, sin tildes ni espacios sobrantes
+    """
+    folded = unicodedata.normalize("NFKD", str(text).lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return re.sub(r"\s+", " ", folded).strip()
+
+
+def make_product_id(source: str, *location: Any) -> str:
+    """
+    Id estable de un producto a partir de su origen
+
+    Args:
+        source: Ruta del archivo de origen
+        location: Posición dentro del archivo (hoja, fila, índice, página...)
+
+    Returns:
+        Id hexadecimal de 16 caracteres
+    """
+    key = "|".join([str(source)] + [str(part) for part in location])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def make_product_ids(source: str, location: Sequence[Any], rows: Iterable[Any]) -> List[str]:
+    """
+    Ids de producto de muchas filas de una misma tabla
+
+    Equivale a make_product_id(source, *location, row) para cada fila,
+    calculando el prefijo común una sola vez.
+
+    Args:
+        source: Ruta del archivo de origen
+        location: Posición común a todas las filas (p. ej. la hoja)
+        rows: Índice de cada fila
+
+    Returns:
+        Un id por fila
+    """
+    prefix = "|".join([str(source)] + [str(part) for part in location] + [""])
+    return [hashlib.sha1(f"{prefix}{row}".encode("utf-8")).hexdigest()[:16] for row in rows]
+
+
+def product_key(metadata: Dict[str, Any], fallback: Any = None) -> Any:
+    """
+    Clave para agrupar los chunks de un mismo producto
+
+    Usa 'product_id' y, en índices creados antes de que existiera, la
+    combinación de origen y posición disponible en la metadata.
+
+    Args:
+        metadata: Metadata del chunk
+        fallback: Valor si no hay forma de identificar el producto (id del chunk)
+
+    Returns:
+        Clave del producto
+    """
+    if metadata.get("product_id"):
+        return metadata["product_id"]
+    location = tuple(
+        metadata.get(field) for field in ("sheet", "row", "index", "page") if field in metadata
+    )
+    if location and metadata.get("source"):
+        return make_product_id(metadata["source"], *location)
+    return fallback
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """
+    Convierte un precio a float
+
+    Acepta números y textos como '$1.299,00', '1,299.99' o 'USD 999'.
+    El último separador seguido de 1-2 dígitos se interpreta como decimal;
+    el resto, como separador de miles.
+
+    Args:
+        value: Valor de la celda o campo
+
+    Returns:
+        Precio o None si no se puede interpretar
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return None if math.isnan(value) else float(value)
+
+    text = re.sub(r"[^\d.,]", "", str(value))
+    if not re.search(r"\d", text):
+        return None
+
+    last_sep = max(text.rfind("."), text.rfind(","))
+    if last_sep != -1 and 1 <= len(text) - last_sep - 1 <= 2:
+        integer = re.sub(r"[.,]", "", text[:last_sep])
+        decimals = text[last_sep + 1:]
+        text = f"{integer or '0'}.{decimals}"
+    else:
+        text = re.sub(r"[.,]", "", text)
+
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _match_key(keys: List[str], candidates: tuple) -> Optional[str]:
+    """Primera clave cuyo nombre normalizado contiene alguna palabra candidata"""
+    for key in keys:
+        words = re.split(r"[^a-z0-9]+", normalize_label(key))
+        if any(word in candidates for word in words):
+            return key
+    return None
+
+
+def detect_product_columns(columns: List[Any]) -> Dict[str, Any]:
+    """
+    Detecta qué columnas contienen precio, categoría y marca
+
+    Args:
+        columns: Nombres de columna (o claves de un objeto JSON)
+
+    Returns:
+        Diccionario {'price' | 'category' | 'brand': columna} con las detectadas
+    """
+    keys = [str(column) for column in columns]
+    detected = {}
+    for field, candidates in (("price", PRICE_KEYS), ("category", CATEGORY_KEYS), ("brand", BRAND_KEYS)):
+        key = _match_key(keys, candidates)
+        if key is not None:
+            detected[field] = columns[keys.index(key)]
+    return detected
+
+
+def extract_product_fields(record: Dict[Any, Any], columns: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Extrae los campos tipados de una fila o producto
+
+    Args:
+        record: Fila (columna -> valor) o producto JSON
+        columns: Columnas ya detectadas con detect_product_columns (opcional)
+
+    Returns:
+        Metadata con 'price' (float), 'category' y 'brand' (normalizados)
+        para los campos presentes
+    """
+    columns = columns if columns is not None else detect_product_columns(list(record.keys()))
+    fields = {}
+
+    if "price" in columns:
+        price = parse_price(record.get(columns["price"]))
+        if price is not None:
+            fields["price"] = price
+
+    for field in ("category", "brand"):
+        if field not in columns:
+            continue
+        value = record.get(columns[field])
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            continue
+        label = normalize_label(value)
+        if label:
+            fields[field] = label
+
+    return fields
+
+
+def extract_product_field_columns(values: Dict[str, Sequence[Any]], count: int) -> List[Dict[str, Any]]:
+    """
+    Extrae los campos tipados de una tabla columna a columna
+
+    Equivale a llamar a extract_product_fields fila a fila, pero cada valor
+    distinto de una columna se interpreta una sola vez (en un catálogo las
+    categorías, marcas y precios se repiten mucho).
+
+    Args:
+        values: {'price' | 'category' | 'brand': valores de la columna detectada}
+        count: Número de filas
+
+    Returns:
+        Una metadata por fila, con los campos en el mismo orden que
+        extract_product_fields
+    """
+    rows = [{} for _ in range(count)]
+    for field in ("price", "category", "brand"):
+        if field not in values:
+            continue
+        parsed = {}
+        for fields, value in zip(rows, values[field]):
+            key = (type(value), value)
+            try:
+                result = parsed[key]
+            except KeyError:
+                result = parsed[key] = extract_product_fields({field: value}, {field: field}).get(field)
+            except TypeError:  # Valor no hasheable
+                result = extract_product_fields({field: value}, {field: field}).get(field)
+            if result is not None:
+                fields[field] = result
+    return rows
+
+
+def label_variants(label: str) -> List[str]:
+    """
+    Variantes de una categoría/marca pedida por el usuario para filtrar
+
+    Incluye el texto completo normalizado, cada palabra significativa y su
+    forma singular/plural, ya que el filtro de metadata es por igualdad.
+
+    Args:
+        label: Texto extraído de la conversación
+
+    Returns:
+        Lista de variantes normalizadas sin duplicados
+    """
+    normalized = normalize_label(label)
+    variants = [normalized]
+    for word in normalized.split(" "):
+        if len(word) < 3:
+            continue
+        variants.append(word)
+        if word.endswith("es") and len(word) > 4:
+            variants.append(word[:-2])
+        if word.endswith("s"):
+            variants.append(word[:-1])
+        else:
+            variants.append(f"{word}s")
+    return list(dict.fromkeys(v for v in variants if v))
+
+
+def build_product_filter(
+    price_min: Optional[float] = None,
+    price_max: Optional[float] = None,
+    category: Optional[str] = None,
+    brands: Optional[List[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Construye un filtro 'where' de Chroma a partir de la información extraída
+
+    Args:
+        price_min: Presupuesto mínimo
+        price_max: Presupuesto máximo
+        category: Categoría de producto
+        brands: Marcas preferidas
+
+    Returns:
+        Filtro de metadata o None si no hay ninguna condición
+    """
+    conditions = []
+    if price_min is not None:
+        conditions.append({"price": {"$gte": float(price_min)}})
+    if price_max is not None:
+        conditions.append({"price": {"$lte": float(price_max)}})
+    if category:
+        conditions.append({"category": {"$in": label_variants(category)}})
+    brand_labels = [normalize_label(brand) for brand in brands or [] if brand and normalize_label(brand)]
+    if brand_labels:
+        conditions.append({"brand": {"$in": brand_labels}})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
@@ -0,0 +1,203 @@
+"""
+Cuantización de embeddings (float16 / int8 escalar) para el backend NumPy
+"""
+from typing import Optional
+import os
+
+import numpy as np
+
+QUANTIZATION_MODES = ("none", "float16", "int8")
+
+# Filas procesadas por bloque al puntuar: evita materializar toda la matriz en float32
+SCAN_BLOCK_ROWS = 65536
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Índices de los k scores más altos, ordenados de mayor a menor
+
+    Args:
+        scores: Vector de similitudes
+        k: Número de resultados
+
+    Returns:
+        Array de índices
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+class QuantizedMatrix:
+    """
+    Matriz de embeddings almacenada en float16 o int8.
+
+    En int8 cada dimensión se cuantiza de forma escalar con su propio
+    offset (mínimo) y escala ((máximo - mínimo) / 255), de modo que
+    x ≈ (code + 128) * scale + offset.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        codes: np.ndarray,
+        scale: Optional[np.ndarray] = None,
+        offset: Optional[np.ndarray] = None
+    ):
+        if mode not in ("float16", "int8"):
+            raise ValueError(f"Modo de cuantización no soportado: {mode}")
+        self.mode = mode
+        self.codes = codes
+        self.scale = scale
+        self.offset = offset
+
+    @classmethod
+    def from_float32(cls, vectors: np.ndarray, mode: str) -> "QuantizedMatrix":
+        """
+        Cuantiza una matriz float32
+
+        Args:
+            vectors: Matriz (n, dim) de embeddings
+            mode: 'float16' o 'int8'
+
+        Returns:
+            Matriz cuantizada
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if mode == "float16":
+            return cls(mode, vectors.astype(np.float16))
+
+        offset = vectors.min(axis=0) if len(vectors) else np.zeros(vectors.shape[1], dtype=np.float32)
+        span = (vectors.max(axis=0) - offset) if len(vectors) else np.ones(vectors.shape[1], dtype=np.float32)
+        scale = np.where(span > 0, span / 255.0, 1.0).astype(np.float32)
+        codes = np.clip(np.rint((vectors - offset) / scale) - 128, -128, 127).astype(np.int8)
+        return cls(mode, codes, scale, offset.astype(np.float32))
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados por la matriz cuantizada y sus parámetros"""
+        extra = 0 if self.scale is None else self.scale.nbytes + self.offset.nbytes
+        return int(self.codes.nbytes + extra)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """
+        Producto escalar aproximado de cada fila con la consulta
+
+        Args:
+            query: Embedding float32 de la consulta
+
+        Returns:
+            Vector float32 de similitudes aproximadas
+        """
+        query = np.asarray(query, dtype=np.float32)
+        out = np.empty(len(self), dtype=np.float32)
+
+        if self.mode == "float16":
+            for start in range(0, len(self), SCAN_BLOCK_ROWS):
+                block = self.codes[start:start + SCAN_BLOCK_ROWS].astype(np.float32)
+                out[start:start + SCAN_BLOCK_ROWS] = block @ query
+            return out
+
+        # q·x = code·(q*scale) + 128*sum(q*scale) + q·offset
+        scaled_query = query * self.scale
+        bias = np.float32(128.0 * scaled_query.sum() + query @ self.offset)
+        for start in range(0, len(self), SCAN_BLOCK_ROWS):
+            block = self.codes[start:start + SCAN_BLOCK_ROWS].astype(np.float32)
+            out[start:start + SCAN_BLOCK_ROWS] = block @ scaled_query + bias
+        return out
+
+    def dequantize(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Reconstruye una matriz float32 aproximada
+
+        Args:
+            rows: Filas a reconstruir (None = todas)
+        """
+        codes = self.codes if rows is None else self.codes[rows]
+        if self.mode == "float16":
+            return codes.astype(np.float32)
+        return (codes.astype(np.float32) + 128.0) * self.scale + self.offset
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        exact_vectors: Optional[np.ndarray] = None,
+        rescore_factor: int = 4,
+        mask: Optional[np.ndarray] = None
+    ) -> tuple:
+        """
+        Top-k aproximado con re-puntuación exacta opcional
+
+        Selecciona k * rescore_factor candidatos con los scores cuantizados y,
+        si se dan los vectores float32, los vuelve a puntuar de forma exacta.
+
+        Args:
+            query: Embedding float32 de la consulta
+            k: Número de resultados
+            exact_vectors: Matriz float32 (puede estar mapeada en memoria)
+            rescore_factor: Multiplicador de candidatos a re-puntuar
+            mask: Filas elegibles (None = todas)
+
+        Returns:
+            Tupla (índices, similitudes) ordenada de mayor a menor similitud
+        """
+        query = np.asarray(query, dtype=np.float32)
+        approx = self.scores(query)
+        if mask is not None:
+            approx = np.where(mask, approx, -np.inf)
+            k = min(k, int(mask.sum()))
+
+        if exact_vectors is None or rescore_factor <= 1:
+            top = top_k_indices(approx, k)
+            return top, approx[top]
+
+        candidates = top_k_indices(approx, k * rescore_factor)
+        if mask is not None:
+            candidates = candidates[np.isfinite(approx[candidates])]
+        # Leer filas en orden creciente favorece el acceso secuencial al mmap
+        candidates = np.sort(candidates)
+        exact = np.asarray(exact_vectors[candidates], dtype=np.float32) @ query
+        best = top_k_indices(exact, k)
+        return candidates[best], exact[best]
+
+    def save(self, directory: str):
+        """Guarda la matriz cuantizada (escribe y renombra)"""
+        codes_path = os.path.join(directory, f"vectors.{self.mode}.npy")
+        with open(f"{codes_path}.tmp", 'wb') as f:
+            np.save(f, np.ascontiguousarray(self.codes))
+        os.replace(f"{codes_path}.tmp", codes_path)
+
+        if self.mode == "int8":
+            params_path = os.path.join(directory, "quant_params.npy")
+            with open(f"{params_path}.tmp", 'wb') as f:
+                np.save(f, np.stack([self.scale, self.offset]))
+            os.replace(f"{params_path}.tmp", params_path)
+
+    @classmethod
+    def load(cls, directory: str, mode: str) -> Optional["QuantizedMatrix"]:
+        """
+        Carga una matriz cuantizada persistida (mapeada en memoria)
+
+        Returns:
+            Matriz cuantizada o None si no existe
+        """
+        codes_path = os.path.join(directory, f"vectors.{mode}.npy")
+        if not os.path.exists(codes_path):
+            return None
+
+        codes = np.load(codes_path, mmap_mode='r')
+        if mode == "float16":
+            return cls(mode, codes)
+
+        params_path = os.path.join(directory, "quant_params.npy")
+        if not os.path.exists(params_path):
+            return None
+        scale, offset = np.load(params_path)
+        return cls(mode, codes, scale.astype(np.float32), offset.astype(np.float32))
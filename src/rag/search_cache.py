@@ -0,0 +1,274 @@
+"""
+Cachés de resultados de búsqueda del vectorstore (exacta LRU y semántica)
+"""
+from typing import Any, Dict, List, Optional, Hashable
+from collections import OrderedDict, deque
+import hashlib
+import json
+import threading
+import time
+
+import numpy as np
+
+
+def make_search_key(
+    query: str,
+    k: int,
+    filters: Optional[Dict[str, Any]],
+    generation: int,
+    mode: str = "dense"
+) -> str:
+    """
+    Construye la clave de caché de una búsqueda
+
+    Se usa la consulta completa (no un prefijo), k, los filtros, el modo de
+    búsqueda y la generación del índice, de modo que una reconstrucción
+    invalida las entradas anteriores.
+
+    Args:
+        query: Consulta de búsqueda
+        k: Número de resultados
+        filters: Filtros de metadata aplicados (o None)
+        generation: Contador de generación del índice
+        mode: Modo de búsqueda ('dense' o 'hybrid')
+
+    Returns:
+        Hash hexadecimal de la búsqueda
+    """
+    payload = json.dumps(
+        {"q": query, "k": k, "f": filters, "g": generation, "m": mode},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    """
+    Caché LRU acotada con expiración por tiempo (TTL).
+
+    Es segura entre hilos y lleva la cuenta de aciertos, fallos,
+    expulsiones y expiraciones.
+    """
+
+    def __init__(self, capacity: int = 256, ttl: float = 600.0):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Obtiene un valor de la caché y lo marca como usado recientemente
+
+        Args:
+            key: Clave de la búsqueda
+
+        Returns:
+            Valor almacenado o None si no existe o ha expirado
+        """
+        if self.capacity <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if self.ttl > 0 and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Guarda un valor, expulsando el menos usado si se supera la capacidad
+
+        Args:
+            key: Clave de la búsqueda
+            value: Resultado a cachear
+        """
+        if self.capacity <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Vacía la caché (los contadores se conservan)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de uso de la caché
+
+        Returns:
+            Diccionario con aciertos, fallos, tasa de aciertos y ocupación
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "ttl": self.ttl,
+        }
+
+
+class SemanticSearchCache:
+    """
+    Caché semántica de resultados de búsqueda.
+
+    Guarda el embedding normalizado de cada consulta respondida y sirve sus
+    resultados a consultas nuevas cuya similitud coseno supere el umbral,
+    siempre que coincidan k, filtros y generación del índice. Registra la
+    similitud del mejor candidato de cada consulta para poder ajustar el
+    umbral.
+    """
+
+    HISTOGRAM_BINS = [0.0, 0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 1.0001]
+
+    def __init__(self, threshold: float = 0.95, capacity: int = 512, history: int = 1000):
+        self.threshold = threshold
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        # Búfer preasignado (capacity, dim) de embeddings normalizados: la fila i
+        # es la de self._entries[i] y una entrada nueva ocupa el hueco de la expulsada
+        self._vectors: Optional[np.ndarray] = None
+        self._last_used: Optional[np.ndarray] = None  # (capacity,) último uso de cada fila
+        self._entries: List[Dict[str, Any]] = []
+        self._similarities = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def lookup(self, embedding: List[float], scope: Hashable) -> Optional[Any]:
+        """
+        Busca una consulta previa semánticamente equivalente
+
+        Args:
+            embedding: Embedding normalizado de la consulta
+            scope: Identificador de k, filtros y generación (debe coincidir)
+
+        Returns:
+            Resultados cacheados o None si no hay candidato por encima del umbral
+        """
+        with self._lock:
+            best_idx, best_sim = self._best_match(embedding, scope)
+            if best_idx is not None:
+                self._similarities.append(best_sim)
+
+            if best_idx is not None and best_sim >= self.threshold:
+                self.hits += 1
+                self._last_used[best_idx] = time.monotonic()
+                return self._entries[best_idx]["value"]
+
+            self.misses += 1
+            return None
+
+    def put(self, embedding: List[float], scope: Hashable, value: Any):
+        """
+        Guarda los resultados de una consulta
+
+        Args:
+            embedding: Embedding normalizado de la consulta
+            scope: Identificador de k, filtros y generación
+            value: Resultados de la búsqueda
+        """
+        if self.capacity <= 0:
+            return
+
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.size:
+                self._vectors = np.zeros((self.capacity, vector.size), dtype=np.float32)
+                self._last_used = np.zeros(self.capacity)
+                self._entries = []
+
+            if len(self._entries) < self.capacity:
+                slot = len(self._entries)
+                self._entries.append(None)
+            else:
+                # Reutilizar la fila de la entrada usada hace más tiempo
+                slot = int(np.argmin(self._last_used))
+
+            self._vectors[slot] = vector
+            self._last_used[slot] = time.monotonic()
+            self._entries[slot] = {"scope": scope, "value": value}
+
+    def _best_match(self, embedding: List[float], scope: Hashable) -> tuple:
+        """Índice y similitud del candidato más parecido con el mismo scope"""
+        if not self._entries:
+            return None, 0.0
+
+        query = np.asarray(embedding, dtype=np.float32)
+        similarities = self._vectors[:len(self._entries)] @ query
+        in_scope = np.array([entry["scope"] == scope for entry in self._entries])
+        if not in_scope.any():
+            return None, 0.0
+
+        similarities = np.where(in_scope, similarities, -np.inf)
+        best_idx = int(np.argmax(similarities))
+        return best_idx, float(similarities[best_idx])
+
+    def clear(self):
+        """Vacía la caché (los contadores y el histórico se conservan)"""
+        with self._lock:
+            self._entries = []
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de la caché semántica
+
+        Returns:
+            Aciertos, fallos, tasa de aciertos y distribución de la similitud
+            del mejor candidato (percentiles e histograma)
+        """
+        lookups = self.hits + self.misses
+        similarities = np.array(self._similarities, dtype=np.float32)
+
+        distribution = {}
+        if similarities.size:
+            p50, p90, p99 = np.percentile(similarities, [50, 90, 99])
+            counts, _ = np.histogram(similarities, bins=self.HISTOGRAM_BINS)
+            distribution = {
+                "p50": float(p50),
+                "p90": float(p90),
+                "p99": float(p99),
+                "histogram": {
+                    f"{low:.2f}-{min(high, 1.0):.2f}": int(count)
+                    for low, high, count in zip(self.HISTOGRAM_BINS, self.HISTOGRAM_BINS[1:], counts)
+                },
+            }
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "similarity": distribution,
+        }
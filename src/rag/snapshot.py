@@ -0,0 +1,267 @@
+"""
+Snapshot del índice vectorial en archivos mapeables en memoria (arranque en frío)
+"""
+from typing import List, Optional, Any, Dict
+from datetime import datetime
+import json
+import os
+import shutil
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.config import config
+from src.rag.backends import SearchBackend, ShardedBackend, matches_filter
+from src.rag.quantization import top_k_indices
+
+SNAPSHOT_DIR = "snapshot"
+SNAPSHOT_FORMAT = 1
+
+INFO_FILE = "snapshot.json"
+VECTORS_FILE = "vectors.npy"
+OFFSETS_FILE = "offsets.npy"
+BLOB_FILES = ("ids.bin", "texts.bin", "metadatas.bin")  # Columnas de la tabla de offsets
+
+
+def write_snapshot(backend: SearchBackend, directory: str, model_id: str) -> Dict[str, Any]:
+    """
+    Exporta un índice a formato snapshot
+
+    El snapshot tiene una matriz float32 contigua ('vectors.npy'), una
+    tabla de offsets (n + 1, 3) y tres blobs UTF-8 con ids, textos y
+    metadata JSON concatenados. Se escribe en un directorio temporal que se
+    renombra al terminar.
+
+    Args:
+        backend: Backend con el índice a exportar
+        directory: Directorio del snapshot
+        model_id: Identificador del modelo que produjo los vectores
+
+    Returns:
+        Información del snapshot ('count', 'dimension', 'model_id'...)
+    """
+    exported = backend.export(include_vectors=True)
+    count = len(exported["ids"])
+    vectors = np.ascontiguousarray(exported["vectors"], dtype=np.float32)
+    if not count:
+        vectors = vectors.reshape(0, 0)
+
+    tmp_dir = f"{directory}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    np.save(os.path.join(tmp_dir, VECTORS_FILE), vectors)
+
+    columns = (
+        exported["ids"],
+        exported["texts"],
+        [json.dumps(meta, ensure_ascii=False, separators=(",", ":")) for meta in exported["metadatas"]],
+    )
+    offsets = np.zeros((count + 1, len(BLOB_FILES)), dtype=np.int64)
+    for column, (name, values) in enumerate(zip(BLOB_FILES, columns)):
+        encoded = [value.encode("utf-8") for value in values]
+        offsets[1:, column] = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+        with open(os.path.join(tmp_dir, name), 'wb') as f:
+            f.write(b"".join(encoded))
+    np.save(os.path.join(tmp_dir, OFFSETS_FILE), offsets)
+
+    info = {
+        "format": SNAPSHOT_FORMAT,
+        "count": count,
+        "dimension": int(vectors.shape[1]) if count else 0,
+        "model_id": model_id,
+        "source_backend": backend.name,
+        "created_at": datetime.now().isoformat(),
+    }
+    with open(os.path.join(tmp_dir, INFO_FILE), 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+    print(f"📸 Snapshot escrito: {count} vectores en {directory}")
+    return info
+
+
+class SnapshotBackend(SearchBackend):
+    """
+    Índice de solo lectura sobre un snapshot mapeado en memoria.
+
+    Abrirlo solo lee la cabecera de los archivos: los vectores, los offsets
+    y los blobs se mapean con mmap, de modo que un proceso nuevo responde
+    consultas de inmediato y varios procesos comparten las páginas en la
+    caché del sistema operativo. La búsqueda es exacta (producto
+    matriz-vector); textos y metadata solo se decodifican para los
+    resultados, salvo al filtrar por metadata, que decodifica (una vez)
+    toda la metadata.
+    """
+
+    name = "snapshot"
+
+    def __init__(self, directory: str, model_id: Optional[str] = None):
+        self.snapshot_dir = directory
+        try:
+            with open(os.path.join(directory, INFO_FILE), 'r', encoding='utf-8') as f:
+                self.info = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Snapshot sin cabecera válida en {directory}: {e}") from e
+
+        if self.info.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Formato de snapshot no soportado: {self.info.get('format')}")
+        if model_id and self.info.get("model_id") != model_id:
+            raise ValueError(
+                f"Snapshot creado con otro modelo de embeddings ({self.info.get('model_id')})"
+            )
+
+        count = self.info["count"]
+        try:
+            self.vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode='r')
+            self.offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode='r')
+            self._blobs = [self._map_blob(os.path.join(directory, name)) for name in BLOB_FILES]
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Snapshot incompleto en {directory}: {e}") from e
+
+        if count and self.vectors.shape != (count, self.info["dimension"]):
+            raise ValueError(f"Snapshot inconsistente: vectores {self.vectors.shape} para {count} chunks")
+        if self.offsets.shape != (count + 1, len(BLOB_FILES)):
+            raise ValueError(f"Snapshot inconsistente: tabla de offsets {self.offsets.shape}")
+        for blob, size in zip(self._blobs, self.offsets[-1]):
+            if len(blob) != size:
+                raise ValueError("Snapshot inconsistente: tamaño de blob distinto al de los offsets")
+
+        self._positions: Optional[Dict[str, int]] = None  # id -> fila (al primer get)
+        self._metadatas: Optional[List[Dict[str, Any]]] = None  # Al primer filtro
+
+    @staticmethod
+    def _map_blob(path: str):
+        """Mapea un blob en memoria (mmap no admite archivos vacíos)"""
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(path, dtype=np.uint8, mode='r')
+
+    def _field(self, column: int, row: int) -> str:
+        start, end = self.offsets[row, column], self.offsets[row + 1, column]
+        return self._blobs[column][start:end].tobytes().decode("utf-8")
+
+    def _metadata(self, row: int) -> Dict[str, Any]:
+        if self._metadatas is not None:
+            return dict(self._metadatas[row])
+        return json.loads(self._field(2, row))
+
+    def _document(self, row: int) -> Document:
+        return Document(page_content=self._field(1, row), metadata=self._metadata(row), id=self._field(0, row))
+
+    @property
+    def directory(self) -> str:
+        # Directorio del índice del que se sacó el snapshot (léxico y manifiesto están allí)
+        return os.path.dirname(os.path.normpath(self.snapshot_dir))
+
+    @property
+    def manifest_path(self) -> str:
+        if os.path.abspath(self.directory) == os.path.abspath(config.CHROMA_DIR):
+            return config.INDEX_MANIFEST_PATH
+        return super().manifest_path
+
+    @property
+    def memory_bytes(self) -> int:
+        # Páginas mapeadas: compartidas con otros procesos a través de la caché del sistema
+        return int(self.vectors.nbytes)
+
+    def query(self, embedding, k, filter=None):
+        return self.query_many([embedding], k, filter)[0]
+
+    def query_many(self, embeddings, k, filter=None):
+        if not self.info["count"]:
+            return [[] for _ in embeddings]
+
+        candidates = None
+        if filter:
+            if self._metadatas is None:
+                self._metadatas = [json.loads(self._field(2, row)) for row in range(self.info["count"])]
+            candidates = np.flatnonzero([matches_filter(meta, filter) for meta in self._metadatas])
+            if not candidates.size:
+                return [[] for _ in embeddings]
+
+        queries = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+        matrix = self.vectors if candidates is None else self.vectors[candidates]
+        similarities = queries @ matrix.T
+
+        results = []
+        for row in similarities:
+            top = top_k_indices(row, k)
+            rows = top if candidates is None else candidates[top]
+            # Distancia L2 al cuadrado entre vectores normalizados (misma escala que Chroma)
+            results.append([(self._document(int(i)), float(2.0 - 2.0 * score)) for i, score in zip(rows, row[top])])
+        return results
+
+    def _rows(self, ids: List[str]) -> List[Optional[int]]:
+        if self._positions is None:
+            self._positions = {self._field(0, row): row for row in range(self.info["count"])}
+        return [self._positions.get(chunk_id) for chunk_id in ids]
+
+    def get(self, ids):
+        return [self._document(row) for row in self._rows(ids) if row is not None]
+
+    def get_vectors(self, ids):
+        if not ids:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(self.vectors[self._rows(ids)], dtype=np.float32)
+
+    def count(self) -> int:
+        return self.info["count"]
+
+    def export(self, include_vectors: bool = True) -> Dict[str, Any]:
+        rows = range(self.info["count"])
+        exported = {
+            "ids": [self._field(0, row) for row in rows],
+            "texts": [self._field(1, row) for row in rows],
+            "metadatas": [self._metadata(row) for row in rows],
+        }
+        if include_vectors:
+            exported["vectors"] = np.asarray(self.vectors, dtype=np.float32)
+        return exported
+
+
+def snapshot_supported(index_dir: str) -> bool:
+    """
+    Indica si un snapshot puede servir un índice sin cambiar sus resultados
+
+    El snapshot hace búsqueda exacta en float32 sobre una sola matriz: solo
+    equivale al backend numpy sin cuantizar y sin shards. Con Chroma (HNSW),
+    con cuantización o con shards se abre siempre el backend configurado.
+
+    Args:
+        index_dir: Directorio del índice (versión)
+
+    Returns:
+        True si la configuración y el índice admiten snapshot
+    """
+    return (
+        config.VECTOR_BACKEND == "numpy"
+        and config.VECTOR_QUANTIZATION == "none"
+        and ShardedBackend.read_layout(index_dir) is None
+    )
+
+
+def open_snapshot(index_dir: str, model_id: Optional[str] = None) -> Optional[SnapshotBackend]:
+    """
+    Abre el snapshot de un directorio de índice si existe y es válido
+
+    Args:
+        index_dir: Directorio del índice (versión)
+        model_id: Modelo de embeddings actual; un snapshot de otro modelo se descarta
+
+    Returns:
+        SnapshotBackend o None si hay que abrir el índice completo (sin
+        snapshot, no válido o no admitido por la configuración: snapshot_supported)
+    """
+    path = os.path.join(index_dir, SNAPSHOT_DIR)
+    if not snapshot_supported(index_dir) or not os.path.isdir(path):
+        return None
+    try:
+        snapshot = SnapshotBackend(path, model_id)
+    except ValueError as e:
+        print(f"⚠️  Snapshot no válido, se abre el índice completo: {e}")
+        return None
+    if snapshot.info.get("source_backend") != "numpy":
+        return None
+    return snapshot
@@ -0,0 +1,72 @@
+"""
+Embeddings con sentence-transformers sobre PyTorch (CPU)
+"""
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.config import config
+
+
+class TorchEmbeddings(Embeddings):
+    """
+    Embeddings de un modelo de sentence-transformers ejecutado con PyTorch.
+
+    Produce los mismos vectores que HuggingFaceEmbeddings (saltos de línea
+    sustituidos por espacios y vectores normalizados), pero expone el
+    modelo, el tokenizer y el máximo de tokens por texto con la misma
+    interfaz que OnnxEmbeddings.
+    """
+
+    def __init__(self, model_name: str = None, cache_folder: str = None, batch_size: int = 32):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name or config.EMBEDDING_MODEL
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(
+            self.model_name,
+            device="cpu",
+            cache_folder=cache_folder or config.MODEL_CACHE_DIR
+        )
+
+    @property
+    def model_id(self) -> str:
+        """Identificador de los vectores producidos (para cachés de embeddings)"""
+        return self.model_name
+
+    @property
+    def tokenizer(self):
+        """Tokenizer del modelo"""
+        return self.model.tokenizer
+
+    @property
+    def max_seq_length(self) -> int:
+        """Máximo de tokens por texto (los textos más largos se truncan)"""
+        return self.model.max_seq_length
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+    def encode(self, texts: List[str], pool=None) -> np.ndarray:
+        """
+        Calcula embeddings normalizados
+
+        Args:
+            texts: Textos a embeber
+            pool: Pool multi-proceso de sentence-transformers (None = en proceso)
+
+        Returns:
+            Matriz float32 (len(texts), dimensión)
+        """
+        return self.model.encode(
+            [text.replace("\n", " ") for text in texts],
+            pool=pool,
+            batch_size=self.batch_size if pool is None else max(1, min(len(texts), 64)),
+            normalize_embeddings=True,
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
@@ -1,16 +1,42 @@
 """
-Sistema de almacenamiento vectorial con ChromaDB
+Sistema de almacenamiento vectorial (ChromaDB o NumPy)
 """
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+import asyncio
+import hashlib
 import os
 import json
+import threading
+import time
+import uuid
+from pathlib import Path
 
+import numpy as np
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
 
 from src.config import config
+from src.rag.backends import SearchBackend, VectorBackend, create_backend, matches_filter
+from src.rag.document_loader import DocumentLoader, batched
+from src.rag.embedding_cache import EmbeddingCache
+from src.rag.index_manifest import IndexManifest
+from src.rag.index_stats import LatencyRecorder, directory_size
+from src.rag.index_versions import IndexVersions
+from src.rag.snapshot import SNAPSHOT_DIR, open_snapshot, snapshot_supported, write_snapshot
+from src.rag.worker_threads import threads_per_worker, worker_threads
+from src.rag.lexical_index import BM25Index, reciprocal_rank_fusion
+from src.rag.onnx_embeddings import OnnxEmbeddings
+from src.rag.torch_embeddings import TorchEmbeddings
+from src.rag.product_fields import build_product_filter, make_product_id, product_key
+from src.rag.search_cache import SearchCache, SemanticSearchCache, make_search_key
+
+
+TABULAR_TYPES = ("csv", "excel")  # Documentos con una fila de producto cada uno
 
 
 def clean_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
@@ -24,39 +50,93 @@ def clean_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Diccionario de metadata limpio
     """
-    cleaned = {}
-    for key, value in metadata.items():
-        # Si es None, mantenerlo
-        if value is None:
-            cleaned[key] = value
-        # Si es tipo básico, mantenerlo
-        elif isinstance(value, (str, int, float, bool)):
-            cleaned[key] = value
-        # Si es lista, convertir a string
-        elif isinstance(value, list):
-            cleaned[key] = ", ".join(str(item) for item in value)
-        # Si es dict, convertir a JSON string
-        elif isinstance(value, dict):
-            cleaned[key] = json.dumps(value, ensure_ascii=False)
-        # Para cualquier otro tipo, convertir a string
-        else:
-            cleaned[key] = str(value)
+    return {key: _clean_metadata_value(value) for key, value in metadata.items()}
+
+
+def clean_metadata_many(metadatas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Limpia la metadata de muchos documentos en una sola pasada
 
+    Equivale a aplicar clean_metadata a cada uno, pero los valores que no
+    son de tipo básico y comparten objeto entre documentos (por ejemplo la
+    lista 'columns' de todas las filas de un CSV) se convierten una sola vez.
+
+    Args:
+        metadatas: Diccionarios de metadata originales
+
+    Returns:
+        Diccionarios de metadata limpios, en el mismo orden
+    """
+    converted: Dict[int, Any] = {}  # id(valor original) -> valor limpio
+    cleaned = []
+    for metadata in metadatas:
+        row = {}
+        for key, value in metadata.items():
+            if value is None or type(value) in (str, int, float, bool):
+                row[key] = value
+            else:
+                if id(value) not in converted:
+                    converted[id(value)] = _clean_metadata_value(value)
+                row[key] = converted[id(value)]
+        cleaned.append(row)
     return cleaned
 
 
+def _clean_metadata_value(value: Any) -> Any:
+    """Convierte un valor de metadata a un tipo admitido por ChromaDB"""
+    # Si es None o tipo básico, mantenerlo
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    # Si es lista, convertir a string
+    if isinstance(value, list):
+        return ", ".join(str(item) for item in value)
+    # Si es dict, convertir a JSON string
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    # Para cualquier otro tipo, convertir a string
+    return str(value)
+
+
+def mmr_select(
+    query_vector: np.ndarray,
+    vectors: np.ndarray,
+    n: int,
+    lambda_mult: float = 0.7
+) -> List[int]:
+    """
+    Selecciona n vectores con Maximal Marginal Relevance
+
+    Args:
+        query_vector: Embedding normalizado de la consulta
+        vectors: Embeddings normalizados de los candidatos
+        n: Número de candidatos a elegir
+        lambda_mult: Peso de la relevancia frente a la diversidad (1 = solo relevancia)
+
+    Returns:
+        Índices de los candidatos elegidos, en orden de selección
+    """
+    if len(vectors) == 0:
+        return []
+
+    relevance = vectors @ query_vector
+    selected = [int(np.argmax(relevance))]
+    max_similarity = vectors @ vectors[selected[0]]
+    while len(selected) < min(n, len(vectors)):
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        max_similarity = np.maximum(max_similarity, vectors @ vectors[best])
+    return selected
+
+
 class VectorStore:
     """Gestor del almacenamiento vectorial para RAG"""
 
     def __init__(self):
         # Usar embeddings locales multilingües optimizados con caché
         print("🔧 Inicializando modelo de embeddings local...")
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True},
-            cache_folder="./data/model_cache"
-        )
+        self.embeddings = self._create_embeddings()
         print("✓ Modelo de embeddings listo")
 
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -66,126 +146,1217 @@ class VectorStore:
             separators=["\n\n", "\n", ". ", " ", ""]
         )
 
-        self.vectorstore: Optional[Chroma] = None
-        self._search_cache = {}  # Caché de búsquedas
+        self.vectorstore: Optional[SearchBackend] = None
+        self._lexical_index: Optional[BM25Index] = None  # Se abre al primer uso
+        self.search_cache = SearchCache(config.SEARCH_CACHE_SIZE, config.SEARCH_CACHE_TTL)
+        self.semantic_cache: Optional[SemanticSearchCache] = (
+            SemanticSearchCache(config.SEMANTIC_CACHE_THRESHOLD, config.SEMANTIC_CACHE_SIZE)
+            if config.SEMANTIC_CACHE_ENABLED else None
+        )
+        self.index_generation = 0  # Se incrementa con cada cambio del índice
+        self.index_version: Optional[str] = None  # Versión publicada que está cargada
+        self._last_version_check = 0.0
+        self._reload_lock = threading.Lock()
+        self.first_search_seconds: Optional[float] = None  # Latencia de la primera búsqueda real
+        self.latency = LatencyRecorder()  # Latencias recientes (embedding / índice)
+        self._index_stats: Optional[tuple] = None  # (generación, estadísticas del contenido)
+        self._search_executor: Optional[ThreadPoolExecutor] = None  # Búsquedas asíncronas
+        self._inflight: Dict[str, Future] = {}  # Búsquedas asíncronas en curso por clave de caché
+        self._inflight_lock = threading.RLock()
+        self._embedding_pool = None  # Pool multi-proceso activo durante la indexación
+        self.embedding_cache: Optional[EmbeddingCache] = (
+            EmbeddingCache(getattr(self.embeddings, "model_id", config.EMBEDDING_MODEL))
+            if config.EMBEDDING_CACHE_ENABLED else None
+        )
 
-    def create_vectorstore(self, documents: List[Document]) -> Chroma:
+    def create_vectorstore(self, documents: Iterable[Document]) -> VectorBackend:
         """
         Crea un vectorstore a partir de documentos
 
+        Se construye en una versión nueva del índice que solo se publica al
+        terminar; hasta entonces las búsquedas siguen usando la anterior.
+
+        Los documentos se consumen en lotes de config.LOAD_BATCH_SIZE: cada
+        lote se divide, embebe y escribe antes de pedir el siguiente, así
+        que con un generador (p. ej. chain.from_iterable sobre
+        DocumentLoader.iter_documents) la memoria no crece con el catálogo,
+        solo (con un pool de carga) con los archivos en curso, uno por proceso.
+
         Args:
-            documents: Lista de documentos a indexar
+            documents: Documentos a indexar (lista o iterable perezoso)
 
         Returns:
-            Vectorstore de Chroma
+            Backend vectorial configurado (config.VECTOR_BACKEND)
         """
-        # Limpiar metadata de todos los documentos ANTES de procesar
-        print(f"🧹 Limpiando metadata de {len(documents)} documentos...")
-        for doc in documents:
-            doc.metadata = clean_metadata(doc.metadata)
+        # Crear vectorstore
+        print(f"💾 Creando vectorstore ({config.VECTOR_BACKEND})...")
+        start = time.perf_counter()
+        versions = IndexVersions()
+        version = versions.create()
+        chunks = 0
+        try:
+            backend = create_backend(directory=versions.version_dir(version))
+            lexical_index = BM25Index()
+            with self._embedding_workers():
+                for batch in batched(documents, max(1, config.LOAD_BATCH_SIZE)):
+                    splits = self._split_documents(batch)
+                    self._upsert_chunks(
+                        splits, [str(uuid.uuid4()) for _ in splits], backend, lexical_index
+                    )
+                    chunks += len(splits)
+            backend.persist()
+            lexical_index.save(self._lexical_dir(backend))
+            snapshot = self._write_snapshot(backend)
+        except Exception:
+            versions.discard(version)
+            raise
 
-        # Dividir documentos en chunks
-        splits = self.text_splitter.split_documents(documents)
+        # Los ids de este índice no están registrados: sin manifiesto, la
+        # próxima sincronización reconstruye desde cero
+        versions.publish(version, {
+            "backend": backend.name,
+            "chunks": chunks,
+            "build_seconds": round(time.perf_counter() - start, 3),
+            "snapshot": snapshot,
+        })
+        versions.prune()
+        self._swap_index(backend, lexical_index, version)
 
-        print(f"📄 Documentos divididos en {len(splits)} chunks")
+        print(f"✓ Vectorstore creado con {chunks} embeddings")
 
-        # Limpiar metadata de los splits también (por si el splitter agrega metadata)
-        print(f"🧹 Limpiando metadata de {len(splits)} chunks...")
-        for split in splits:
-            split.metadata = clean_metadata(split.metadata)
+        return self.vectorstore
 
-        # Crear directorio si no existe
-        os.makedirs(config.CHROMA_DIR, exist_ok=True)
+    def sync_directory(
+        self,
+        directory: str = None,
+        loader: DocumentLoader = None,
+        full_rebuild: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Sincroniza el vectorstore con un directorio de forma incremental.
 
-        # Crear vectorstore
-        print("💾 Creando vectorstore en ChromaDB...")
-        self.vectorstore = Chroma.from_documents(
-            documents=splits,
-            embedding=self.embeddings,
-            persist_directory=config.CHROMA_DIR
+        Usa el manifiesto del índice para cargar, dividir y embeber solo los
+        archivos añadidos o modificados, y borrar los chunks de los archivos
+        modificados o eliminados.
+
+        Los cambios se aplican sobre una versión nueva que comparte los
+        archivos de la publicada (IndexVersions.create), y que se publica con
+        un reemplazo atómico del puntero al terminar: las
+        búsquedas nunca ven un índice a medio construir y una sincronización
+        fallida no toca el índice publicado.
+
+        Args:
+            directory: Directorio con los documentos (por defecto config.UPLOADS_DIR)
+            loader: Cargador de documentos a utilizar
+            full_rebuild: Si es True, construye una versión vacía y re-indexa todo
+
+        Returns:
+            Estadísticas de la sincronización
+        """
+        directory = directory or config.UPLOADS_DIR
+        loader = loader or DocumentLoader()
+        start = time.perf_counter()
+
+        versions = IndexVersions()
+        base_version = versions.current()
+        manifest = IndexManifest()
+        if base_version is not None and not full_rebuild:
+            # La versión base solo se lee (manifiesto); se escribe sobre la copia nueva
+            base_backend = self.vectorstore
+            if base_backend is None or self.index_version != base_version:
+                base_backend = create_backend(directory=versions.version_dir(base_version))
+            manifest = IndexManifest.load(base_backend.manifest_path)
+
+        # Sin manifiesto no conocemos los ids existentes: reconstruir desde cero
+        rebuild = full_rebuild or base_version is None or not manifest.exists()
+        if rebuild:
+            print("♻️  Reconstrucción completa del vectorstore...")
+            manifest = IndexManifest()
+
+        changes = manifest.diff(loader.list_files(directory))
+        stats = {
+            "added": len(changes["added"]),
+            "changed": len(changes["changed"]),
+            "removed": len(changes["removed"]),
+            "unchanged": len(changes["unchanged"]),
+            "documents_loaded": 0,
+            "chunks_added": 0,
+            "chunks_deleted": 0,
+            "load_seconds": 0.0,
+            "errors": [],
+            "version": base_version,
+        }
+
+        print(
+            f"🔍 Cambios detectados: {stats['added']} nuevo(s), {stats['changed']} modificado(s), "
+            f"{stats['removed']} eliminado(s), {stats['unchanged']} sin cambios"
         )
 
-        print(f"✓ Vectorstore creado con {len(splits)} embeddings")
+        if not rebuild and not (changes["added"] or changes["changed"] or changes["removed"]):
+            print("✓ Vectorstore al día: no se publica una versión nueva")
+            if changes["refreshed"]:
+                # Guardar los mtime refrescados para no volver a leer esos archivos
+                manifest.save()
+            if self.index_version != base_version:
+                self._swap_index(base_backend, None, base_version)
+            return stats
 
-        return self.vectorstore
+        version = versions.create(base=None if rebuild else base_version)
+        try:
+            backend = create_backend(directory=versions.version_dir(version))
+            lexical_index = BM25Index() if rebuild else self._open_lexical_index(backend)
+            manifest.path = backend.manifest_path
+
+            # Borrar chunks de archivos eliminados o modificados
+            for file_path in changes["removed"] + changes["changed"]:
+                old_ids = manifest.forget(file_path)
+                if old_ids:
+                    backend.delete(old_ids)
+                    lexical_index.remove(old_ids)
+                    stats["chunks_deleted"] += len(old_ids)
+
+            # Indexar archivos nuevos o modificados
+            # Cada archivo se lee por lotes (páginas, bloques de filas) que se
+            # indexan antes de leer el siguiente; con config.LOAD_WORKERS > 1
+            # los archivos se parsean en paralelo y se indexan en orden
+            with self._embedding_workers():
+                for file_path, batches in loader.iter_files(changes["added"] + changes["changed"]):
+                    result = self._index_file(file_path, batches, backend, lexical_index)
+                    stats["load_seconds"] += result["load_seconds"]
+                    if result["error"]:
+                        print(f"✗ Error cargando {Path(file_path).name}: {result['error']}")
+                        stats["errors"].append({"file": file_path, "error": result["error"]})
+                        continue
+
+                    manifest.record(file_path, result["ids"], changes["fingerprints"][file_path])
+                    stats["documents_loaded"] += result["documents"]
+                    stats["chunks_added"] += len(result["ids"])
+                    print(
+                        f"✓ Indexado: {Path(file_path).name} ({len(result['ids'])} chunks, "
+                        f"carga {result['load_seconds']:.2f}s)"
+                    )
+
+            backend.persist()
+            lexical_index.save(self._lexical_dir(backend))
+            manifest.save()
+            snapshot = self._write_snapshot(backend)
+        except Exception:
+            versions.discard(version)
+            raise
+
+        stats["version"] = version
+        versions.publish(version, {
+            "backend": backend.name,
+            "base": None if rebuild else base_version,
+            "chunks": backend.count(),
+            "build_seconds": round(time.perf_counter() - start, 3),
+            "snapshot": snapshot,
+            **{key: value for key, value in stats.items() if key not in ("errors", "version")},
+        })
+        versions.prune()
+        self._swap_index(backend, lexical_index, version)
+
+        print(
+            f"✓ Vectorstore sincronizado: +{stats['chunks_added']} / "
+            f"-{stats['chunks_deleted']} chunks (versión {version})"
+        )
+
+        return stats
+
+    def _index_file(
+        self,
+        file_path: str,
+        batches: Iterator[List[Document]],
+        backend: VectorBackend,
+        lexical_index: BM25Index
+    ) -> Dict[str, Any]:
+        """
+        Divide, embebe y escribe un archivo lote a lote
+
+        Si la carga falla a mitad del archivo se borran los chunks que ya se
+        habían escrito, para no dejar en el índice chunks que el manifiesto
+        no registra. Los errores al embeber o escribir no se capturan.
+
+        Args:
+            file_path: Ruta del archivo
+            batches: Lotes de documentos del archivo (DocumentLoader.iter_files)
+            backend: Backend de la versión en construcción
+            lexical_index: Índice léxico de la versión en construcción
+
+        Returns:
+            Diccionario con 'ids' de los chunks, 'documents' cargados,
+            'load_seconds' (tiempo leyendo el archivo) y 'error'
+        """
+        ids = []
+        documents = 0
+        load_seconds = 0.0
+        error = None
+        batches = iter(batches)
+        while True:
+            start = time.perf_counter()
+            try:
+                batch = next(batches, None)
+            except Exception as e:
+                batch, error = None, str(e)
+            load_seconds += time.perf_counter() - start
+            if batch is None:
+                break
+
+            splits = self._split_documents(batch)
+            batch_ids = self._chunk_ids(file_path, len(splits), start=len(ids))
+            self._upsert_chunks(splits, batch_ids, backend, lexical_index)
+            ids.extend(batch_ids)
+            documents += len(batch)
+
+        if error is not None and ids:
+            backend.delete(ids)
+            lexical_index.remove(ids)
+            ids, documents = [], 0
+
+        return {"ids": ids, "documents": documents, "load_seconds": load_seconds, "error": error}
+
+    def _upsert_chunks(
+        self,
+        splits: List[Document],
+        ids: List[str],
+        backend: VectorBackend,
+        lexical_index: BM25Index
+    ):
+        """
+        Embebe y escribe los chunks en el vectorstore por lotes.
+
+        Cada lote de config.EMBED_BATCH_SIZE chunks se embebe y se escribe en
+        el backend en cuanto termina; la escritura de un lote se solapa con el
+        embedding del siguiente, de modo que nunca hay más de dos lotes de
+        vectores en memoria.
 
-    def load_vectorstore(self) -> Chroma:
+        Args:
+            splits: Chunks a indexar
+            ids: Ids de los chunks (mismo orden que splits)
+            backend: Backend de la versión en construcción
+            lexical_index: Índice léxico de la versión en construcción
         """
-        Carga un vectorstore existente
+        if not splits:
+            return
+
+        batch_size = max(1, config.EMBED_BATCH_SIZE)
+        total_batches = (len(splits) + batch_size - 1) // batch_size
+
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending = None
+            for batch_num, batch in enumerate(self._batches(splits, ids, batch_size), 1):
+                batch_docs, batch_ids = batch
+                texts = [doc.page_content for doc in batch_docs]
+                embeddings = self._embed_documents(texts)
+
+                # Esperar la escritura del lote anterior antes de encolar otra
+                if pending is not None:
+                    pending.result()
+                pending = writer.submit(
+                    backend.upsert,
+                    batch_ids,
+                    embeddings,
+                    texts,
+                    [doc.metadata for doc in batch_docs]
+                )
+
+                # Índice léxico BM25 construido a la vez que los embeddings
+                lexical_index.add(batch_ids, texts)
+
+                if total_batches > 1:
+                    print(f"   ⏳ Lote {batch_num}/{total_batches} embebido ({len(texts)} chunks)")
+
+            if pending is not None:
+                pending.result()
+
+    @staticmethod
+    def _batches(
+        splits: List[Document],
+        ids: List[str],
+        batch_size: int
+    ) -> Iterator[tuple]:
+        """Divide chunks e ids en lotes de tamaño fijo"""
+        for start in range(0, len(splits), batch_size):
+            yield splits[start:start + batch_size], ids[start:start + batch_size]
+
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Calcula los embeddings de un lote de textos
+
+        Consulta primero la caché persistente de embeddings y solo pasa por el
+        modelo los textos que no están en ella; los textos repetidos dentro
+        del lote se embeben una única vez.
+
+        Args:
+            texts: Textos a embeber
 
         Returns:
-            Vectorstore de Chroma
+            Lista de vectores normalizados alineada con texts
         """
-        if not os.path.exists(config.CHROMA_DIR):
+        if self.embedding_cache is None:
+            return self._encode_texts(texts)
+
+        keys = [self.embedding_cache.key(text) for text in texts]
+        cached = self.embedding_cache.get_many(keys)
+
+        # Textos únicos que faltan en la caché
+        missing: Dict[str, str] = {}
+        for key, text, vector in zip(keys, texts, cached):
+            if vector is None and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self._encode_texts(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.embedding_cache.put_many(list(computed.keys()), list(computed.values()))
+        else:
+            computed = {}
+
+        return [vector if vector is not None else computed[key] for key, vector in zip(keys, cached)]
+
+    def _encode_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Pasa un lote de textos por el modelo de embeddings
+
+        Usa el pool multi-proceso si está activo (config.EMBED_WORKERS > 1)
+        y en otro caso el modelo en proceso con los hilos de torch configurados.
+
+        Args:
+            texts: Textos a embeber
+
+        Returns:
+            Lista de vectores normalizados
+        """
+        if self._embedding_pool is not None:
+            return self.embeddings.encode(texts, pool=self._embedding_pool).tolist()
+
+        return self.embeddings.embed_documents(texts)
+
+    @contextmanager
+    def _embedding_workers(self):
+        """
+        Arranca el pool multi-proceso de sentence-transformers durante una
+        indexación si config.EMBED_WORKERS > 1, y lo detiene al terminar
+
+        El pool se crea desde el SentenceTransformer de TorchEmbeddings y
+        cada proceso recibe su parte de los hilos (config.EMBED_THREADS o
+        todos los núcleos, entre los procesos).
+        """
+        if (
+            config.EMBED_WORKERS <= 1
+            or self._embedding_pool is not None
+            or not isinstance(self.embeddings, TorchEmbeddings)
+        ):
+            yield
+            return
+
+        threads = threads_per_worker(config.EMBED_WORKERS, config.EMBED_THREADS or None)
+        print(f"🧵 Arrancando pool de {config.EMBED_WORKERS} procesos de embeddings ({threads} hilos cada uno)...")
+        model = self.embeddings.model
+        with worker_threads(threads):
+            self._embedding_pool = model.start_multi_process_pool(target_devices=["cpu"] * config.EMBED_WORKERS)
+        try:
+            yield
+        finally:
+            model.stop_multi_process_pool(self._embedding_pool)
+            self._embedding_pool = None
+
+    @classmethod
+    def _create_embeddings(cls, backend: str = None) -> Embeddings:
+        """
+        Crea el modelo de embeddings
+
+        Args:
+            backend: 'torch' u 'onnx' (por defecto config.EMBEDDING_BACKEND)
+
+        Returns:
+            TorchEmbeddings (PyTorch) u OnnxEmbeddings (ONNX Runtime)
+        """
+        backend = (backend or config.EMBEDDING_BACKEND).lower()
+        if backend == "onnx":
+            return OnnxEmbeddings(config.EMBEDDING_MODEL)
+        if backend != "torch":
+            raise ValueError(f"Backend de embeddings desconocido: {backend}. Usa 'torch' u 'onnx'")
+
+        cls._configure_torch_threads()
+        return TorchEmbeddings(config.EMBEDDING_MODEL)
+
+    @staticmethod
+    def _configure_torch_threads():
+        """Ajusta los hilos intra-op de torch según config.EMBED_THREADS"""
+        try:
+            import torch
+        except ImportError:
+            return
+
+        threads = config.EMBED_THREADS or os.cpu_count() or 1
+        if torch.get_num_threads() != threads:
+            torch.set_num_threads(threads)
+
+    def _split_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Limpia la metadata y divide los documentos en chunks
+
+        Las filas de CSV/Excel ya tienen tamaño de producto: pasan como un
+        único chunk sin pasar por el text splitter, salvo que superen el
+        límite de tokens del modelo de embeddings.
+
+        Args:
+            documents: Documentos a dividir
+
+        Returns:
+            Chunks con metadata compatible con ChromaDB
+        """
+        # Limpiar metadata de todos los documentos ANTES de procesar (el
+        # splitter copia la metadata tal cual, no hace falta repetirlo)
+        print(f"🧹 Limpiando metadata de {len(documents)} documentos...")
+        for doc, metadata in zip(documents, clean_metadata_many([doc.metadata for doc in documents])):
+            doc.metadata = metadata
+            # Todos los chunks de un documento cargado pertenecen al mismo producto
+            if "product_id" not in doc.metadata and doc.metadata.get("source"):
+                doc.metadata["product_id"] = product_key(doc.metadata) or make_product_id(doc.metadata["source"])
+
+        whole_rows = self._rows_within_limit(documents)
+
+        # Dividir documentos en chunks (respetando el orden original)
+        splits = []
+        for i, doc in enumerate(documents):
+            if i in whole_rows:
+                doc.page_content = doc.page_content.strip()
+                if doc.page_content:
+                    splits.append(doc)
+            else:
+                splits.extend(self.text_splitter.split_documents([doc]))
+
+        print(f"📄 Documentos divididos en {len(splits)} chunks ({len(whole_rows)} filas sin dividir)")
+
+        return splits
+
+    def _rows_within_limit(self, documents: List[Document]) -> set:
+        """
+        Posiciones de las filas tabulares que se indexan como un único chunk
+
+        Una fila de hasta config.CHUNK_SIZE caracteres siempre cabe; las más
+        largas se tokenizan para comprobar que no superan el máximo de
+        tokens del modelo (si el modelo no expone su tokenizer, se dividen).
+
+        Args:
+            documents: Documentos con la metadata ya limpia
+
+        Returns:
+            Conjunto de posiciones en documents
+        """
+        rows = [i for i, doc in enumerate(documents) if doc.metadata.get("type") in TABULAR_TYPES]
+        whole = {i for i in rows if len(documents[i].page_content) <= config.CHUNK_SIZE}
+
+        long_rows = [i for i in rows if i not in whole]
+        # TorchEmbeddings y OnnxEmbeddings exponen el tokenizer del modelo
+        tokenizer = getattr(self.embeddings, "tokenizer", None)
+        max_tokens = getattr(self.embeddings, "max_seq_length", None)
+        if long_rows and tokenizer is not None and max_tokens:
+            token_ids = tokenizer([documents[i].page_content for i in long_rows], verbose=False)["input_ids"]
+            whole.update(i for i, ids in zip(long_rows, token_ids) if len(ids) <= max_tokens)
+
+        return whole
+
+    @staticmethod
+    def _chunk_ids(file_path: str, count: int, start: int = 0) -> List[str]:
+        """
+        Genera ids deterministas para los chunks de un archivo
+
+        Args:
+            file_path: Ruta al archivo de origen
+            count: Número de chunks
+            start: Índice del primer chunk (lotes posteriores de un mismo archivo)
+
+        Returns:
+            Lista de ids con formato '<hash de la ruta>-<índice>'
+        """
+        prefix = hashlib.sha1(file_path.encode('utf-8')).hexdigest()[:16]
+        return [f"{prefix}-{i:06d}" for i in range(start, start + count)]
+
+    def load_vectorstore(self) -> SearchBackend:
+        """
+        Carga un vectorstore existente (la versión publicada del índice)
+
+        Si la versión tiene un snapshot válido y la configuración lo admite
+        (backend numpy sin cuantizar ni shards) se abre mapeado en memoria
+        (arranque en frío en milisegundos); si no, el backend configurado.
+
+        Returns:
+            Índice de la versión publicada (snapshot o config.VECTOR_BACKEND)
+        """
+        versions = IndexVersions()
+        version = versions.current()
+        if version is None:
             raise ValueError(
-                f"No existe vectorstore en {config.CHROMA_DIR}. "
+                f"No existe vectorstore en {versions.root}. "
                 "Primero debes crear uno con create_vectorstore()"
             )
 
-        self.vectorstore = Chroma(
-            persist_directory=config.CHROMA_DIR,
-            embedding_function=self.embeddings
-        )
+        self._swap_index(self._open_index(versions.version_dir(version)), None, version)
 
-        print(f"✓ Vectorstore cargado desde {config.CHROMA_DIR}")
+        print(f"✓ Vectorstore cargado desde {self.vectorstore.directory} ({self.vectorstore.name}, versión {version})")
 
         return self.vectorstore
 
-    def search(self, query: str, k: int = None) -> List[Document]:
+    def check_for_update(self, force: bool = False) -> bool:
+        """
+        Recarga el índice si se publicó otra versión (otro proceso o una
+        sincronización desde Configuración), sin reiniciar la aplicación
+
+        El puntero se consulta como mucho una vez cada
+        config.INDEX_RELOAD_INTERVAL segundos. Mientras se abre la versión
+        nueva, las búsquedas siguen usando la anterior.
+
+        Args:
+            force: Comprobar aunque no haya pasado el intervalo
+
+        Returns:
+            True si se cargó otra versión
+        """
+        if self.vectorstore is None:
+            return False
+
+        now = time.monotonic()
+        if not force and now - self._last_version_check < config.INDEX_RELOAD_INTERVAL:
+            return False
+        self._last_version_check = now
+
+        versions = IndexVersions()
+        version = versions.current()
+        if version is None or version == self.index_version:
+            return False
+
+        # Si otro hilo ya está recargando, seguir con la versión actual
+        if not self._reload_lock.acquire(blocking=force):
+            return False
+        try:
+            if version == self.index_version:
+                return False
+            self._swap_index(self._open_index(versions.version_dir(version)), None, version)
+        finally:
+            self._reload_lock.release()
+
+        print(f"🔄 Vectorstore recargado: versión {version}")
+        return True
+
+    def rollback(self, version: str = None) -> str:
+        """
+        Vuelve a publicar una versión anterior del índice y la carga
+
+        Args:
+            version: Versión destino (por defecto la anterior a la publicada)
+
+        Returns:
+            Versión publicada
+        """
+        version = IndexVersions().rollback(version)
+        self.check_for_update(force=True)
+        return version
+
+    def list_index_versions(self) -> List[Dict[str, Any]]:
+        """
+        Versiones conservadas del índice
+
+        Returns:
+            Lista de versiones (la más reciente primero) con su información
+        """
+        return IndexVersions().list()
+
+    def export_snapshot(self) -> Dict[str, Any]:
+        """
+        Escribe el snapshot mmap de la versión cargada (p. ej. un índice
+        construido con INDEX_SNAPSHOT=false o anterior al versionado)
+
+        Returns:
+            Información del snapshot
+        """
+        if not self.vectorstore:
+            raise ValueError("Vectorstore no inicializado")
+        if self.vectorstore.name == "snapshot":
+            return self.vectorstore.info
+        if not snapshot_supported(self.vectorstore.directory):
+            raise ValueError(
+                "El snapshot solo sirve al backend numpy sin cuantización ni shards "
+                f"(índice {self.vectorstore.name}, cuantización {config.VECTOR_QUANTIZATION})"
+            )
+        return write_snapshot(
+            self.vectorstore,
+            os.path.join(self.vectorstore.directory, SNAPSHOT_DIR),
+            getattr(self.embeddings, "model_id", config.EMBEDDING_MODEL)
+        )
+
+    def _write_snapshot(self, backend: VectorBackend) -> bool:
+        """Escribe el snapshot de una versión recién construida (config.INDEX_SNAPSHOT)"""
+        if not config.INDEX_SNAPSHOT or not snapshot_supported(backend.directory):
+            return False
+        write_snapshot(
+            backend,
+            os.path.join(backend.directory, SNAPSHOT_DIR),
+            getattr(self.embeddings, "model_id", config.EMBEDDING_MODEL)
+        )
+        return True
+
+    def _open_index(self, directory: str) -> SearchBackend:
+        """Abre una versión del índice: su snapshot si es válido, si no el backend completo"""
+        snapshot = open_snapshot(directory, getattr(self.embeddings, "model_id", config.EMBEDDING_MODEL))
+        if snapshot is not None:
+            return snapshot
+        return create_backend(directory=directory)
+
+    def _swap_index(self, backend: SearchBackend, lexical_index: Optional[BM25Index], version: str):
+        """Sustituye el índice activo por otra versión e invalida las cachés"""
+        self.vectorstore = backend
+        self._lexical_index = lexical_index
+        self.index_version = version
+        self._bump_generation()
+
+    def warm_up(self, queries: List[str]) -> float:
+        """
+        Ejecuta consultas de calentamiento sin pasar por las cachés
+
+        Inicializa el tokenizer y el modelo, carga el índice del backend (y
+        el índice léxico si la búsqueda híbrida está activa) para que la
+        primera consulta real no pague ese coste.
+
+        Args:
+            queries: Consultas representativas
+
+        Returns:
+            Segundos empleados
+        """
+        if not self.vectorstore:
+            raise ValueError("Vectorstore no inicializado")
+
+        start = time.perf_counter()
+        for query in queries:
+            self.vectorstore.query(self.embeddings.embed_query(query), config.TOP_K_RESULTS)
+            if config.HYBRID_SEARCH:
+                self.lexical_index.search(query, config.HYBRID_CANDIDATES)
+        elapsed = time.perf_counter() - start
+
+        print(f"🔥 Calentamiento: {len(queries)} consulta(s) en {elapsed:.2f}s")
+        return elapsed
+
+    def search(
+        self,
+        query: str,
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
         """
-        Busca documentos similares a la consulta
+        Busca documentos similares a la consulta (con caché)
 
         Args:
             query: Consulta de búsqueda
             k: Número de resultados a devolver
+            filter: Filtro de metadata con sintaxis 'where' de Chroma (opcional)
 
         Returns:
             Lista de documentos relevantes
         """
+        return [doc for doc, _ in self.search_with_scores(query, k=k, filter=filter)]
+
+    def search_with_scores(
+        self,
+        query: str,
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None,
+        hybrid: Optional[bool] = None
+    ) -> List[tuple]:
+        """
+        Busca documentos con scores de similitud (con caché)
+
+        Args:
+            query: Consulta de búsqueda
+            k: Número de resultados a devolver
+            filter: Filtro de metadata con sintaxis 'where' de Chroma (opcional)
+            hybrid: Fusionar BM25 y búsqueda densa (por defecto config.HYBRID_SEARCH)
+
+        Returns:
+            Lista de tuplas (documento, score); menor score = más relevante
+        """
+        if not self.vectorstore:
+            raise ValueError("Vectorstore no inicializado")
+        self.check_for_update()
+
+        k = k or config.TOP_K_RESULTS
+        use_hybrid = config.HYBRID_SEARCH if hybrid is None else hybrid
+        mode = "hybrid" if use_hybrid else "dense"
+
+        # Verificar caché (consulta completa + k + filtros + modo + generación del índice)
+        cache_key = make_search_key(query, k, filter, self.index_generation, mode)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+        start = time.perf_counter()
+        query_embedding = self.embeddings.embed_query(query)
+        embedded = time.perf_counter()
+        if use_hybrid:
+            dense = self.vectorstore.query(query_embedding, max(k, config.HYBRID_CANDIDATES), filter)
+            results = self._hybrid_search(query, k, filter, dense=dense)
+        else:
+            results = self._dense_search_many([query_embedding], k, filter)[0]
+        finished = time.perf_counter()
+        self.latency.record(embedded - start, finished - embedded)
+
+        self.search_cache.put(cache_key, results)
+
+        if self.first_search_seconds is None:
+            self.first_search_seconds = finished - start
+            print(f"⏱️  Primera búsqueda: {self.first_search_seconds * 1000:.0f} ms")
+
+        return list(results)
+
+    def search_many(
+        self,
+        queries: List[str],
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Document]]:
+        """
+        Busca documentos para varias consultas a la vez (con caché)
+
+        Args:
+            queries: Consultas de búsqueda
+            k: Número de resultados por consulta
+            filter: Filtro de metadata con sintaxis 'where' de Chroma (opcional)
+
+        Returns:
+            Una lista de documentos por consulta, en el mismo orden
+        """
+        return [
+            [doc for doc, _ in results]
+            for results in self.search_many_with_scores(queries, k=k, filter=filter)
+        ]
+
+    def search_many_with_scores(
+        self,
+        queries: List[str],
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None,
+        hybrid: Optional[bool] = None
+    ) -> List[List[tuple]]:
+        """
+        Busca documentos con scores para varias consultas a la vez (con caché)
+
+        Las consultas que no están en caché se embeben en un único lote y se
+        resuelven con una sola consulta al backend. Las consultas repetidas
+        se calculan una vez.
+
+        Args:
+            queries: Consultas de búsqueda
+            k: Número de resultados por consulta
+            filter: Filtro de metadata con sintaxis 'where' de Chroma (opcional)
+            hybrid: Fusionar BM25 y búsqueda densa (por defecto config.HYBRID_SEARCH)
+
+        Returns:
+            Una lista de tuplas (documento, score) por consulta, en el mismo orden
+        """
         if not self.vectorstore:
             raise ValueError("Vectorstore no inicializado")
+        self.check_for_update()
 
         k = k or config.TOP_K_RESULTS
+        use_hybrid = config.HYBRID_SEARCH if hybrid is None else hybrid
+        mode = "hybrid" if use_hybrid else "dense"
+
+        results: List[Optional[List[tuple]]] = [None] * len(queries)
+        pending: Dict[str, List[int]] = {}  # consulta -> posiciones en la entrada
+        for position, query in enumerate(queries):
+            cached = self.search_cache.get(make_search_key(query, k, filter, self.index_generation, mode))
+            if cached is not None:
+                results[position] = list(cached)
+            else:
+                pending.setdefault(query, []).append(position)
 
-        results = self.vectorstore.similarity_search(query, k=k)
+        if pending:
+            missing = list(pending)
+            start = time.perf_counter()
+            query_embeddings = self._embed_queries(missing)
+            embedded = time.perf_counter()
+            if use_hybrid:
+                dense = self.vectorstore.query_many(
+                    query_embeddings, max(k, config.HYBRID_CANDIDATES), filter
+                )
+                batch = [
+                    self._hybrid_search(query, k, filter, dense=candidates)
+                    for query, candidates in zip(missing, dense)
+                ]
+            else:
+                batch = self._dense_search_many(query_embeddings, k, filter)
+            self.latency.record(embedded - start, time.perf_counter() - embedded, queries=len(missing))
+
+            for query, query_results in zip(missing, batch):
+                self.search_cache.put(
+                    make_search_key(query, k, filter, self.index_generation, mode),
+                    query_results
+                )
+                for position in pending[query]:
+                    results[position] = list(query_results)
 
         return results
 
-    def search_with_scores(self, query: str, k: int = None) -> List[tuple]:
+    async def asearch(
+        self,
+        query: str,
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
         """
-        Busca documentos con scores de similitud (con caché)
+        Versión asíncrona de search
 
         Args:
             query: Consulta de búsqueda
             k: Número de resultados a devolver
+            filter: Filtro de metadata con sintaxis 'where' de Chroma (opcional)
 
         Returns:
-            Lista de tuplas (documento, score)
+            Lista de documentos relevantes
+        """
+        return [doc for doc, _ in await self.asearch_with_scores(query, k=k, filter=filter)]
+
+    async def asearch_with_scores(
+        self,
+        query: str,
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None,
+        hybrid: Optional[bool] = None
+    ) -> List[tuple]:
+        """
+        Versión asíncrona de search_with_scores
+
+        Los aciertos de caché se resuelven sin salir del event loop; el resto
+        se calcula en el executor de búsquedas (config.SEARCH_WORKERS hilos).
+        Consultas idénticas simultáneas comparten un único cálculo.
+
+        Args:
+            query: Consulta de búsqueda
+            k: Número de resultados a devolver
+            filter: Filtro de metadata con sintaxis 'where' de Chroma (opcional)
+            hybrid: Fusionar BM25 y búsqueda densa (por defecto config.HYBRID_SEARCH)
+
+        Returns:
+            Lista de tuplas (documento, score); menor score = más relevante
         """
         if not self.vectorstore:
             raise ValueError("Vectorstore no inicializado")
 
         k = k or config.TOP_K_RESULTS
+        use_hybrid = config.HYBRID_SEARCH if hybrid is None else hybrid
+        cache_key = make_search_key(
+            query, k, filter, self.index_generation, "hybrid" if use_hybrid else "dense"
+        )
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
 
-        # Verificar caché (útil para consultas similares)
-        cache_key = f"{query[:100]}_{k}"  # Limitar tamaño de clave
-        if cache_key in self._search_cache:
-            return self._search_cache[cache_key]
+        results = await self._run_search(cache_key, self.search_with_scores, query, k, filter, use_hybrid)
+        return list(results)
+
+    async def asearch_many(
+        self,
+        queries: List[str],
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Document]]:
+        """
+        Versión asíncrona de search_many
 
-        results = self.vectorstore.similarity_search_with_score(query, k=k)
+        Returns:
+            Una lista de documentos por consulta, en el mismo orden
+        """
+        return [
+            [doc for doc, _ in results]
+            for results in await self.asearch_many_with_scores(queries, k=k, filter=filter)
+        ]
 
-        # Guardar en caché (máximo 50 búsquedas)
-        if len(self._search_cache) >= 50:
-            # Eliminar entrada más antigua
-            self._search_cache.pop(next(iter(self._search_cache)))
-        self._search_cache[cache_key] = results
+    async def asearch_many_with_scores(
+        self,
+        queries: List[str],
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None,
+        hybrid: Optional[bool] = None
+    ) -> List[List[tuple]]:
+        """
+        Versión asíncrona de search_many_with_scores (un único lote en el executor)
 
+        Returns:
+            Una lista de tuplas (documento, score) por consulta, en el mismo orden
+        """
+        if not self.vectorstore:
+            raise ValueError("Vectorstore no inicializado")
+
+        return await asyncio.wrap_future(
+            self._get_search_executor().submit(self.search_many_with_scores, queries, k, filter, hybrid)
+        )
+
+    async def _run_search(self, key: str, fn, *args):
+        """Ejecuta una búsqueda en el executor, compartiendo la que ya esté en curso"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._get_search_executor().submit(fn, *args)
+                self._inflight[key] = future
+                future.add_done_callback(lambda done: self._forget_inflight(key, done))
+        return await asyncio.wrap_future(future)
+
+    def _forget_inflight(self, key: str, future: Future):
+        with self._inflight_lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _get_search_executor(self) -> ThreadPoolExecutor:
+        """Executor acotado para las búsquedas asíncronas (se crea al primer uso)"""
+        with self._inflight_lock:
+            if self._search_executor is None:
+                self._search_executor = ThreadPoolExecutor(
+                    max_workers=max(1, config.SEARCH_WORKERS),
+                    thread_name_prefix="vectorstore-search"
+                )
+            return self._search_executor
+
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embebe varias consultas en una sola pasada del modelo"""
+        # Con query_encode_kwargs vacío, embed_documents usa los mismos parámetros que embed_query
+        return self.embeddings.embed_documents(list(queries))
+
+    def _dense_search_many(
+        self,
+        query_embeddings: List[List[float]],
+        k: int,
+        filter: Optional[Dict[str, Any]]
+    ) -> List[List[tuple]]:
+        """Búsqueda densa de un lote de embeddings (con caché semántica opcional)"""
+        if self.semantic_cache is None:
+            return self.vectorstore.query_many(query_embeddings, k, filter)
+
+        # Consultas con otra redacción pero mismo significado reutilizan resultados
+        scope = make_search_key("", k, filter, self.index_generation)
+        results = [self.semantic_cache.lookup(embedding, scope) for embedding in query_embeddings]
+        misses = [i for i, cached in enumerate(results) if cached is None]
+        if misses:
+            found = self.vectorstore.query_many([query_embeddings[i] for i in misses], k, filter)
+            for i, query_results in zip(misses, found):
+                self.semantic_cache.put(query_embeddings[i], scope, query_results)
+                results[i] = query_results
         return results
 
-    def get_retriever(self, k: int = None):
+    def _hybrid_search(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[Dict[str, Any]],
+        dense: Optional[List[tuple]] = None
+    ) -> List[tuple]:
+        """
+        Búsqueda híbrida: fusiona BM25 y búsqueda densa con Reciprocal Rank Fusion
+
+        El score devuelto es 1 - (RRF / RRF del mejor resultado), de modo que
+        conserva la convención de menor = más relevante.
+
+        Args:
+            query: Consulta de búsqueda
+            k: Número de resultados
+            filter: Filtro de metadata
+            dense: Candidatos densos ya calculados (búsquedas por lotes)
+        """
+        candidates = max(k, config.HYBRID_CANDIDATES)
+        if dense is None:
+            query_embedding = self.embeddings.embed_query(query)
+            dense = self.vectorstore.query(query_embedding, candidates, filter)
+        lexical = self.lexical_index.search(query, candidates)
+
+        docs_by_id = {doc.id: doc for doc, _ in dense}
+        missing = [chunk_id for chunk_id, _ in lexical if chunk_id not in docs_by_id]
+        for doc in self.vectorstore.get(missing):
+            if matches_filter(doc.metadata, filter):
+                docs_by_id[doc.id] = doc
+
+        fused = reciprocal_rank_fusion(
+            [
+                [doc.id for doc, _ in dense],
+                [chunk_id for chunk_id, _ in lexical if chunk_id in docs_by_id],
+            ],
+            k=config.RRF_K
+        )[:k]
+        if not fused:
+            return []
+
+        best = fused[0][1]
+        return [(docs_by_id[chunk_id], 1.0 - score / best) for chunk_id, score in fused]
+
+    def search_products(
+        self,
+        query: str,
+        k: int = None,
+        price_min: Optional[float] = None,
+        price_max: Optional[float] = None,
+        category: Optional[str] = None,
+        brands: Optional[List[str]] = None,
+        relax: bool = True,
+        strategy: str = None
+    ) -> List[tuple]:
+        """
+        Busca productos distintos filtrando por precio, categoría y marca dentro del índice
+
+        Los filtros se aplican en el motor vectorial antes del top-k. Si el
+        filtro completo devuelve menos de k resultados y relax=True, se
+        completan relajándolo por pasos: sin categoría, sin marca y sin filtro.
+
+        Args:
+            query: Consulta de búsqueda
+            k: Número de resultados a devolver
+            price_min: Presupuesto mínimo
+            price_max: Presupuesto máximo
+            category: Categoría de producto
+            brands: Marcas preferidas
+            relax: Completar con filtros menos estrictos si faltan resultados
+            strategy: Agrupación por producto, 'best' o 'mmr' (ver search_grouped)
+
+        Returns:
+            Lista de tuplas (mejor chunk de cada producto, score), sin productos
+            repetidos; menor score = más relevante
+        """
+        k = k or config.TOP_K_RESULTS
+        attempts = [build_product_filter(price_min, price_max, category, brands)]
+        if relax:
+            attempts += [
+                build_product_filter(price_min, price_max, None, brands),
+                build_product_filter(price_min, price_max),
+                None,
+            ]
+
+        results: List[tuple] = []
+        seen = set()
+        tried = []
+        for where in attempts:
+            if where in tried:
+                continue
+            tried.append(where)
+
+            for doc, score in self.search_grouped(query, n=k, filter=where, strategy=strategy):
+                key = product_key(doc.metadata, doc.id)
+                if key not in seen:
+                    seen.add(key)
+                    results.append((doc, score))
+            if len(results) >= k:
+                break
+
+        return results[:k]
+
+    def search_grouped(
+        self,
+        query: str,
+        n: int = None,
+        filter: Optional[Dict[str, Any]] = None,
+        strategy: str = None,
+        hybrid: Optional[bool] = None
+    ) -> List[tuple]:
+        """
+        Busca N productos distintos agrupando los chunks por producto
+
+        Cada producto se representa por su mejor chunk. Con strategy='best'
+        se ordenan por el score de ese chunk; con 'mmr' se eligen con Maximal
+        Marginal Relevance para no devolver productos casi idénticos. Si los
+        candidatos no alcanzan N productos se amplía la búsqueda.
+
+        Args:
+            query: Consulta de búsqueda
+            n: Número de productos distintos a devolver
+            filter: Filtro de metadata con sintaxis 'where' de Chroma (opcional)
+            strategy: 'best' o 'mmr' (por defecto config.PRODUCT_GROUPING)
+            hybrid: Fusionar BM25 y búsqueda densa (por defecto config.HYBRID_SEARCH)
+
+        Returns:
+            Lista de tuplas (mejor chunk del producto, score); menor score = más relevante
+        """
+        if not self.vectorstore:
+            raise ValueError("Vectorstore no inicializado")
+        self.check_for_update()
+
+        n = n or config.TOP_K_RESULTS
+        strategy = (strategy or config.PRODUCT_GROUPING).lower()
+        if strategy not in ("best", "mmr"):
+            raise ValueError(f"Estrategia de agrupación desconocida: {strategy}. Usa 'best' o 'mmr'")
+
+        use_hybrid = config.HYBRID_SEARCH if hybrid is None else hybrid
+        cache_key = make_search_key(
+            query, n, filter, self.index_generation,
+            f"products:{strategy}:{'hybrid' if use_hybrid else 'dense'}"
+        )
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+        # Sobre-recuperar chunks hasta tener suficientes productos candidatos
+        wanted = n * max(1, config.PRODUCT_OVERFETCH) if strategy == "mmr" else n
+        fetch = max(n * max(1, config.PRODUCT_OVERFETCH), n)
+        total = self.vectorstore.count()
+        while True:
+            hits = self.search_with_scores(query, k=fetch, filter=filter, hybrid=use_hybrid)
+            groups: Dict[Any, tuple] = {}
+            for doc, score in hits:  # Ordenados de más a menos relevante
+                groups.setdefault(product_key(doc.metadata, doc.id), (doc, score))
+            if len(groups) >= wanted or len(hits) < fetch or fetch >= total:
+                break
+            fetch = min(fetch * 2, total)
+
+        representatives = list(groups.values())
+        if strategy == "mmr" and len(representatives) > 1:
+            ids = [doc.id for doc, _ in representatives]
+            vectors = self.vectorstore.get_vectors(ids)
+            query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+            order = mmr_select(query_vector, vectors, n, config.MMR_LAMBDA)
+            results = [representatives[i] for i in order]
+        else:
+            results = representatives[:n]
+
+        self.search_cache.put(cache_key, results)
+        return list(results)
+
+    @property
+    def lexical_index(self) -> BM25Index:
+        """
+        Índice léxico BM25 del backend activo
+
+        Se carga desde disco la primera vez; si no existe (índices creados
+        antes de la búsqueda híbrida) se construye a partir del backend.
+        """
+        if self._lexical_index is None:
+            self._lexical_index = self._open_lexical_index(self.vectorstore)
+        return self._lexical_index
+
+    def _open_lexical_index(self, backend: SearchBackend) -> BM25Index:
+        """
+        Abre el índice léxico guardado junto a un backend
+
+        Si no existe (índices creados antes de la búsqueda híbrida) se
+        construye a partir de los textos del backend.
+        """
+        index = BM25Index.load(self._lexical_dir(backend))
+        if index is None:
+            index = BM25Index()
+            if backend.count():
+                print("🔤 Construyendo índice léxico BM25 a partir del vectorstore...")
+                exported = backend.export(include_vectors=False)
+                index.add(exported["ids"], exported["texts"])
+        return index
+
+    @staticmethod
+    def _lexical_dir(backend: SearchBackend) -> str:
+        """Directorio del índice léxico, junto al del backend"""
+        return os.path.join(backend.directory, "lexical_index")
+
+    def get_retriever(self, k: int = None) -> "CachedRetriever":
         """
         Obtiene un retriever para usar con chains
 
+        El retriever pasa por search(), por lo que comparte la caché de
+        búsquedas con el resto de la API.
+
         Args:
             k: Número de resultados a devolver
 
@@ -197,7 +1368,104 @@ class VectorStore:
 
         k = k or config.TOP_K_RESULTS
 
-        return self.vectorstore.as_retriever(
-            search_kwargs={"k": k}
-        )
+        return CachedRetriever(vector_store=self, k=k)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de las cachés del vectorstore
+
+        Returns:
+            Diccionario con las estadísticas de la caché de búsquedas y de embeddings
+        """
+        return {
+            "search": self.search_cache.stats(),
+            "semantic": self.semantic_cache.stats() if self.semantic_cache else None,
+            "embeddings": self.embedding_cache.stats() if self.embedding_cache else None,
+            "index_generation": self.index_generation,
+            "index_version": self.index_version,
+        }
+
+    def index_stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas del índice cargado y de las búsquedas recientes
+
+        Las métricas del contenido (chunks, fuentes, dimensión, memoria) se
+        calculan una vez por generación del índice; el tamaño en disco, las
+        cachés y las latencias se leen en cada llamada.
+
+        Returns:
+            Diccionario con backend, versión, chunks, fuentes distintas,
+            dimensión, tamaño en disco y memoria estimada (MB), duración de
+            la construcción, tasas de acierto de las cachés y percentiles de
+            latencia (embedding / índice / total)
+        """
+        if not self.vectorstore:
+            raise ValueError("Vectorstore no inicializado")
+
+        backend = self.vectorstore
+        generation = self.index_generation
+        if self._index_stats is None or self._index_stats[0] != generation:
+            exported = backend.export(include_vectors=False)
+            sources = {meta.get("source") for meta in exported["metadatas"] if meta.get("source")}
+            vectors = backend.get_vectors(exported["ids"][:1])
+            build_seconds = None
+            if self.index_version:
+                info = IndexVersions().read_info(self.index_version) or {}
+                build_seconds = info.get("build_seconds")
+            content = {
+                "chunks": len(exported["ids"]),
+                "sources": len(sources),
+                "dimension": int(vectors.shape[1]) if vectors.size else 0,
+                "memory_mb": backend.memory_bytes / (1024 * 1024),
+                "build_seconds": build_seconds,
+            }
+            self._index_stats = (generation, content)
+
+        caches = self.cache_stats()
+        return {
+            "backend": backend.name,
+            "embedding_model": getattr(self.embeddings, "model_id", config.EMBEDDING_MODEL),
+            "index_version": self.index_version,
+            "directory": backend.directory,
+            "hnsw": getattr(backend, "hnsw", None),
+            "shards": getattr(backend, "shard_sizes", None),
+            **self._index_stats[1],
+            "disk_mb": directory_size(backend.directory) / (1024 * 1024),
+            "cache_hit_rates": {
+                name: stats["hit_rate"] if stats else None
+                for name, stats in caches.items()
+                if name in ("search", "semantic", "embeddings")
+            },
+            "first_search_seconds": self.first_search_seconds,
+            "latency": self.latency.summary(),
+        }
+
+    def _bump_generation(self):
+        """Marca un cambio en el índice e invalida la caché de búsquedas"""
+        self.index_generation += 1
+        self.search_cache.clear()
+        if self.semantic_cache is not None:
+            self.semantic_cache.clear()
+
+
+class CachedRetriever(BaseRetriever):
+    """Retriever de LangChain que delega en VectorStore.search (y su caché)"""
+
+    vector_store: Any
+    k: int = 4
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.vector_store.search(query, k=self.k)
 
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return await self.vector_store.asearch(query, k=self.k)
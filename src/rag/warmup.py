@@ -0,0 +1,168 @@
+"""
+Carga en segundo plano y calentamiento del VectorStore
+"""
+from typing import Optional, Dict, List
+import os
+import threading
+import time
+
+from src.config import config
+
+MAX_RETRY_SECONDS = 600  # Tope de la espera entre reintentos tras un error
+
+STATE_LABELS = {
+    "pending": "En cola",
+    "loading_model": "Cargando modelo de embeddings",
+    "loading_index": "Cargando índice vectorial",
+    "warming_up": "Calentando con consultas de prueba",
+    "ready": "Listo",
+    "missing": "Índice no procesado",
+    "error": "Error",
+}
+
+
+def index_exists() -> bool:
+    """Indica si hay un índice vectorial procesado para el backend configurado"""
+    index_dir = config.vector_index_dir()
+    return os.path.isdir(index_dir) and any(os.scandir(index_dir))
+
+
+class VectorStoreLoader:
+    """
+    Carga el VectorStore en un hilo en segundo plano.
+
+    Pasa por los estados pending -> loading_model -> loading_index ->
+    warming_up -> ready (o missing / error), que la interfaz puede mostrar
+    mientras tanto. Registra la duración de cada fase en 'timings'.
+
+    Args:
+        warmup_queries: Consultas de calentamiento (por defecto config.WARMUP_QUERIES)
+        attempt: Número de intento (1 = primera carga; crece con cada reintento tras un error)
+    """
+
+    def __init__(self, warmup_queries: Optional[List[str]] = None, attempt: int = 1):
+        self.warmup_queries = config.WARMUP_QUERIES if warmup_queries is None else warmup_queries
+        self.attempt = attempt
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.vector_store = None
+        self.timings: Dict[str, float] = {}
+        self.finished_at: Optional[float] = None  # time.monotonic() al terminar
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "VectorStoreLoader":
+        """Arranca la carga (solo la primera vez)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="vectorstore-loader", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        """Carga el modelo y el índice y ejecuta el calentamiento"""
+        start = time.perf_counter()
+        try:
+            if not index_exists():
+                self.state = "missing"
+                return
+
+            self.state = "loading_model"
+            phase = time.perf_counter()
+            from src.rag.vector_store import VectorStore  # Importa torch/transformers en este hilo
+            vector_store = VectorStore()
+            self.timings["model_seconds"] = time.perf_counter() - phase
+
+            self.state = "loading_index"
+            phase = time.perf_counter()
+            vector_store.load_vectorstore()
+            self.timings["index_seconds"] = time.perf_counter() - phase
+
+            if config.WARMUP_ENABLED and self.warmup_queries:
+                self.state = "warming_up"
+                self.timings["warmup_seconds"] = vector_store.warm_up(self.warmup_queries)
+
+            self.vector_store = vector_store
+            self.state = "ready"
+        except Exception as e:
+            self.error = str(e)
+            self.state = "error"
+            print(f"❌ Error cargando VectorStore: {self.error}")
+        finally:
+            self.timings["total_seconds"] = time.perf_counter() - start
+            self.finished_at = time.monotonic()
+            self._ready.set()
+            if self.state == "ready":
+                print(
+                    "⏱️  VectorStore listo en {total_seconds:.2f}s (modelo {model_seconds:.2f}s, "
+                    "índice {index_seconds:.2f}s, calentamiento {warmup:.2f}s)".format(
+                        warmup=self.timings.get("warmup_seconds", 0.0), **self.timings
+                    )
+                )
+
+    @property
+    def is_loading(self) -> bool:
+        return not self._ready.is_set()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == "ready"
+
+    @property
+    def status_label(self) -> str:
+        return STATE_LABELS.get(self.state, self.state)
+
+    @property
+    def retry_delay(self) -> float:
+        """Espera antes de reintentar una carga fallida (se duplica con cada intento)"""
+        return min(config.LOAD_RETRY_SECONDS * 2 ** (self.attempt - 1), MAX_RETRY_SECONDS)
+
+    def can_retry(self) -> bool:
+        """Indica si una carga fallida ya esperó lo suficiente para reintentarse"""
+        return (
+            self.state == "error"
+            and self.finished_at is not None
+            and time.monotonic() - self.finished_at >= self.retry_delay
+        )
+
+    def wait(self, timeout: Optional[float] = None):
+        """
+        Espera a que termine la carga
+
+        Args:
+            timeout: Segundos máximos de espera (None = sin límite)
+
+        Returns:
+            VectorStore cargado, o None si no terminó, no hay índice o falló
+        """
+        self._ready.wait(timeout)
+        return self.vector_store
+
+
+_loader: Optional[VectorStoreLoader] = None
+_loader_lock = threading.Lock()
+
+
+def get_vector_store_loader(retry: bool = False) -> VectorStoreLoader:
+    """
+    Devuelve el cargador compartido del proceso, arrancándolo si hace falta
+
+    Si la última carga terminó sin índice y ahora existe uno (se procesaron
+    documentos desde Configuración), se lanza una carga nueva. Una carga
+    fallida se reintenta pasado config.LOAD_RETRY_SECONDS, con una espera
+    que se duplica en cada fallo seguido (hasta MAX_RETRY_SECONDS), o al
+    momento si se pide con 'retry'.
+
+    Args:
+        retry: Reintentar ya una carga fallida (p. ej. botón de la interfaz)
+
+    Returns:
+        Cargador del VectorStore (ya arrancado)
+    """
+    global _loader
+    with _loader_lock:
+        if _loader is None or (_loader.state == "missing" and index_exists()):
+            _loader = VectorStoreLoader().start()
+        elif _loader.state == "error" and (retry or _loader.can_retry()):
+            print(f"🔄 Reintentando la carga del VectorStore (intento {_loader.attempt + 1})")
+            _loader = VectorStoreLoader(attempt=_loader.attempt + 1).start()
+        return _loader
@@ -0,0 +1,63 @@
+"""
+Hilos de cómputo (torch, OpenMP, BLAS) de los procesos de un pool
+"""
+from contextlib import contextmanager
+import os
+import sys
+
+# Variables que leen torch, OpenMP y las bibliotecas BLAS al importarse
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def threads_per_worker(workers: int, total: int = None) -> int:
+    """
+    Hilos que corresponden a cada proceso para no sobre-suscribir la CPU
+
+    Args:
+        workers: Procesos del pool
+        total: Hilos a repartir (por defecto todos los núcleos)
+
+    Returns:
+        Hilos por proceso (al menos 1)
+    """
+    total = total or os.cpu_count() or 1
+    return max(1, total // max(1, workers))
+
+
+@contextmanager
+def worker_threads(threads: int):
+    """
+    Limita los hilos de los procesos hijos arrancados dentro del bloque
+
+    Los procesos 'spawn' heredan el entorno del padre, y torch, OpenMP y
+    BLAS fijan su número de hilos al importarse en el hijo.
+
+    Args:
+        threads: Hilos por proceso hijo
+    """
+    previous = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    os.environ.update({name: str(threads) for name in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def limit_worker_threads(threads: int):
+    """
+    Inicializador de un pool de procesos: limita los hilos del proceso actual
+
+    Fija las variables de entorno para las bibliotecas que aún no se hayan
+    importado y ajusta torch si ya está cargado.
+
+    Args:
+        threads: Hilos del proceso
+    """
+    os.environ.update({name: str(threads) for name in THREAD_ENV_VARS})
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)